@@ -10,24 +10,35 @@ __identifier__ = 'bilibili'
 
 from feeluown.app.gui_app import GuiApp
 
+from fuo_bilibili.prefetch import MediaPrefetcher
 from fuo_bilibili.provider import BilibiliProvider
 from fuo_bilibili.ui import BUiManager
 
 provider = BilibiliProvider()
 ui_mgr: Optional[BUiManager] = None
+prefetcher: Optional[MediaPrefetcher] = None
 
 
 # noinspection PyProtectedMember
 def enable(app: Union[App, GuiApp]):
-    global ui_mgr
+    global ui_mgr, prefetcher
+    provider.open()
     app.library.register(provider)
+    provider.prewarm()
+    if getattr(app, 'playlist', None) is not None:
+        prefetcher = MediaPrefetcher(provider, app.playlist)
+        prefetcher.attach()
     if app.mode & App.GuiMode:
         ui_mgr = BUiManager(app, provider)
 
 
 def disable(app: App):
+    global prefetcher
     app.library.deregister(provider)
+    if prefetcher is not None:
+        prefetcher.detach()
+        prefetcher = None
     if app.mode & App.GuiMode:
-        provider.close()
         # noinspection PyUnresolvedReferences
         app.providers.remove(provider.identifier)
+    provider.close()
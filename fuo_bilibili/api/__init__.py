@@ -1,32 +1,173 @@
-import json
+import asyncio
+import contextvars
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from http.cookiejar import MozillaCookieJar
-from typing import Type, Optional, Union
+from typing import Type, Optional, Union, Dict, Tuple, Set, Hashable, Callable, Any, Awaitable, Iterator, List, \
+    Sequence
 
+import httpx
 import requests.cookies
-from cachetools import LRUCache, cached
+from feeluown.utils.dispatch import Signal
 from pydantic import BaseModel
 
+from fuo_bilibili.api.async_api import AsyncBilibiliApi
 from fuo_bilibili.api.audio import AudioMixin
 from fuo_bilibili.api.base import BaseMixin
+from fuo_bilibili.api.cache import ApiCache, CachePolicy, CacheStats, CacheState
+from fuo_bilibili.api.circuit import BreakerConfig, CircuitBreakers
+from fuo_bilibili.api.decoder import ResponseDecoder
+from fuo_bilibili.api.connection import ConnectionManager
+from fuo_bilibili.api.disk_cache import DiskCache
+from fuo_bilibili.api.exceptions import HttpStatusError, ApiCodeError, RiskControlError, ApiTimeoutError, \
+    RequestCancelledError
 from fuo_bilibili.api.history import HistoryMixin
 from fuo_bilibili.api.login import LoginMixin
 from fuo_bilibili.api.playlist import PlaylistMixin
+from fuo_bilibili.api.ratelimit import RateLimit, RateLimiter, RISK_CONTROL_CODES, RISK_CONTROL_STATUS
+from fuo_bilibili.api.scheduler import Priority, RequestScheduler, request_priority
 from fuo_bilibili.api.schema.enums import VideoQualityNum, SearchType
 from fuo_bilibili.api.schema.requests import BaseRequest, VideoInfoRequest, PlayUrlRequest, SearchRequest, \
     FavoriteListRequest, PaginatedRequest, AudioFavoriteSongsRequest
 from fuo_bilibili.api.schema.responses import BaseResponse
+from fuo_bilibili.api.singleflight import SingleFlight, FlightStats
+from fuo_bilibili.api.timeout import Timeout, RequestTimeouts, TimeoutStats, Deadline, current_deadline, \
+    request_deadline
 from fuo_bilibili.api.user import UserMixin
 from fuo_bilibili.api.video import VideoMixin
-from fuo_bilibili.const import PLUGIN_API_COOKIEJAR_FILE
-
-CACHE = LRUCache(30)
+from fuo_bilibili.const import PLUGIN_API_COOKIEJAR_FILE, PLUGIN_API_CACHE_FILE, PLUGIN_API_CACHE_MAX_BYTES
 
 
 class BilibiliApi(BaseMixin, VideoMixin, LoginMixin, PlaylistMixin, HistoryMixin, UserMixin, AudioMixin):
-    def __init__(self):
+    CONTENT_ENDPOINT = 'content'
+    CACHE_POLICIES = {
+        CONTENT_ENDPOINT: CachePolicy(ttl=3600, maxsize=50),
+    }
+    RATE_LIMITS = {
+        'api.bilibili.com': RateLimit(rate=10, burst=20),
+        'passport.bilibili.com': RateLimit(rate=2, burst=5),
+        'www.bilibili.com': RateLimit(rate=5, burst=10),
+    }
+    TIMEOUTS = {
+        CONTENT_ENDPOINT: Timeout(total=15, connect=5, read=10),
+    }
+    # 触发风控后退避重试的次数
+    RISK_CONTROL_RETRIES = 2
+
+    def __init__(self, persistent_cache: bool = True, connections: Optional[ConnectionManager] = None,
+                 rate_limits: Optional[Dict[str, RateLimit]] = None,
+                 concurrency: Optional[Dict[Priority, int]] = None, timeouts: Optional[Dict[str, Timeout]] = None,
+                 breakers: Optional[Dict[str, BreakerConfig]] = None, strict_schema: bool = False):
+        """
+        :param persistent_cache: 是否启用磁盘响应缓存
+        :param connections: 按主机划分的连接池配置
+        :param rate_limits: 按主机名或接口地址覆盖的限流配置
+        :param concurrency: 各优先级的并发上限
+        :param timeouts: 按接口地址覆盖的超时配置
+        :param breakers: 按主机名或接口地址覆盖的熔断配置
+        :param strict_schema: 对所有响应做完整的模型校验（较慢），用于测试
+        """
         self._cookie = MozillaCookieJar(PLUGIN_API_COOKIEJAR_FILE)
-        self._session = requests.Session()
+        self._connections = connections or ConnectionManager()
+        self._session = self._connections.create_session()
         self._session.cookies = self._cookie
+        self._cache = ApiCache(self._collect('CACHE_POLICIES'))
+        self._limiter = RateLimiter({**self._collect('RATE_LIMITS'), **(rate_limits or {})})
+        self._scheduler = RequestScheduler(concurrency)
+        self._timeouts = RequestTimeouts({**self._collect('TIMEOUTS'), **(timeouts or {})})
+        self._breakers = CircuitBreakers(breakers)
+        self._page_sizes: Dict[str, int] = self._collect('PAGE_SIZES')
+        self._decoder = ResponseDecoder(strict=strict_schema)
+        self._disk_cache: Optional[DiskCache] = None
+        self._flight = SingleFlight()
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aio: Optional[AsyncBilibiliApi] = None
+        self._refreshing: Set[Hashable] = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='bilibili-refresh')
+        # signal: url, request, response 后台刷新得到新数据
+        self.cache_refreshed = Signal()
+        if persistent_cache:
+            try:
+                self._disk_cache = DiskCache(PLUGIN_API_CACHE_FILE, PLUGIN_API_CACHE_MAX_BYTES)
+            except sqlite3.Error as e:
+                print(f'persistent cache disabled: {str(e)}')
+
+    @classmethod
+    def _collect(cls, name: str) -> dict:
+        # 合并各混入类声明的接口配置
+        declared = dict()
+        for klass in reversed(cls.__mro__):
+            declared.update(vars(klass).get(name, {}))
+        return declared
+
+    def max_page_size(self, url: str) -> int:
+        """
+        :return: 分页接口允许的最大 ps，未声明时为 PaginatedRequest 的默认值
+        """
+        return self._page_sizes.get(ApiCache.endpoint_of(url), PaginatedRequest.__fields__['ps'].default)
+
+    def cache_stats(self) -> Dict[str, CacheStats]:
+        """
+        各接口缓存命中、未命中与淘汰计数
+        """
+        return self._cache.stats()
+
+    def coalescing_stats(self) -> Dict[str, FlightStats]:
+        """
+        各接口实际调用数与被合并的重复调用数
+        """
+        return self._flight.stats()
+
+    def rate_limit_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        各主机与接口当前限流速率、累计被限流次数与剩余退避时间
+        """
+        return self._limiter.stats()
+
+    def scheduler_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        各优先级进行中与等待中的请求数
+        """
+        return self._scheduler.stats()
+
+    def timeout_stats(self) -> Dict[str, TimeoutStats]:
+        """
+        各接口超时与被取消的调用数
+        """
+        return self._timeouts.stats()
+
+    def circuit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各主机与接口熔断状态、连续失败数与被拒绝的请求数
+        """
+        return self._breakers.stats()
+
+    def clear_cache(self):
+        self._cache.clear()
+        if self._disk_cache is not None:
+            self._disk_cache.clear()
+
+    def _cache_namespace(self) -> str:
+        # 缓存按登录用户隔离，DedeUserID 即当前登录用户 mid
+        for cookie in self._cookie:
+            if cookie.name == 'DedeUserID':
+                return cookie.value
+        return 'guest'
+
+    @property
+    def namespace(self) -> str:
+        """
+        当前登录用户，用于按用户隔离的本地状态
+        """
+        return self._cache_namespace()
+
+    def _cache_key(self, url: str, param: Optional[BaseRequest],
+                   clazz: Union[Type[BaseResponse], Type[BaseModel], None]) -> Tuple:
+        # 内存缓存与合并请求同样按登录用户区分，切换账号后不会返回上一个用户的数据
+        return self._cache_namespace(), url, param, clazz
 
     @staticmethod
     def cookie_check():
@@ -41,49 +182,388 @@ class BilibiliApi(BaseMixin, VideoMixin, LoginMixin, PlaylistMixin, HistoryMixin
         print('dumping cookies to file')
         self._cookie.save()
 
-    def get_uncached(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) \
-            -> Union[BaseResponse, BaseModel, None]:
-        print(f'Requesting: {url}...')
-        if param is None:
-            r = self._session.get(url, **kwargs)
-        else:
-            r = self._session.get(url, params=json.loads(param.json(exclude_none=True)), **kwargs)
+    @property
+    def aio(self) -> AsyncBilibiliApi:
+        """
+        异步接口，与同步接口共享缓存与 Cookie
+        """
+        if self._aio is None:
+            self._aio = AsyncBilibiliApi(self)
+        return self._aio
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # 整个进程复用同一个连接池，Cookie 与同步会话共用同一个 CookieJar
+        if self._aclient is None:
+            self._aclient = self._connections.create_async_client(self._cookie)
+        return self._aclient
+
+    def prewarm(self):
+        """
+        预先建立到接口主机的连接，避免首次请求承担 DNS、TCP 与 TLS 开销
+        """
+        self._connections.prewarm(self._session)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self._connections.aprewarm(self._async_client()))
+
+    @staticmethod
+    def _check_status(r: Union[requests.Response, httpx.Response]):
+        if r.status_code in RISK_CONTROL_STATUS:
+            raise RiskControlError(r.status_code, 'http status')
         if r.status_code != 200:
             print(r.text)
-            raise RuntimeError('http not 200')
+            raise HttpStatusError(r.status_code)
+
+    @contextmanager
+    def _budget(self, endpoint: str) -> Iterator[Deadline]:
+        """
+        为一次调用设置时间预算，调用方已通过 request_deadline 指定时沿用，
+        各类超时统一转换为 ApiTimeoutError
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            deadline = self._timeouts.deadline(endpoint)
+        try:
+            with request_deadline(deadline):
+                yield deadline
+        except (requests.Timeout, httpx.TimeoutException, asyncio.TimeoutError, TimeoutError) as e:
+            self._timeouts.record_timeout(endpoint)
+            raise ApiTimeoutError(endpoint, deadline.budget) from e
+        except ApiTimeoutError:
+            self._timeouts.record_timeout(endpoint)
+            raise
+        except RequestCancelledError:
+            self._timeouts.record_cancel(endpoint)
+            raise
+
+    def _deadline(self, endpoint: str) -> Deadline:
+        return current_deadline() or self._timeouts.deadline(endpoint)
+
+    def _backoff(self, url: str, call: Callable[[], Any]) -> Any:
+        """
+        根据风控结果调整限流，并在退避后重试
+        """
+        attempt = 0
+        while True:
+            try:
+                res = call()
+            except RiskControlError:
+                self._limiter.penalize(url)
+                if attempt >= self.RISK_CONTROL_RETRIES:
+                    raise
+                attempt += 1
+                continue
+            self._limiter.reward(url)
+            return res
+
+    async def _abackoff(self, url: str, acall: Callable[[], Awaitable[Any]]) -> Any:
+        attempt = 0
+        while True:
+            try:
+                res = await acall()
+            except RiskControlError:
+                self._limiter.penalize(url)
+                if attempt >= self.RISK_CONTROL_RETRIES:
+                    raise
+                attempt += 1
+                continue
+            self._limiter.reward(url)
+            return res
+
+    def _request(self, url: str, param: Optional[BaseRequest], **kwargs) -> requests.Response:
+        endpoint = ApiCache.endpoint_of(url)
+        deadline = self._deadline(endpoint)
+        self._breakers.check(url)
+        deadline.sleep(self._limiter.reserve(url), endpoint)
+        print(f'Requesting: {url}...')
+        with self._scheduler.slot(deadline.remaining()):
+            deadline.check(endpoint)
+            kwargs.setdefault('timeout', deadline.bound(self._timeouts.policy(endpoint)))
+            with self._breakers.guard(url):
+                if param is None:
+                    r = self._session.get(url, **kwargs)
+                else:
+                    r = self._session.get(url, params=param.params, **kwargs)
+                self._check_status(r)
+        return r
+
+    async def _afetch(self, url: str, param: Optional[BaseRequest], **kwargs) -> httpx.Response:
+        async with self._scheduler.aslot():
+            with self._breakers.guard(url):
+                if param is None:
+                    r = await self._async_client().get(url, **kwargs)
+                else:
+                    r = await self._async_client().get(url, params=param.params, **kwargs)
+                self._check_status(r)
+        return r
+
+    async def _arequest(self, url: str, param: Optional[BaseRequest], **kwargs) -> httpx.Response:
+        endpoint = ApiCache.endpoint_of(url)
+        deadline = self._deadline(endpoint)
+        self._breakers.check(url)
+        await deadline.asleep(self._limiter.reserve(url), endpoint)
+        print(f'Requesting: {url}...')
+        connect, read = deadline.bound(self._timeouts.policy(endpoint))
+        kwargs.setdefault('timeout', httpx.Timeout(read, connect=connect))
+        # 排队与传输整体受剩余预算约束
+        return await asyncio.wait_for(self._afetch(url, param, **kwargs), deadline.remaining())
+
+    def _parse(self, content: Union[str, bytes], clazz: Union[Type[BaseResponse], Type[BaseModel]]) \
+            -> Union[BaseResponse, BaseModel]:
+        res: Union[BaseResponse, BaseModel] = self._decoder.decode(content, clazz)
+        if isinstance(res, BaseResponse) and res.code != 0:
+            if res.code in RISK_CONTROL_CODES:
+                raise RiskControlError(res.code, res.message)
+            raise ApiCodeError(res.code, res.message)
+        return res
+
+    def get_uncached(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) \
+            -> Union[BaseResponse, BaseModel, None]:
+        def call():
+            r = self._request(url, param, **kwargs)
+            if clazz is None:
+                return None
+            return self._parse(r.content, clazz)
+
+        with self._budget(ApiCache.endpoint_of(url)):
+            return self._backoff(url, call)
+
+    async def aget_uncached(self, url: str, param: Optional[BaseRequest],
+                            clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) \
+            -> Union[BaseResponse, BaseModel, None]:
+        async def call():
+            r = await self._arequest(url, param, **kwargs)
+            if clazz is None:
+                return None
+            return self._parse(r.content, clazz)
+
+        with self._budget(ApiCache.endpoint_of(url)):
+            return await self._abackoff(url, call)
+
+    def _load_persisted(self, endpoint: str, url: str, param: Optional[BaseRequest],
+                        clazz: Union[Type[BaseResponse], Type[BaseModel], None]) \
+            -> Tuple[Union[BaseResponse, BaseModel, None], bool]:
+        """
+        :return: (磁盘缓存中的响应, 是否未过期)
+        """
+        if self._disk_cache is None or self._cache.policy(endpoint).disk_ttl is None or clazz is None:
+            return None, False
+        namespace = self._cache_namespace()
+        key = DiskCache.make_key(url, param)
+        entry = self._disk_cache.load(namespace, key)
+        if entry is None:
+            return None, False
+        body, fresh = entry
+        try:
+            return self._parse(body, clazz), fresh
+        except (ValueError, RuntimeError):
+            # 接口模型变化后旧数据失效
+            self._disk_cache.delete(namespace, key)
+            return None, False
+
+    def _accept(self, endpoint: str, url: str, param: Optional[BaseRequest],
+                clazz: Union[Type[BaseResponse], Type[BaseModel], None],
+                r: Union[requests.Response, httpx.Response]) -> Union[BaseResponse, BaseModel, None]:
+        """
+        解析网络响应，并写入内存与磁盘缓存
+        """
         if clazz is None:
             return None
-        response_str = r.text
-        res: Union[BaseResponse, BaseModel] = clazz.parse_raw(response_str)
-        if isinstance(res, BaseResponse) and res.code != 0:
-            raise RuntimeError(f'code not ok: {res.message}')
+        res = self._parse(r.content, clazz)
+        disk_ttl = self._cache.policy(endpoint).disk_ttl
+        if self._disk_cache is not None and disk_ttl is not None:
+            self._disk_cache.store(self._cache_namespace(), DiskCache.make_key(url, param), endpoint, r.content,
+                                   disk_ttl)
+        self._cache.store(endpoint, self._cache_key(url, param, clazz), res)
         return res
 
-    @cached(CACHE)
+    def _load(self, endpoint: str, url: str, param: Optional[BaseRequest],
+              clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) \
+            -> Union[BaseResponse, BaseModel, None]:
+        def call():
+            return self._accept(endpoint, url, param, clazz, self._request(url, param, **kwargs))
+
+        with self._budget(endpoint):
+            return self._backoff(url, call)
+
+    async def _aload(self, endpoint: str, url: str, param: Optional[BaseRequest],
+                     clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) \
+            -> Union[BaseResponse, BaseModel, None]:
+        async def call():
+            return self._accept(endpoint, url, param, clazz, await self._arequest(url, param, **kwargs))
+
+        with self._budget(endpoint):
+            return await self._abackoff(url, call)
+
+    def _revalidate(self, endpoint: str, url: str, param: Optional[BaseRequest],
+                    clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs):
+        key = self._cache_key(url, param, clazz)
+        with self._refresh_lock:
+            # 同一请求只保留一个后台刷新
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with request_priority(Priority.BACKGROUND):
+                    res = self._flight.do(endpoint, key, lambda: self._load(endpoint, url, param, clazz, **kwargs))
+            except Exception as e:
+                print(f'Refreshing {url} failed: {str(e)}')
+                return
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+            self.cache_refreshed.emit(url, param, res)
+
+        self._refresh_executor.submit(refresh)
+
+    def _lookup(self, endpoint: str, url: str, param: Optional[BaseRequest],
+                clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) \
+            -> Tuple[bool, Union[BaseResponse, BaseModel, None]]:
+        """
+        依次查找内存与磁盘缓存，必要时安排后台刷新
+
+        :return: (是否可直接返回, 响应)
+        """
+        state, res = self._cache.lookup(endpoint, self._cache_key(url, param, clazz))
+        if state is CacheState.FRESH:
+            return True, res
+        if state is CacheState.MISS:
+            res, fresh = self._load_persisted(endpoint, url, param, clazz)
+            if res is not None and fresh:
+                self._cache.store(endpoint, self._cache_key(url, param, clazz), res)
+                return True, res
+            if res is None or not self._cache.policy(endpoint).stale_while_revalidate:
+                return False, None
+        self._revalidate(endpoint, url, param, clazz, **kwargs)
+        return True, res
+
     def get(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs)\
             -> Union[BaseResponse, BaseModel, None]:
-        return self.get_uncached(url, param, clazz, **kwargs)
+        endpoint = ApiCache.endpoint_of(url)
+        found, res = self._lookup(endpoint, url, param, clazz, **kwargs)
+        if found:
+            return res
+        # 并发的相同请求共享同一次网络调用，等待者仍受自己的预算约束
+        deadline = self._deadline(endpoint)
+        with request_deadline(deadline):
+            return self._flight.do(endpoint, self._cache_key(url, param, clazz),
+                                   lambda: self._load(endpoint, url, param, clazz, **kwargs), deadline)
+
+    async def aget(self, url: str, param: Optional[BaseRequest],
+                   clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) \
+            -> Union[BaseResponse, BaseModel, None]:
+        endpoint = ApiCache.endpoint_of(url)
+        found, res = self._lookup(endpoint, url, param, clazz, **kwargs)
+        if found:
+            return res
+        deadline = self._deadline(endpoint)
+        with request_deadline(deadline):
+            return await self._flight.ado(endpoint, self._cache_key(url, param, clazz),
+                                          lambda: self._aload(endpoint, url, param, clazz, **kwargs), deadline)
+
+    def _fetch_content(self, url: str) -> str:
+        with self._budget(self.CONTENT_ENDPOINT) as deadline:
+            deadline.check(self.CONTENT_ENDPOINT)
+            with self._breakers.guard(url):
+                return self._session.get(url, timeout=deadline.bound(self._timeouts.policy(self.CONTENT_ENDPOINT))).text
+
+    def get_many(self, url: str, params: Sequence[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel]],
+                 concurrency: int = 8) -> List[Union[BaseResponse, BaseModel, Exception]]:
+        """
+        并发请求同一接口的多组参数，相同参数只请求一次
+
+        :param concurrency: 同时进行的请求数上限
+        :return: 与 params 顺序一致，失败的项为对应的异常
+        """
+        unique = list(dict.fromkeys(params))
+        if not unique:
+            return []
+
+        def call(param: BaseRequest):
+            try:
+                return self.get(url, param, clazz)
+            except Exception as e:
+                return e
+
+        # 优先级与时间预算随上下文传入工作线程
+        with ThreadPoolExecutor(max_workers=min(max(1, concurrency), len(unique)),
+                                thread_name_prefix='bilibili-batch') as executor:
+            futures = [executor.submit(contextvars.copy_context().run, call, param) for param in unique]
+        results = {param: future.result() for param, future in zip(unique, futures)}
+        return [results[param] for param in params]
+
+    async def aget_many(self, url: str, params: Sequence[BaseRequest],
+                        clazz: Union[Type[BaseResponse], Type[BaseModel]], concurrency: int = 8) \
+            -> List[Union[BaseResponse, BaseModel, Exception]]:
+        unique = list(dict.fromkeys(params))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def call(param: BaseRequest):
+            async with semaphore:
+                try:
+                    return await self.aget(url, param, clazz)
+                except Exception as e:
+                    return e
+
+        results = dict(zip(unique, await asyncio.gather(*(call(param) for param in unique))))
+        return [results[param] for param in params]
 
-    @cached(CACHE)
     def get_content(self, url: str) -> str:
-        return self._session.get(url).text
+        deadline = self._deadline(self.CONTENT_ENDPOINT)
+        with request_deadline(deadline):
+            return self._cache.get_or_fetch(
+                self.CONTENT_ENDPOINT, url,
+                lambda: self._flight.do(self.CONTENT_ENDPOINT, url, lambda: self._fetch_content(url), deadline))
+
+    async def aget_content(self, url: str) -> str:
+        state, content = self._cache.lookup(self.CONTENT_ENDPOINT, url)
+        if state is CacheState.FRESH:
+            return content
+
+        async def fetch():
+            with self._budget(self.CONTENT_ENDPOINT) as deadline:
+                deadline.check(self.CONTENT_ENDPOINT)
+                connect, read = deadline.bound(self._timeouts.policy(self.CONTENT_ENDPOINT))
+                with self._breakers.guard(url):
+                    r = await asyncio.wait_for(
+                        self._async_client().get(url, timeout=httpx.Timeout(read, connect=connect)),
+                        deadline.remaining())
+            self._cache.store(self.CONTENT_ENDPOINT, url, r.text)
+            return r.text
+
+        deadline = self._deadline(self.CONTENT_ENDPOINT)
+        with request_deadline(deadline):
+            return await self._flight.ado(self.CONTENT_ENDPOINT, url, fetch, deadline)
 
     def post(self, url: str, param: Optional[BaseRequest], clazz: Type[BaseResponse], is_json=False, **kwargs)\
             -> BaseResponse:
-        if param is None:
-            r = self._session.post(url, **kwargs)
-        else:
-            request = json.loads(param.json(exclude_none=True, by_alias=True))
-            if is_json:
-                r = self._session.post(url, json=request, **kwargs)
-            else:
-                r = self._session.post(url, data=request, **kwargs)
-        if r.status_code != 200:
-            raise RuntimeError(f'http not 200: {r.status_code}')
-        response_str = r.text
-        res = clazz.parse_raw(response_str)
-        if res.code != 0:
-            raise RuntimeError(f'code not ok: {res.code} {res.message}')
+        endpoint = ApiCache.endpoint_of(url)
+        try:
+            with self._budget(endpoint) as deadline:
+                self._breakers.check(url)
+                deadline.sleep(self._limiter.reserve(url), endpoint)
+                with self._scheduler.slot(deadline.remaining()), self._breakers.guard(url):
+                    deadline.check(endpoint)
+                    kwargs.setdefault('timeout', deadline.bound(self._timeouts.policy(endpoint)))
+                    if param is None:
+                        r = self._session.post(url, **kwargs)
+                    else:
+                        request = param.as_dict()
+                        if is_json:
+                            r = self._session.post(url, json=request, **kwargs)
+                        else:
+                            r = self._session.post(url, data=request, **kwargs)
+                    self._check_status(r)
+            res = self._parse(r.content, clazz)
+        except RiskControlError:
+            # 登录类接口不自动重试
+            self._limiter.penalize(url)
+            raise
+        self._limiter.reward(url)
         return res
 
     def close(self):
@@ -91,6 +571,17 @@ class BilibiliApi(BaseMixin, VideoMixin, LoginMixin, PlaylistMixin, HistoryMixin
             self._session.close()
         except Exception as e:
             print(f'Something is wrong when destroy api connection: {str(e)}')
+        self._refresh_executor.shutdown(wait=False, cancel_futures=True)
+        if self._aclient is not None:
+            client, self._aclient = self._aclient, None
+            try:
+                asyncio.get_running_loop().create_task(client.aclose())
+            except RuntimeError:
+                # 没有运行中的事件循环，连接随进程退出释放
+                pass
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+            self._disk_cache = None
 
 
 def main():
@@ -0,0 +1,43 @@
+from typing import Type, Optional, Union, Sequence, TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from fuo_bilibili.api.audio import AudioMixin
+from fuo_bilibili.api.base import BaseMixin
+from fuo_bilibili.api.history import HistoryMixin
+from fuo_bilibili.api.playlist import PlaylistMixin
+from fuo_bilibili.api.schema.requests import BaseRequest
+from fuo_bilibili.api.schema.responses import BaseResponse
+from fuo_bilibili.api.user import UserMixin
+from fuo_bilibili.api.video import VideoMixin
+
+if TYPE_CHECKING:
+    from fuo_bilibili.api import BilibiliApi
+
+
+class AsyncBilibiliApi(BaseMixin, VideoMixin, PlaylistMixin, HistoryMixin, UserMixin, AudioMixin):
+    """
+    BilibiliApi 的异步视图
+
+    与 BilibiliApi 共享缓存与 Cookie，混入类中的接口方法在此均返回 awaitable，
+    例如 ``await api.aio.favorite_resource(request)``。
+    登录接口需要对响应做后续处理，不在此提供。
+    """
+
+    def __init__(self, api: 'BilibiliApi'):
+        self._api = api
+
+    def get(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None],
+            **kwargs):
+        return self._api.aget(url, param, clazz, **kwargs)
+
+    def get_uncached(self, url: str, param: Optional[BaseRequest],
+                     clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs):
+        return self._api.aget_uncached(url, param, clazz, **kwargs)
+
+    def get_many(self, url: str, params: Sequence[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel]],
+                 concurrency: int = 8):
+        return self._api.aget_many(url, params, clazz, concurrency)
+
+    def get_content(self, url: str):
+        return self._api.aget_content(url)
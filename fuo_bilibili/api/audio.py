@@ -2,14 +2,42 @@ from typing import Type, Any, Optional, Union
 
 from pydantic import BaseModel
 
+from fuo_bilibili.api.cache import CachePolicy, signed_url_expires
+from fuo_bilibili.api.timeout import Timeout
 from fuo_bilibili.api.schema.requests import BaseRequest, PaginatedRequest, AudioFavoriteSongsRequest, \
     AudioGetUrlRequest
 from fuo_bilibili.api.schema.responses import BaseResponse, AudioFavoriteListResponse, AudioFavoriteSongsResponse, \
     AudioFavoriteInfoResponse, AudioGetUrlResponse
 
 
+def audio_url_expires(response: AudioGetUrlResponse) -> Optional[float]:
+    if response.data is None or not response.data.cdns:
+        return None
+    return signed_url_expires(response.data.cdns[0])
+
+
 class AudioMixin:
     API_AUDIO_BASE = 'https://www.bilibili.com/audio'
+    CACHE_POLICIES = {
+        f'{API_AUDIO_BASE}/music-service-c/web/collections/list': CachePolicy(ttl=1800, maxsize=10, disk_ttl=86400),
+        f'{API_AUDIO_BASE}/music-service-c/web/collect/menus': CachePolicy(ttl=1800, maxsize=10, disk_ttl=86400),
+        f'{API_AUDIO_BASE}/music-service-c/web/collections/info': CachePolicy(ttl=1800, maxsize=100, disk_ttl=86400),
+        f'{API_AUDIO_BASE}/music-service-c/web/menu/info': CachePolicy(ttl=1800, maxsize=100, disk_ttl=86400),
+        f'{API_AUDIO_BASE}/music-service-c/web/song/of-coll': CachePolicy(ttl=600, maxsize=300, disk_ttl=21600),
+        f'{API_AUDIO_BASE}/music-service-c/web/song/of-menu': CachePolicy(ttl=600, maxsize=300, disk_ttl=21600),
+        f'{API_AUDIO_BASE}/music-service-c/web/url': CachePolicy(ttl=600, maxsize=50, expires=audio_url_expires),
+    }
+    TIMEOUTS = {
+        f'{API_AUDIO_BASE}/music-service-c/web/song/of-coll': Timeout(total=45, connect=5, read=30),
+        f'{API_AUDIO_BASE}/music-service-c/web/song/of-menu': Timeout(total=45, connect=5, read=30),
+        f'{API_AUDIO_BASE}/music-service-c/web/url': Timeout(total=8, connect=3, read=5),
+    }
+    PAGE_SIZES = {
+        f'{API_AUDIO_BASE}/music-service-c/web/collections/list': 100,
+        f'{API_AUDIO_BASE}/music-service-c/web/collect/menus': 100,
+        f'{API_AUDIO_BASE}/music-service-c/web/song/of-coll': 100,
+        f'{API_AUDIO_BASE}/music-service-c/web/song/of-menu': 100,
+    }
 
     def get(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) -> Any:
         pass
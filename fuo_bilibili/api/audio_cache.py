@@ -0,0 +1,119 @@
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+PART_SUFFIX = '.part'
+
+
+class AudioCache:
+    """
+    本地音频缓存
+
+    以 (bvid, cid, 音频流 id) 等键保存完整音频文件，总大小超出预算时按最近访问时间淘汰。
+    文件由播放代理在转发音频的同时写入，不单独下载。写入先落到同目录的 .part 临时文件，完整下载并 fsync 后原子替换为正式文件；
+    启动时清理上次崩溃遗留的 .part 文件，因此缓存中不会出现不完整的音频。
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, timer: Callable[[], float] = time.time):
+        """
+        :param max_bytes: 字节预算，为 0 时不缓存
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._timer = timer
+        self._lock = threading.Lock()
+        # 文件名 -> (大小, 最近访问时间)
+        self._entries: Dict[str, list] = dict()
+        self._total = 0
+        if self.enabled:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._scan()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    @staticmethod
+    def name_of(key: Iterable[Hashable]) -> str:
+        return '_'.join(str(k) for k in key) + '.audio'
+
+    def _scan(self):
+        for path in self._directory.iterdir():
+            if path.name.endswith(PART_SUFFIX):
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            self._entries[path.name] = [stat.st_size, stat.st_mtime]
+            self._total += stat.st_size
+        self._evict()
+
+    def get(self, key: Iterable[Hashable]) -> Optional[Path]:
+        """
+        :return: 已缓存的文件路径，同时刷新访问时间
+        """
+        if not self.enabled:
+            return None
+        name = self.name_of(key)
+        path = self._directory / name
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            now = self._timer()
+            entry[1] = now
+        try:
+            # 访问时间记录在 mtime 上，重启后仍按最近访问淘汰
+            os.utime(path, (now, now))
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(name)
+            return None
+        return path
+
+    def _forget(self, name: str):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self._total -= entry[0]
+
+    def _evict(self):
+        if self._total <= self._max_bytes:
+            return
+        for name, _ in sorted(self._entries.items(), key=lambda e: e[1][1]):
+            (self._directory / name).unlink(missing_ok=True)
+            self._forget(name)
+            if self._total <= self._max_bytes:
+                return
+
+    def open_part(self, key: Iterable[Hashable]):
+        """
+        :return: 同目录下的临时文件，写完后交给 commit，失败时交给 discard
+        """
+        fd, part = tempfile.mkstemp(prefix=f'{self.name_of(key)}.', suffix=PART_SUFFIX, dir=self._directory)
+        return os.fdopen(fd, 'wb'), Path(part)
+
+    def commit(self, key: Iterable[Hashable], f, part: Path):
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        name = self.name_of(key)
+        size = part.stat().st_size
+        if size > self._max_bytes:
+            part.unlink(missing_ok=True)
+            return
+        os.replace(part, self._directory / name)
+        with self._lock:
+            self._forget(name)
+            self._entries[name] = [size, self._timer()]
+            self._total += size
+            self._evict()
+
+    @staticmethod
+    def discard(f, part: Path):
+        f.close()
+        part.unlink(missing_ok=True)
+
+    def size(self) -> int:
+        return self._total
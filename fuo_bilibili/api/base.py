@@ -2,16 +2,31 @@ from typing import Type, Any, Optional, Union
 
 from pydantic import BaseModel
 
+from fuo_bilibili.api.cache import CachePolicy
+from fuo_bilibili.api.timeout import Timeout
 from fuo_bilibili.api.schema.requests import SearchRequest, BaseRequest, PaginatedRequest, HomeRecommendVideosRequest, \
     HomeDynamicVideoRequest
 from fuo_bilibili.api.schema.responses import SearchResponse, BaseResponse, NavInfoResponse, \
     HomeRecommendVideosResponse, HomeDynamicVideoResponse
+from fuo_bilibili.api.schema.views import HomeRecommendVideosView
 
 
 class BaseMixin:
     API_BASE = 'https://api.bilibili.com/x/web-interface'
     PASSPORT_BASE = 'https://passport.bilibili.com'
     APIX_BASE = 'https://api.bilibili.com/x'
+    CACHE_POLICIES = {
+        f'{API_BASE}/search/type': CachePolicy(ttl=300, maxsize=30),
+        f'{API_BASE}/nav': CachePolicy(ttl=600, maxsize=1, disk_ttl=86400),
+        # 推荐与动态每次刷新都应返回新内容
+        f'{API_BASE}/index/top/rcmd': CachePolicy(cacheable=False),
+        f'{APIX_BASE}/polymer/web-dynamic/v1/feed/all': CachePolicy(cacheable=False),
+    }
+    TIMEOUTS = {
+        # 登录状态检查阻塞启动与界面
+        f'{API_BASE}/nav': Timeout(total=5, connect=2, read=3),
+        f'{API_BASE}/search/type': Timeout(total=10, connect=3, read=8),
+    }
 
     def get(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None]) -> Any:
         pass
@@ -30,9 +45,11 @@ class BaseMixin:
         url = f'{self.API_BASE}/nav'
         return self.get(url, None, NavInfoResponse)
 
-    def home_recommend_videos(self, request: HomeRecommendVideosRequest) -> HomeRecommendVideosResponse:
+    def home_recommend_videos(self, request: HomeRecommendVideosRequest,
+                              view: Type[BaseResponse] = HomeRecommendVideosView) \
+            -> Union[HomeRecommendVideosView, HomeRecommendVideosResponse]:
         url = f'{self.API_BASE}/index/top/rcmd'
-        return self.get_uncached(url, request, HomeRecommendVideosResponse)
+        return self.get_uncached(url, request, view)
 
     def home_dynamic_videos(self, request: HomeDynamicVideoRequest) -> HomeDynamicVideoResponse:
         url = f'{self.APIX_BASE}/polymer/web-dynamic/v1/feed/all'
@@ -0,0 +1,207 @@
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from cachetools import LRUCache
+
+
+class CachePolicy:
+    """
+    接口缓存策略
+    """
+
+    def __init__(self, ttl: Optional[float] = 300, maxsize: int = 30, cacheable: bool = True,
+                 expires: Optional[Callable[[Any], Optional[float]]] = None, disk_ttl: Optional[float] = None,
+                 stale_while_revalidate: bool = False):
+        """
+        :param ttl: 有效期（秒），None 表示不过期
+        :param maxsize: 最大缓存条目数
+        :param cacheable: 是否允许缓存
+        :param expires: 根据响应计算过期时间戳（秒），返回 None 时回退到 ttl
+        :param disk_ttl: 持久化缓存有效期（秒），None 表示不写入磁盘
+        :param stale_while_revalidate: 过期后先返回旧数据，并在后台刷新
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.cacheable = cacheable
+        self.expires = expires
+        self.disk_ttl = disk_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+
+    def expires_at(self, value: Any, now: float) -> Optional[float]:
+        if self.expires is not None:
+            deadline = self.expires(value)
+            if deadline is not None:
+                return deadline
+        if self.ttl is None:
+            return None
+        return now + self.ttl
+
+    def __repr__(self):
+        return f'CachePolicy(ttl={self.ttl}, maxsize={self.maxsize}, cacheable={self.cacheable})'
+
+
+DEFAULT_POLICY = CachePolicy()
+
+# 提前于签名 deadline 失效，避免交给播放器的地址刚好过期
+SIGNED_URL_EXPIRE_MARGIN = 60
+
+
+class CacheState(Enum):
+    MISS = 0
+    FRESH = 1
+    STALE = 2  # 已过期，仅 stale_while_revalidate 接口返回
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0  # 容量不足淘汰
+        self.expirations = 0  # 过期失效
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(hits=self.hits, stale_hits=self.stale_hits, misses=self.misses, evictions=self.evictions,
+                    expirations=self.expirations)
+
+    def __repr__(self):
+        return f'CacheStats({self.as_dict()})'
+
+
+class _LRUStore(LRUCache):
+    def __init__(self, maxsize: int, on_evict: Callable[[], None]):
+        super().__init__(maxsize)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        item = super().popitem()
+        self._on_evict()
+        return item
+
+
+class EndpointCache:
+    """
+    单个接口的缓存
+    """
+
+    def __init__(self, policy: CachePolicy):
+        self.policy = policy
+        self.stats = CacheStats()
+        self._store = _LRUStore(max(policy.maxsize, 1), self._count_eviction)
+
+    def _count_eviction(self):
+        self.stats.evictions += 1
+
+    def lookup(self, key: Hashable, now: float) -> Tuple[CacheState, Any]:
+        entry = self._store.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return CacheState.MISS, None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= now:
+            if self.policy.stale_while_revalidate:
+                self.stats.stale_hits += 1
+                return CacheState.STALE, value
+            del self._store[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return CacheState.MISS, None
+        self.stats.hits += 1
+        return CacheState.FRESH, value
+
+    def store(self, key: Hashable, value: Any, now: float):
+        expires_at = self.policy.expires_at(value, now)
+        if expires_at is not None and expires_at <= now:
+            return
+        self._store[key] = (expires_at, value)
+
+    def clear(self):
+        self._store.clear()
+
+    def __len__(self):
+        return len(self._store)
+
+
+class ApiCache:
+    """
+    按接口划分的响应缓存，每个接口使用各自的策略与统计
+    """
+
+    def __init__(self, policies: Dict[str, CachePolicy], default: CachePolicy = DEFAULT_POLICY,
+                 timer: Callable[[], float] = time.time):
+        self._policies = policies
+        self._default = default
+        self._timer = timer
+        self._endpoints: Dict[str, EndpointCache] = dict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def endpoint_of(url: str) -> str:
+        return url.split('?', 1)[0]
+
+    def policy(self, endpoint: str) -> CachePolicy:
+        return self._policies.get(endpoint, self._default)
+
+    def _endpoint_cache(self, endpoint: str) -> EndpointCache:
+        cache = self._endpoints.get(endpoint)
+        if cache is None:
+            cache = self._endpoints[endpoint] = EndpointCache(self.policy(endpoint))
+        return cache
+
+    def lookup(self, endpoint: str, key: Hashable) -> Tuple[CacheState, Any]:
+        if not self.policy(endpoint).cacheable:
+            return CacheState.MISS, None
+        with self._lock:
+            return self._endpoint_cache(endpoint).lookup(key, self._timer())
+
+    def store(self, endpoint: str, key: Hashable, value: Any):
+        if not self.policy(endpoint).cacheable:
+            return
+        with self._lock:
+            self._endpoint_cache(endpoint).store(key, value, self._timer())
+
+    def get_or_fetch(self, endpoint: str, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        state, value = self.lookup(endpoint, key)
+        if state is CacheState.FRESH:
+            return value
+        # 请求期间不持有锁
+        value = fetch()
+        self.store(endpoint, key, value)
+        return value
+
+    def stats(self) -> Dict[str, CacheStats]:
+        with self._lock:
+            return {endpoint: cache.stats for endpoint, cache in self._endpoints.items()}
+
+    def clear(self):
+        with self._lock:
+            for cache in self._endpoints.values():
+                cache.clear()
+
+
+def url_deadline(url: Optional[str]) -> Optional[float]:
+    """
+    读取 CDN 签名地址中的 deadline 参数
+    """
+    if not url:
+        return None
+    values = parse_qs(urlsplit(url).query).get('deadline')
+    if not values:
+        return None
+    try:
+        return float(values[0])
+    except ValueError:
+        return None
+
+
+def signed_url_expires(url: Optional[str]) -> Optional[float]:
+    """
+    :return: 签名地址可以安全交给播放器的最后时间，已扣除 SIGNED_URL_EXPIRE_MARGIN
+    """
+    deadline = url_deadline(url)
+    if deadline is None:
+        return None
+    return deadline - SIGNED_URL_EXPIRE_MARGIN
@@ -0,0 +1,177 @@
+"""
+CDN 节点评分
+
+播放地址接口为每个媒体流给出 base_url 与若干 backup_url，分布在不同的 CDN 节点上，默认节点不一定最快。
+这里按节点（host）记录首字节延迟与吞吐量的衰减均值，把候选地址按预计的分片下载时间排序；
+没有评分的节点在后台用很小的 Range 请求探测，不阻塞播放，结果用于之后的排序。
+请求失败的节点立即降级，连续失败时降级时间加倍。
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class _HostScore:
+    __slots__ = ('latency', 'throughput', 'updated_at', 'failures', 'demoted_until')
+
+    def __init__(self):
+        self.latency: Optional[float] = None  # 秒
+        self.throughput: Optional[float] = None  # 字节/秒
+        self.updated_at = 0.0
+        self.failures = 0
+        self.demoted_until = 0.0
+
+
+class CdnScorer:
+    """
+    按节点评分并排序候选地址
+    """
+    PROBE_BYTES = 16 * 1024
+
+    def __init__(self, session: Optional[requests.Session] = None, alpha: float = 0.3, half_life: float = 300,
+                 max_age: float = 1800, reference_bytes: int = 512 * 1024, penalty: float = 30,
+                 timer: Callable[[], float] = time.monotonic):
+        """
+        :param alpha: 新样本的基础权重
+        :param half_life: 旧评分的半衰期（秒），距上次样本越久，新样本权重越大
+        :param max_age: 超过该时间（秒）没有样本的评分视为未知，重新探测
+        :param reference_bytes: 按下载这么多字节的预计耗时排序，与代理的分片大小一致
+        :param penalty: 首次失败的降级时间（秒）
+        """
+        self._session = session or requests.Session()
+        self._alpha = alpha
+        self._half_life = half_life
+        self._max_age = max_age
+        self._reference_bytes = reference_bytes
+        self._penalty = penalty
+        self._timer = timer
+        self._hosts: Dict[str, _HostScore] = dict()
+        self._probing: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='bilibili-cdn-probe')
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc
+
+    def _host(self, url: str) -> _HostScore:
+        host = self.host_of(url)
+        score = self._hosts.get(host)
+        if score is None:
+            score = self._hosts[host] = _HostScore()
+        return score
+
+    def record(self, url: str, latency: float, elapsed: float, nbytes: int):
+        """
+        记录一次成功的请求
+
+        :param latency: 收到响应头的耗时（秒）
+        :param elapsed: 读完响应体的总耗时（秒）
+        :param nbytes: 响应体字节数
+        """
+        # 按总耗时计算：探测请求的响应体很小，扣除首字节延迟后的传输时间几乎为 0，会严重高估吞吐量
+        throughput = nbytes / max(elapsed, 1e-3)
+        now = self._timer()
+        with self._lock:
+            score = self._host(url)
+            if score.latency is None:
+                score.latency, score.throughput = latency, throughput
+            else:
+                weight = 1 - (1 - self._alpha) * 0.5 ** ((now - score.updated_at) / self._half_life)
+                score.latency += weight * (latency - score.latency)
+                score.throughput += weight * (throughput - score.throughput)
+            score.updated_at = now
+            score.failures = 0
+            score.demoted_until = 0.0
+
+    def fail(self, url: str):
+        """
+        记录一次失败，立即降级该节点
+        """
+        now = self._timer()
+        with self._lock:
+            score = self._host(url)
+            score.failures += 1
+            score.demoted_until = now + min(self._penalty * 2 ** (score.failures - 1), 600)
+
+    def demoted(self, url: str) -> bool:
+        with self._lock:
+            score = self._hosts.get(self.host_of(url))
+            return score is not None and score.demoted_until > self._timer()
+
+    def estimate(self, url: str) -> Optional[float]:
+        """
+        :return: 从该节点下载 reference_bytes 的预计耗时（秒），没有有效评分时返回 None
+        """
+        with self._lock:
+            score = self._hosts.get(self.host_of(url))
+            if score is None or score.latency is None or self._timer() - score.updated_at > self._max_age:
+                return None
+            return score.latency + self._reference_bytes / score.throughput
+
+    def rank(self, urls: List[str]) -> List[str]:
+        """
+        按预计耗时排序：有评分的节点在前，未知的节点保持原顺序在后，降级中的节点排在最后
+        """
+
+        def key(item):
+            i, url = item
+            if self.demoted(url):
+                return 2, 0, i
+            estimate = self.estimate(url)
+            if estimate is None:
+                return 1, 0, i
+            return 0, estimate, i
+
+        return [url for _, url in sorted(enumerate(urls), key=key)]
+
+    def _probe(self, url: str, headers: Dict[str, str]):
+        host = self.host_of(url)
+        try:
+            start = time.monotonic()
+            r = self._session.get(url, headers={**headers, 'Range': f'bytes=0-{self.PROBE_BYTES - 1}'},
+                                  timeout=(3, 5))
+            elapsed = time.monotonic() - start
+            if r.status_code not in (200, 206):
+                raise requests.HTTPError(f'unexpected status {r.status_code}')
+            self.record(url, r.elapsed.total_seconds(), elapsed, len(r.content))
+        except requests.RequestException as e:
+            logger.info(f'probing cdn host {host} failed: {str(e)}')
+            self.fail(url)
+        finally:
+            with self._lock:
+                self._probing.discard(host)
+
+    def probe(self, urls: List[str], headers: Optional[Dict[str, str]] = None) -> List[Future]:
+        """
+        在后台探测没有有效评分的节点，每个节点同时只有一个探测请求
+
+        :return: 本次发起的探测
+        """
+        futures = []
+        for url in urls:
+            host = self.host_of(url)
+            if self.estimate(url) is not None or self.demoted(url):
+                continue
+            with self._lock:
+                if host in self._probing:
+                    continue
+                self._probing.add(host)
+            try:
+                futures.append(self._executor.submit(self._probe, url, headers or {}))
+            except RuntimeError:
+                with self._lock:
+                    self._probing.discard(host)
+                break
+        return futures
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+from fuo_bilibili.api.exceptions import ApiTimeoutError, CircuitOpenError, HttpStatusError, RequestCancelledError
+
+
+class BreakerConfig:
+    """
+    熔断器配置
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30, half_open_probes: int = 1):
+        """
+        :param failure_threshold: 连续失败多少次后熔断
+        :param recovery_timeout: 熔断后多久（秒）放行探测请求
+        :param half_open_probes: 半开状态下同时放行的探测请求数
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+
+
+# 主机熔断需要更多连续失败，避免单个接口故障波及同一主机的其他接口
+DEFAULT_HOST_BREAKER = BreakerConfig(failure_threshold=8)
+DEFAULT_ENDPOINT_BREAKER = BreakerConfig(failure_threshold=5)
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+def is_outage(e: BaseException) -> bool:
+    """
+    是否为服务不可用导致的失败
+
+    接口返回错误码（包括风控）说明服务可达，不计入熔断；取消也不计入。
+    """
+    if isinstance(e, HttpStatusError):
+        return e.status_code >= 500
+    return isinstance(e, (requests.ConnectionError, requests.Timeout, httpx.TransportError, ApiTimeoutError,
+                          asyncio.TimeoutError, TimeoutError))
+
+
+class CircuitBreaker:
+    """
+    三态熔断器
+
+    关闭时正常放行并统计连续失败；达到阈值后打开，直接拒绝请求；
+    冷却结束后进入半开，放行少量探测请求，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, config: BreakerConfig, timer: Callable[[], float] = time.monotonic):
+        self.config = config
+        self.state = CircuitState.CLOSED
+        self.failures = 0  # 连续失败次数
+        self.opened = 0  # 累计熔断次数
+        self.rejected = 0  # 累计被拒绝的请求
+        self.opened_at = 0.0
+        self.probing = 0
+        self._timer = timer
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.config.recovery_timeout - self._timer())
+
+    def allow(self) -> bool:
+        if self.state is CircuitState.OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self.probing = 0
+        if self.state is CircuitState.HALF_OPEN:
+            if self.probing >= self.config.half_open_probes:
+                self.rejected += 1
+                return False
+            self.probing += 1
+        return True
+
+    def _trip(self):
+        self.state = CircuitState.OPEN
+        self.opened += 1
+        self.opened_at = self._timer()
+
+    def record_success(self):
+        self.failures = 0
+        if self.state is CircuitState.HALF_OPEN:
+            self.state = CircuitState.CLOSED
+            self.probing = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state is CircuitState.HALF_OPEN:
+            self._trip()
+        elif self.state is CircuitState.CLOSED and self.failures >= self.config.failure_threshold:
+            self._trip()
+
+    def release(self):
+        """
+        探测请求未得出结果（如被取消）时归还名额
+        """
+        if self.state is CircuitState.HALF_OPEN:
+            self.probing = max(0, self.probing - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(state=self.state.name, failures=self.failures, opened=self.opened, rejected=self.rejected,
+                    retry_after=self.retry_after() if self.state is CircuitState.OPEN else 0.0)
+
+
+class CircuitBreakers:
+    """
+    按主机与接口熔断，请求需同时通过所在主机与接口的熔断器
+    """
+
+    def __init__(self, configs: Optional[Dict[str, BreakerConfig]] = None):
+        """
+        :param configs: 键为主机名或接口地址，未配置的使用默认值
+        """
+        self._configs = configs or {}
+        self._breakers: Dict[str, CircuitBreaker] = dict()
+        self._lock = threading.Lock()
+
+    def _breaker(self, key: str, default: BreakerConfig) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(self._configs.get(key, default))
+        return breaker
+
+    def _breakers_of(self, url: str) -> List[Tuple[str, CircuitBreaker]]:
+        host, endpoint = urlsplit(url).hostname, url.split('?', 1)[0]
+        return [(host, self._breaker(host, DEFAULT_HOST_BREAKER)),
+                (endpoint, self._breaker(endpoint, DEFAULT_ENDPOINT_BREAKER))]
+
+    def check(self, url: str):
+        """
+        在限流与排队之前快速检查，熔断打开时立即抛出 CircuitOpenError
+        """
+        with self._lock:
+            for key, breaker in self._breakers_of(url):
+                if breaker.state is CircuitState.OPEN and breaker.retry_after() > 0:
+                    breaker.rejected += 1
+                    raise CircuitOpenError(key, breaker.retry_after())
+
+    def _admit(self, url: str) -> List[CircuitBreaker]:
+        with self._lock:
+            admitted = []
+            for key, breaker in self._breakers_of(url):
+                if not breaker.allow():
+                    for b in admitted:
+                        b.release()
+                    raise CircuitOpenError(key, breaker.retry_after())
+                admitted.append(breaker)
+            return admitted
+
+    @contextmanager
+    def guard(self, url: str) -> Iterator[None]:
+        """
+        熔断打开时立即抛出 CircuitOpenError，否则执行请求并记录结果
+        """
+        breakers = self._admit(url)
+        try:
+            yield
+        except BaseException as e:
+            with self._lock:
+                for breaker in breakers:
+                    if is_outage(e):
+                        breaker.record_failure()
+                    elif isinstance(e, (RequestCancelledError, asyncio.CancelledError)):
+                        breaker.release()
+                    else:
+                        breaker.record_success()
+            raise
+        with self._lock:
+            for breaker in breakers:
+                breaker.record_success()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: breaker.stats() for key, breaker in self._breakers.items()}
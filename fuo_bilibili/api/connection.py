@@ -0,0 +1,112 @@
+import importlib.util
+import logging
+import threading
+from http.cookiejar import CookieJar
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 依赖 h2，未安装时回退到 HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+class HostConfig:
+    """
+    单个主机的连接池配置
+    """
+
+    def __init__(self, pool_size: int = 10, http2: bool = True, connect_timeout: float = 5,
+                 read_timeout: float = 15):
+        """
+        :param pool_size: 保持的最大连接数
+        :param http2: 服务端支持时使用 HTTP/2 多路复用（仅异步客户端）
+        :param connect_timeout: 建立连接超时（秒）
+        :param read_timeout: 读取超时（秒）
+        """
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+
+class _HostAdapter(HTTPAdapter):
+    def __init__(self, config: HostConfig):
+        self._timeout = (config.connect_timeout, config.read_timeout)
+        super().__init__(pool_connections=1, pool_maxsize=config.pool_size)
+
+    def send(self, request, timeout=None, **kwargs):
+        # 调用方未指定超时时使用主机默认值
+        return super().send(request, timeout=timeout if timeout is not None else self._timeout, **kwargs)
+
+
+class ConnectionManager:
+    """
+    按主机划分连接池，为同步会话与异步客户端提供连接复用与预热
+    """
+    DEFAULT_HOSTS: Dict[str, HostConfig] = {
+        'api.bilibili.com': HostConfig(pool_size=16),
+        'passport.bilibili.com': HostConfig(pool_size=4),
+        'www.bilibili.com': HostConfig(pool_size=8),
+    }
+    # 预热的接口主机
+    PREWARM_HOSTS: Tuple[str, ...] = ('api.bilibili.com', 'www.bilibili.com')
+
+    def __init__(self, hosts: Optional[Dict[str, HostConfig]] = None, default: Optional[HostConfig] = None):
+        """
+        :param hosts: 按主机名覆盖的配置
+        :param default: 其他主机（如 upos CDN）的配置
+        """
+        self.hosts = dict(self.DEFAULT_HOSTS)
+        self.hosts.update(hosts or {})
+        self.default = default or HostConfig(pool_size=8)
+
+    def create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount('https://', _HostAdapter(self.default))
+        session.mount('http://', _HostAdapter(self.default))
+        for host, config in self.hosts.items():
+            session.mount(f'https://{host}', _HostAdapter(config))
+        return session
+
+    @staticmethod
+    def _create_transport(config: HostConfig) -> httpx.AsyncHTTPTransport:
+        return httpx.AsyncHTTPTransport(
+            http2=config.http2 and HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=config.pool_size, max_keepalive_connections=config.pool_size),
+        )
+
+    def create_async_client(self, cookies: CookieJar) -> httpx.AsyncClient:
+        mounts = {f'https://{host}': self._create_transport(config) for host, config in self.hosts.items()}
+        return httpx.AsyncClient(
+            cookies=cookies,
+            follow_redirects=True,
+            transport=self._create_transport(self.default),
+            mounts=mounts,
+            timeout=httpx.Timeout(self.default.read_timeout, connect=self.default.connect_timeout),
+        )
+
+    def prewarm(self, session: requests.Session, hosts: Iterable[str] = None):
+        """
+        在后台线程中提前完成 DNS、TCP 与 TLS 握手，连接保留在会话连接池中
+        """
+        hosts = tuple(hosts or self.PREWARM_HOSTS)
+
+        def warm():
+            for host in hosts:
+                try:
+                    session.head(f'https://{host}/', allow_redirects=False)
+                except requests.RequestException as e:
+                    logger.warning(f'prewarm {host} failed: {str(e)}')
+
+        threading.Thread(target=warm, name='bilibili-prewarm', daemon=True).start()
+
+    async def aprewarm(self, client: httpx.AsyncClient, hosts: Iterable[str] = None):
+        for host in tuple(hosts or self.PREWARM_HOSTS):
+            try:
+                await client.head(f'https://{host}/')
+            except httpx.HTTPError as e:
+                logger.warning(f'prewarm {host} failed: {str(e)}')
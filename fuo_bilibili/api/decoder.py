@@ -0,0 +1,231 @@
+"""
+接口响应解码
+
+默认直接从响应字节解码 JSON，并按模型字段信息构造“可信”模型：只做必要的类型转换（枚举、时间、嵌套模型等），
+跳过 pydantic 逐字段校验。遇到无法处理的数据时回退到完整校验，因此错误数据仍会抛出 ValidationError。
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from enum import Enum
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+from pydantic.datetime_parse import parse_datetime, parse_duration
+from pydantic.fields import ModelField
+from pydantic.validators import bool_validator, float_validator, int_validator, str_validator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+Converter = Callable[[Any], Any]
+
+
+def loads(content: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class _Unsupported(Exception):
+    """字段类型无法快速转换，该字段使用 pydantic 校验"""
+
+
+class _Missing(Exception):
+    """缺少必填字段，整体回退到完整校验以得到标准错误"""
+
+
+# 模型 -> [(字段名, 别名, 转换函数, 字段)]
+_plans: Dict[Type[BaseModel], List[Tuple[str, str, Optional[Converter], ModelField]]] = dict()
+
+
+def _converter(tp: Any) -> Optional[Converter]:
+    """
+    :return: 类型转换函数，None 表示原样使用
+    """
+    if tp is Any or tp is dict:
+        return None
+    origin = get_origin(tp)
+    if origin is dict:
+        return None
+    if origin is list:
+        args = get_args(tp)
+        item = _converter(args[0]) if args else None
+        if item is None:
+            return None
+        return lambda v: [item(x) for x in v]
+    if not isinstance(tp, type) or origin is not None:
+        raise _Unsupported(tp)
+    if issubclass(tp, BaseModel):
+        return partial(construct, tp)
+    if issubclass(tp, Enum):
+        return tp
+    if issubclass(tp, bool):
+        return bool_validator
+    if issubclass(tp, datetime):
+        return parse_datetime
+    if issubclass(tp, timedelta):
+        return parse_duration
+    if issubclass(tp, int):
+        return int_validator
+    if issubclass(tp, float):
+        return float_validator
+    if issubclass(tp, str):
+        return str_validator
+    raise _Unsupported(tp)
+
+
+def _strict_field(model: Type[BaseModel], field: ModelField) -> Converter:
+    def convert(v):
+        value, errors = field.validate(v, {}, loc=field.alias, cls=model)
+        if errors:
+            raise ValidationError([errors], model)
+        return value
+
+    return convert
+
+
+def _compile(model: Type[BaseModel]) -> List[Tuple[str, str, Optional[Converter], ModelField]]:
+    plan = []
+    for field in model.__fields__.values():
+        if field.class_validators:
+            # 有自定义校验器的字段按原逻辑处理
+            convert = _strict_field(model, field)
+        else:
+            try:
+                convert = _converter(field.outer_type_)
+            except _Unsupported:
+                convert = _strict_field(model, field)
+        plan.append((field.name, field.alias, convert, field))
+    _plans[model] = plan
+    return plan
+
+
+def construct(model: Type[BaseModel], data: Any) -> BaseModel:
+    """
+    按字段信息构造模型，不做逐字段校验
+    """
+    if isinstance(data, model):
+        return data
+    if not isinstance(data, dict):
+        raise TypeError(f'{model.__name__} expects an object')
+    if model.__pre_root_validators__ or model.__post_root_validators__:
+        return model.parse_obj(data)
+    plan = _plans.get(model)
+    if plan is None:
+        plan = _compile(model)
+    values = dict()
+    fields_set = set()
+    for name, alias, convert, field in plan:
+        if alias in data:
+            v = data[alias]
+            values[name] = v if v is None or convert is None else convert(v)
+            fields_set.add(name)
+        elif field.required:
+            raise _Missing(alias)
+        else:
+            values[name] = field.get_default()
+    m = model.__new__(model)
+    object.__setattr__(m, '__dict__', values)
+    object.__setattr__(m, '__fields_set__', fields_set)
+    m._init_private_attributes()
+    return m
+
+
+class ResponseDecoder:
+    """
+    响应解码器
+
+    strict 为 True 时每次都使用 pydantic 完整校验，用于测试与排查接口变化。
+    """
+
+    def __init__(self, strict: bool = False):
+        self.strict = strict
+
+    def decode(self, content: Union[str, bytes], clazz: Type[BaseModel]) -> BaseModel:
+        data = loads(content)
+        if self.strict:
+            return clazz.parse_obj(data)
+        try:
+            return construct(clazz, data)
+        except Exception:
+            # 交给 pydantic 给出准确的错误，或处理快速路径未覆盖的情况
+            return clazz.parse_obj(data)
+
+
+def sample(tp: Any, items: int = 20) -> Any:
+    """
+    根据类型生成合成数据，用于基准测试
+    """
+    origin = get_origin(tp)
+    if origin is list:
+        args = get_args(tp)
+        return [sample(args[0], items) for _ in range(items)] if args else []
+    if origin is Union:
+        return sample(get_args(tp)[0], items)
+    if tp is Any or tp is dict or origin is dict or not isinstance(tp, type):
+        return {}
+    if issubclass(tp, BaseModel):
+        return {field.alias: sample(field.outer_type_, items) for field in tp.__fields__.values()}
+    if issubclass(tp, Enum):
+        return next(iter(tp)).value
+    if issubclass(tp, bool):
+        return True
+    if issubclass(tp, (datetime, timedelta, int)):
+        return 1600000000 if issubclass(tp, datetime) else 120
+    if issubclass(tp, float):
+        return 1.0
+    return 'text'
+
+
+def benchmark(clazz: Type[BaseModel], content: bytes, rounds: int = 200) -> Dict[str, float]:
+    """
+    :return: 各解码方式平均耗时（微秒）
+    """
+    fast = ResponseDecoder()
+    paths = {
+        'parse_raw': lambda: clazz.parse_raw(content.decode()),
+        'fast': lambda: fast.decode(content, clazz),
+    }
+    result = dict()
+    for name, decode in paths.items():
+        decode()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            decode()
+        result[name] = (time.perf_counter() - start) / rounds * 1e6
+    return result
+
+
+def main(argv: List[str]):
+    """
+    python -m fuo_bilibili.api.decoder [ResponseClass=recorded.json ...]
+
+    例如 PlayUrlResponse=tests/fixtures/play_url.json，不带参数时使用常用接口的合成数据
+    """
+    from fuo_bilibili.api.schema import responses
+    payloads = []
+    for arg in argv:
+        name, path = arg.split('=', 1)
+        with open(path, 'rb') as f:
+            payloads.append((getattr(responses, name), f.read()))
+    if not payloads:
+        for clazz in (responses.VideoInfoResponse, responses.PlayUrlResponse, responses.FavoriteResourceResponse,
+                      responses.HomeDynamicVideoResponse, responses.AudioFavoriteSongsResponse):
+            body = sample(clazz)
+            body['code'] = 0
+            payloads.append((clazz, json.dumps(body).encode()))
+    print(f'orjson: {ORJSON_AVAILABLE}')
+    for clazz, content in payloads:
+        result = benchmark(clazz, content)
+        print(f'{clazz.__name__:32} {len(content):8}B  parse_raw {result["parse_raw"]:9.1f}us  '
+              f'fast {result["fast"]:9.1f}us  x{result["parse_raw"] / result["fast"]:.1f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from fuo_bilibili.api.schema.requests import BaseRequest
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    基于 SQLite 的持久化响应缓存
+
+    按登录用户（namespace）隔离，响应体压缩存储，总大小超出上限时按最近访问时间淘汰。
+    读写数据库出错时只记录日志，按未命中处理，不影响请求本身。
+    """
+
+    def __init__(self, path: Path, max_bytes: int, timer: Callable[[], float] = time.time):
+        self._max_bytes = max_bytes
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    @staticmethod
+    def make_key(url: str, param: Optional[BaseRequest]) -> str:
+        normalized = '' if param is None else json.dumps(param.params)
+        return hashlib.sha1(f'{url}\n{normalized}'.encode()).hexdigest()
+
+    def load(self, namespace: str, key: str) -> Optional[Tuple[bytes, bool]]:
+        """
+        :return: (响应体, 是否未过期)，不存在时返回 None
+        """
+        now = self._timer()
+        with self._lock:
+            try:
+                row = self._conn.execute('SELECT body, expires_at FROM responses WHERE namespace = ? AND key = ?',
+                                         (namespace, key)).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute('UPDATE responses SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                                   (now, namespace, key))
+            except sqlite3.Error as e:
+                logger.warning(f'reading response cache failed: {str(e)}')
+                return None
+        body, expires_at = row
+        try:
+            return zlib.decompress(body), expires_at > now
+        except zlib.error:
+            self.delete(namespace, key)
+            return None
+
+    def store(self, namespace: str, key: str, endpoint: str, body: bytes, ttl: float):
+        compressed = zlib.compress(body)
+        now = self._timer()
+        with self._lock:
+            try:
+                row = self._conn.execute('SELECT size FROM responses WHERE namespace = ? AND key = ?',
+                                         (namespace, key)).fetchone()
+                self._conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                   (namespace, key, endpoint, compressed, len(compressed), now + ttl, now))
+                self._total += len(compressed) - (row[0] if row is not None else 0)
+                self._evict()
+            except sqlite3.Error as e:
+                logger.warning(f'writing response cache failed: {str(e)}')
+
+    def _evict(self):
+        while self._total > self._max_bytes:
+            rows = self._conn.execute('SELECT namespace, key, size FROM responses ORDER BY accessed_at LIMIT 16') \
+                .fetchall()
+            if len(rows) == 0:
+                self._total = 0
+                return
+            for namespace, key, size in rows:
+                self._conn.execute('DELETE FROM responses WHERE namespace = ? AND key = ?', (namespace, key))
+                self._total -= size
+                if self._total <= self._max_bytes:
+                    return
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            try:
+                row = self._conn.execute('SELECT size FROM responses WHERE namespace = ? AND key = ?',
+                                         (namespace, key)).fetchone()
+                if row is None:
+                    return
+                self._conn.execute('DELETE FROM responses WHERE namespace = ? AND key = ?', (namespace, key))
+                self._total -= row[0]
+            except sqlite3.Error as e:
+                logger.warning(f'deleting cached response failed: {str(e)}')
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock:
+            if namespace is None:
+                self._conn.execute('DELETE FROM responses')
+            else:
+                self._conn.execute('DELETE FROM responses WHERE namespace = ?', (namespace,))
+            self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
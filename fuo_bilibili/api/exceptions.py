@@ -0,0 +1,54 @@
+from typing import Optional
+
+
+class BilibiliApiError(RuntimeError):
+    """
+    接口调用异常基类
+    """
+
+
+class HttpStatusError(BilibiliApiError):
+    def __init__(self, status_code: int):
+        super().__init__(f'http not 200: {status_code}')
+        self.status_code = status_code
+
+
+class ApiCodeError(BilibiliApiError):
+    def __init__(self, code: int, message: str):
+        super().__init__(f'code not ok: {code} {message}')
+        self.code = code
+        self.message = message
+
+
+class RiskControlError(ApiCodeError):
+    """
+    触发风控：接口返回 -412/-799 或 HTTP 412/429
+    """
+
+
+class ApiTimeoutError(BilibiliApiError):
+    """
+    调用超出接口时间预算
+    """
+
+    def __init__(self, endpoint: str, budget: Optional[float]):
+        super().__init__(f'timed out after {budget}s: {endpoint}')
+        self.endpoint = endpoint
+        self.budget = budget
+
+
+class RequestCancelledError(BilibiliApiError):
+    def __init__(self, endpoint: str):
+        super().__init__(f'request cancelled: {endpoint}')
+        self.endpoint = endpoint
+
+
+class CircuitOpenError(BilibiliApiError):
+    """
+    主机或接口已熔断，请求未发出
+    """
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f'circuit open for {key}, retry after {retry_after:.1f}s')
+        self.key = key
+        self.retry_after = retry_after
@@ -2,12 +2,35 @@ from typing import Type, Any, Optional, Union
 
 from pydantic import BaseModel
 
-from fuo_bilibili.api.schema.requests import BaseRequest, PaginatedRequest
-from fuo_bilibili.api.schema.responses import BaseResponse, HistoryLaterVideoResponse, HistoryVideoResponse
+from fuo_bilibili.api.cache import CachePolicy
+from fuo_bilibili.api.ratelimit import RateLimit
+from fuo_bilibili.api.timeout import Timeout
+from fuo_bilibili.api.schema.requests import BaseRequest, PaginatedRequest, HistoryCursorRequest
+from fuo_bilibili.api.schema.responses import BaseResponse, HistoryLaterVideoResponse, HistoryVideoResponse, \
+    HistoryCursorResponse
+from fuo_bilibili.api.schema.views import HistoryLaterVideoView, HistoryVideoView, HistoryCursorView
 
 
 class HistoryMixin:
     APIX_BASE = 'https://api.bilibili.com/x'
+    CACHE_POLICIES = {
+        # 观看记录变化频繁
+        f'{APIX_BASE}/v2/history/toview': CachePolicy(ttl=60, maxsize=1, stale_while_revalidate=True),
+        f'{APIX_BASE}/v2/history': CachePolicy(ttl=60, maxsize=50),
+        f'{APIX_BASE}/web-interface/history/cursor': CachePolicy(ttl=60, maxsize=50),
+    }
+    RATE_LIMITS = {
+        f'{APIX_BASE}/v2/history': RateLimit(rate=4, burst=8),
+        f'{APIX_BASE}/web-interface/history/cursor': RateLimit(rate=4, burst=8),
+    }
+    TIMEOUTS = {
+        f'{APIX_BASE}/v2/history': Timeout(total=45, connect=5, read=30),
+        f'{APIX_BASE}/web-interface/history/cursor': Timeout(total=45, connect=5, read=30),
+    }
+    PAGE_SIZES = {
+        f'{APIX_BASE}/v2/history': 30,
+        f'{APIX_BASE}/web-interface/history/cursor': 30,
+    }
 
     def get(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None]) -> Any:
         pass
@@ -15,10 +38,20 @@ class HistoryMixin:
     def post(self, url: str, param: Optional[BaseRequest], clazz: Type[BaseResponse], is_json=False, **kwargs) -> Any:
         pass
 
-    def history_later_videos(self) -> HistoryLaterVideoResponse:
+    def history_later_videos(self, view: Type[BaseResponse] = HistoryLaterVideoView) \
+            -> Union[HistoryLaterVideoView, HistoryLaterVideoResponse]:
         url = f'{self.APIX_BASE}/v2/history/toview'
-        return self.get(url, None, HistoryLaterVideoResponse)
+        return self.get(url, None, view)
 
-    def history_videos(self, request: PaginatedRequest) -> HistoryVideoResponse:
+    def history_videos(self, request: PaginatedRequest, view: Type[BaseResponse] = HistoryVideoView) \
+            -> Union[HistoryVideoView, HistoryVideoResponse]:
         url = f'{self.APIX_BASE}/v2/history'
-        return self.get(url, request, HistoryVideoResponse)
+        return self.get(url, request, view)
+
+    def history_cursor(self, request: HistoryCursorRequest, view: Type[BaseResponse] = HistoryCursorView) \
+            -> Union[HistoryCursorView, HistoryCursorResponse]:
+        """
+        按游标翻页的观看历史，下一页使用上一页返回的 cursor
+        """
+        url = f'{self.APIX_BASE}/web-interface/history/cursor'
+        return self.get(url, request, view)
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from cachetools import LRUCache
+from feeluown.media import Quality
+
+from fuo_bilibili.api.scheduler import Priority, request_priority
+from fuo_bilibili.api.schema.enums import VideoQualityNum, VideoFnval, CodecId
+from fuo_bilibili.api.schema.requests import PlayUrlRequest
+from fuo_bilibili.api.schema.views import PlayUrlView
+from fuo_bilibili.api.video import playurl_expires
+
+if TYPE_CHECKING:
+    from fuo_bilibili.api import BilibiliApi
+
+logger = logging.getLogger(__name__)
+
+DashItem = PlayUrlView.PlayUrlViewData.Dash.DashItem
+Durl = PlayUrlView.PlayUrlViewData.Durl
+
+# 各音质可接受的最高码率（bps），None 表示不限
+AUDIO_QUALITY_BANDWIDTH = {
+    Quality.Audio.lq: 120000,
+    Quality.Audio.sq: 256000,
+    Quality.Audio.hq: None,
+}
+# 同一清晰度有多种编码时优先兼容性更好的
+CODEC_PREFERENCE = {CodecId.AVC: 2, CodecId.HEVC: 1}
+
+
+def audio_quality_of(bandwidth: int) -> Quality.Audio:
+    if bandwidth <= AUDIO_QUALITY_BANDWIDTH[Quality.Audio.lq]:
+        return Quality.Audio.lq
+    if bandwidth <= AUDIO_QUALITY_BANDWIDTH[Quality.Audio.sq]:
+        return Quality.Audio.sq
+    return Quality.Audio.hq
+
+
+class StreamManifest:
+    """
+    视频单个分P的播放清单：DASH 视频与音频码率阶梯，以及服务端只返回 durl 时的整段地址
+    """
+
+    def __init__(self, bvid: str, cid: int, data: PlayUrlView.PlayUrlViewData, expires_at: float):
+        self.bvid = bvid
+        self.cid = cid
+        self.expires_at = expires_at
+        self.accept_quality: List[VideoQualityNum] = list(data.accept_quality or [])
+        self.videos: List[DashItem] = []
+        self.audios: List[DashItem] = []
+        if data.dash is not None:
+            self.videos = sorted(data.dash.video or [], reverse=True,
+                                 key=lambda v: (v.id, CODEC_PREFERENCE.get(v.codecid, 0), v.bandwidth))
+            self.audios = sorted(data.dash.audio or [], key=lambda a: a.bandwidth, reverse=True)
+        self.durl: List[Durl] = list(data.durl or [])
+
+    def video_qualities(self) -> List[Quality.Video]:
+        codes = [VideoQualityNum(v.id) for v in self.videos if v.id in VideoQualityNum._value2member_map_]
+        return list({c.get_quality() for c in (codes or self.accept_quality)})
+
+    def audio_qualities(self) -> List[Quality.Audio]:
+        if not self.audios and self.durl:
+            return [Quality.Audio.hq]
+        return list({audio_quality_of(a.bandwidth) for a in self.audios})
+
+    def select_video(self, max_code: int, budget: Optional[int] = None) -> Optional[DashItem]:
+        """
+        :param budget: 码率预算（bps），None 表示不限
+        :return: 不超过 max_code 且码率在预算内的最高清晰度视频流；都超过清晰度时返回最低清晰度，
+            都超出预算时返回其中码率最低的
+        """
+        if not self.videos:
+            return None
+        candidates = [v for v in self.videos if v.id <= max_code] or self.videos[-1:]
+        for video in candidates:
+            if budget is None or video.bandwidth <= budget:
+                return video
+        return min(candidates, key=lambda v: v.bandwidth)
+
+    def select_audio(self, max_bandwidth: Optional[int] = None, budget: Optional[int] = None) -> Optional[DashItem]:
+        """
+        :param max_bandwidth: 音质对应的最高码率
+        :param budget: 码率预算（bps），都超出预算时返回其中码率最低的
+        """
+        candidates = [a for a in self.audios if max_bandwidth is None or a.bandwidth <= max_bandwidth]
+        for audio in candidates:
+            if budget is None or audio.bandwidth <= budget:
+                return audio
+        return candidates[-1] if candidates else None
+
+
+class ManifestCache:
+    """
+    按 (bvid, cid) 缓存播放清单，有效期到签名地址的 deadline，临近过期时在后台刷新
+
+    清晰度列表与媒体选择都读取同一份清单，一个视频只需要一次 playurl 请求。
+    """
+    REFRESH_AHEAD = 120  # 距过期不足该秒数时后台刷新
+    DEFAULT_TTL = 600  # 地址不带 deadline 时的有效期
+
+    def __init__(self, api: 'BilibiliApi', maxsize: int = 100, timer: Callable[[], float] = time.time):
+        self._api = api
+        self._manifests: LRUCache = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self._refreshing: Set[Tuple[str, int]] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bilibili-manifest')
+        self._timer = timer
+
+    def _fetch(self, bvid: str, cid: int) -> StreamManifest:
+        response = self._api.video_get_url(PlayUrlRequest(bvid=bvid, cid=cid, fnval=VideoFnval.DASH))
+        expires_at = playurl_expires(response) or self._timer() + self.DEFAULT_TTL
+        manifest = StreamManifest(bvid, cid, response.data, expires_at)
+        with self._lock:
+            self._manifests[(bvid, cid)] = manifest
+        return manifest
+
+    def _refresh(self, key: Tuple[str, int]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with request_priority(Priority.BACKGROUND):
+                    self._fetch(*key)
+            except Exception as e:
+                logger.warning(f'refreshing manifest {key} failed: {str(e)}')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def get(self, bvid: str, cid: int) -> StreamManifest:
+        now = self._timer()
+        with self._lock:
+            manifest = self._manifests.get((bvid, cid))
+        if manifest is None or now >= manifest.expires_at:
+            return self._fetch(bvid, cid)
+        if now >= manifest.expires_at - self.REFRESH_AHEAD:
+            self._refresh((bvid, cid))
+        return manifest
+
+    def invalidate(self, bvid: str, cid: int):
+        with self._lock:
+            self._manifests.pop((bvid, cid), None)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,196 @@
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from cachetools import LRUCache
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class VideoPage(BaseModel):
+    page: int
+    cid: int
+    part: str = ''
+    duration: float = 0  # 秒
+
+
+class VideoMeta(BaseModel):
+    """
+    本地保存的视频元数据，只包含插件用到的字段
+    """
+    bvid: str
+    aid: int = None
+    cid: int = None  # 1P cid
+    title: str = None
+    cover: str = None
+    duration: float = None  # 秒
+    owner_mid: int = None
+    owner_name: str = None
+    pages: List[VideoPage] = []
+    complete: bool = False  # 是否来自视频详情接口
+    updated_at: float = 0
+
+    @classmethod
+    def from_info(cls, data) -> 'VideoMeta':
+        """
+        :param data: VideoInfoView / VideoInfoResponse 的 data
+        """
+        return cls(bvid=data.bvid, aid=data.aid, cid=data.cid, title=data.title, cover=data.pic,
+                   duration=data.duration.total_seconds(), owner_mid=data.owner.mid, owner_name=data.owner.name,
+                   pages=[VideoPage(page=p.page, cid=p.cid, part=p.part, duration=p.duration.total_seconds())
+                          for p in data.pages],
+                   complete=True)
+
+    @classmethod
+    def from_brief(cls, item) -> 'VideoMeta':
+        """
+        :param item: 列表接口中的视频条目（BriefVideo 或收藏夹 Media）
+        """
+        owner = getattr(item, 'owner', None) or getattr(item, 'upper', None)
+        duration = getattr(item, 'duration', None)
+        return cls(bvid=item.bvid, aid=getattr(item, 'aid', None), cid=getattr(item, 'cid', None),
+                   title=item.title, cover=getattr(item, 'pic', None) or getattr(item, 'cover', None),
+                   duration=duration.total_seconds() if duration is not None else None,
+                   owner_mid=owner.mid if owner is not None else None,
+                   owner_name=owner.name if owner is not None else None)
+
+    @classmethod
+    def from_history(cls, item) -> 'VideoMeta':
+        """
+        :param item: 游标历史记录条目，其中的 cid 是观看到的分P，不作为 1P cid 保存
+        """
+        return cls(bvid=item.history.bvid, aid=item.history.oid, title=item.title, cover=item.cover or None,
+                   duration=item.duration.total_seconds(), owner_mid=item.author_mid,
+                   owner_name=item.author_name or None)
+
+
+class VideoMetadataStore:
+    """
+    基于 SQLite 的视频元数据仓库，前置有界 LRU 内存缓存
+
+    列表接口的条目通过 upsert_many 批量写入，已有字段不会被列表中缺失的字段覆盖，也不会覆盖来自视频详情接口的字段；
+    updated_at 是详情数据的更新时间，列表条目不会刷新完整记录的 updated_at。分P信息只来自视频详情接口。
+    """
+    _COLUMNS = ('bvid', 'aid', 'cid', 'title', 'cover', 'duration', 'owner_mid', 'owner_name', 'complete',
+                'updated_at')
+    # 完整记录只被完整记录覆盖，列表条目只能补全其中为空的字段
+    _MERGE = tuple(f'{column} = CASE WHEN complete = 1 AND excluded.complete = 0 '
+                   f'THEN COALESCE({column}, excluded.{column}) ELSE COALESCE(excluded.{column}, {column}) END'
+                   for column in _COLUMNS[1:8])
+
+    def __init__(self, path: Optional[Path] = None, maxsize: int = 1024, timer: Callable[[], float] = time.time):
+        """
+        :param path: 数据库文件，None 表示只保存在内存中
+        """
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._memory: LRUCache = LRUCache(maxsize)
+        self._conn = sqlite3.connect(':memory:' if path is None else str(path), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS videos (
+                bvid TEXT PRIMARY KEY,
+                aid INTEGER,
+                cid INTEGER,
+                title TEXT,
+                cover TEXT,
+                duration REAL,
+                owner_mid INTEGER,
+                owner_name TEXT,
+                complete INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                bvid TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                cid INTEGER NOT NULL,
+                part TEXT NOT NULL,
+                duration REAL NOT NULL,
+                PRIMARY KEY (bvid, page)
+            )
+        ''')
+
+    def _load(self, bvid: str) -> Optional[VideoMeta]:
+        row = self._conn.execute(f'SELECT {", ".join(self._COLUMNS)} FROM videos WHERE bvid = ?', (bvid,)) \
+            .fetchone()
+        if row is None:
+            return None
+        meta = VideoMeta(**dict(zip(self._COLUMNS, row)))
+        meta.pages = [VideoPage(page=page, cid=cid, part=part, duration=duration) for page, cid, part, duration in
+                      self._conn.execute('SELECT page, cid, part, duration FROM pages WHERE bvid = ? ORDER BY page',
+                                         (bvid,))]
+        return meta
+
+    def get(self, bvid: str) -> Optional[VideoMeta]:
+        with self._lock:
+            meta = self._memory.get(bvid)
+            if meta is None:
+                meta = self._load(bvid)
+                if meta is not None:
+                    self._memory[bvid] = meta
+            return meta
+
+    def get_cid(self, bvid: str) -> Optional[int]:
+        meta = self.get(bvid)
+        return meta.cid if meta is not None else None
+
+    def put(self, meta: VideoMeta):
+        self.upsert_many([meta])
+
+    def upsert_many(self, metas: Iterable[VideoMeta]):
+        """
+        批量写入，单个事务完成
+        """
+        now = self._timer()
+        metas = list(metas)
+        if not metas:
+            return
+        rows = [(m.bvid, m.aid, m.cid, m.title, m.cover, m.duration, m.owner_mid, m.owner_name, int(m.complete), now)
+                for m in metas]
+        with self._lock:
+            try:
+                self._conn.execute('BEGIN')
+                self._conn.executemany(f'''
+                    INSERT INTO videos ({", ".join(self._COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (bvid) DO UPDATE SET
+                        {", ".join(self._MERGE)},
+                        complete = MAX(excluded.complete, complete),
+                        updated_at = CASE WHEN excluded.complete = 1 OR complete = 0
+                            THEN excluded.updated_at ELSE updated_at END
+                ''', rows)
+                for m in metas:
+                    if not m.pages:
+                        continue
+                    self._conn.execute('DELETE FROM pages WHERE bvid = ?', (m.bvid,))
+                    self._conn.executemany('INSERT INTO pages VALUES (?, ?, ?, ?, ?)',
+                                           [(m.bvid, p.page, p.cid, p.part, p.duration) for p in m.pages])
+                self._conn.execute('COMMIT')
+            except sqlite3.Error as e:
+                self._conn.execute('ROLLBACK')
+                logger.warning(f'saving video metadata failed: {str(e)}')
+            # 合并后的结果以数据库为准，下次读取时重新加载
+            for m in metas:
+                self._memory.pop(m.bvid, None)
+
+    def put_info(self, data) -> VideoMeta:
+        """
+        :param data: VideoInfoView / VideoInfoResponse 的 data
+        """
+        meta = VideoMeta.from_info(data)
+        self.put(meta)
+        return meta
+
+    def put_briefs(self, items: Optional[Sequence]):
+        if items:
+            self.upsert_many(VideoMeta.from_brief(item) for item in items)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,306 @@
+"""
+分页读取
+
+按页请求列表接口，并在后台以 BACKGROUND 优先级预取后续的页，使消费方读完一页时下一页通常已经就绪。
+预取请求同样经过限流器与调度器。
+"""
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from feeluown.excs import ReadFailed
+from feeluown.utils.reader import Reader, SequentialReadMixin
+
+from fuo_bilibili.api.scheduler import Priority, request_priority
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class Page(Generic[T]):
+    """
+    一页数据
+    """
+
+    def __init__(self, items: Optional[List[T]], has_more: bool = True, cursor: Any = None,
+                 total: Optional[int] = None):
+        """
+        :param items: 本页条目
+        :param has_more: 是否还有下一页
+        :param cursor: 游标翻页接口请求下一页所需的游标
+        :param total: 条目总数（已知时）
+        """
+        self.items: List[T] = list(items or [])
+        self.has_more = has_more
+        self.cursor = cursor
+        self.total = total
+
+
+# fetch(页码, 每页条目数) -> Page
+PageFetcher = Callable[[int, int], Page]
+# fetch(游标) -> Page，首页游标为 None
+CursorFetcher = Callable[[Any], Page]
+
+
+class CursorStream(Generic[T]):
+    """
+    游标翻页的列表流
+
+    按服务端返回的游标依次请求，并在后台预取下一页；has_more 为 False 或空页时结束。
+    已读取的条目与最后的游标保存在流中，在有效期内重新打开时先返回已读取的条目，再从游标继续，
+    不必从头请求。总数在读完之前未知。
+    """
+
+    def __init__(self, fetch: CursorFetcher, executor: Executor, read_ahead: bool = True, ttl: float = 600,
+                 timer: Callable[[], float] = time.monotonic):
+        """
+        :param fetch: 按游标请求一页数据
+        :param executor: 执行预取请求的线程池
+        :param read_ahead: 是否预取下一页
+        :param ttl: 流的有效期（秒），过期后应重新创建
+        """
+        self._fetch = fetch
+        self._executor = executor
+        self._read_ahead = read_ahead
+        self._ttl = ttl
+        self._timer = timer
+        self._created_at = timer()
+        self._lock = threading.Lock()
+        self._pending: Optional[Future] = None
+        self.items: List[T] = []
+        self.cursor: Any = None
+        self.exhausted = False
+
+    @property
+    def expired(self) -> bool:
+        return self._timer() - self._created_at >= self._ttl
+
+    @property
+    def count(self) -> Optional[int]:
+        """
+        读完之前返回 None
+        """
+        return len(self.items) if self.exhausted else None
+
+    def _background(self, cursor: Any) -> Page:
+        with request_priority(Priority.BACKGROUND):
+            return self._fetch(cursor)
+
+    def _next_page(self):
+        future, self._pending = self._pending, None
+        page = None
+        if future is not None and not future.cancelled():
+            try:
+                page = future.result()
+            except Exception as e:
+                logger.info(f'prefetching page at {self.cursor} failed: {str(e)}')
+        if page is None:
+            page = self._fetch(self.cursor)
+        self.items.extend(page.items)
+        self.cursor = page.cursor
+        if not page.items or not page.has_more:
+            self.exhausted = True
+        elif self._read_ahead:
+            try:
+                self._pending = self._executor.submit(self._background, page.cursor)
+            except RuntimeError:
+                pass
+
+    def __iter__(self) -> Iterator[T]:
+        index = 0
+        while True:
+            with self._lock:
+                if index >= len(self.items):
+                    if self.exhausted:
+                        return
+                    self._next_page()
+                    continue
+                item = self.items[index]
+            yield item
+            index += 1
+
+    def close(self):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.cancel()
+                self._pending = None
+
+
+class PageRange:
+    """
+    把页码翻页接口适配为按区间读取，供随机访问读取器使用
+
+    首屏只请求 first_size 条，之后按接口允许的最大页 max_size 请求；只请求覆盖区间的页，多页时并发请求。
+    已请求的页会被缓存，读取后在后台预取后面 read_ahead 页。
+    """
+
+    def __init__(self, fetch: PageFetcher, max_size: int, executor: Executor, first_size: int = 10,
+                 read_ahead: int = 1, count: Optional[int] = None):
+        """
+        :param fetch: 按 (页码, 每页条目数) 请求一页数据，页码从 1 开始
+        :param max_size: 接口允许的最大每页条目数
+        :param first_size: 首屏每页条目数
+        :param count: 条目总数，未知时由 first_page 从首页获取
+        """
+        self._fetch = fetch
+        self.max_size = max_size
+        self.first_size = min(first_size, max_size)
+        self._executor = executor
+        self._read_ahead = read_ahead
+        self.count = count
+        # (每页条目数, 页码) -> Future
+        self._pages: Dict[Tuple[int, int], Future] = dict()
+        self._lock = threading.Lock()
+
+    def _background(self, page_no: int, size: int) -> Page:
+        with request_priority(Priority.BACKGROUND):
+            return self._fetch(page_no, size)
+
+    def _claim(self, key: Tuple[int, int]) -> Tuple[Future, bool]:
+        """
+        :return: (该页的 Future, 是否需要由调用方发起请求)
+        """
+        with self._lock:
+            future = self._pages.get(key)
+            if future is None or (future.done() and (future.cancelled() or future.exception() is not None)):
+                future = self._pages[key] = Future()
+                future.set_running_or_notify_cancel()
+                return future, True
+            return future, False
+
+    def _run(self, future: Future, fn: Callable[..., Page], *args):
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _spawn(self, future: Future, fn: Callable[..., Any], *args):
+        try:
+            self._executor.submit(fn, *args)
+        except RuntimeError as e:
+            # 线程池已关闭，该页留待下次读取时重新请求
+            future.set_exception(e)
+
+    def first_page(self) -> Page:
+        """
+        请求首屏页，count 未知时以首页返回的总数为准
+        """
+        future, owned = self._claim((self.first_size, 1))
+        if owned:
+            self._run(future, self._fetch, 1, self.first_size)
+        page = future.result()
+        if self.count is None:
+            self.count = page.total if page.total is not None else len(page.items)
+            if not page.has_more:
+                self.count = min(self.count, len(page.items))
+        return page
+
+    def span(self, index: int) -> Tuple[int, int]:
+        """
+        :return: 读取 index 处的条目时请求的区间，首屏条目读首屏页，其余读所在的最大页
+        """
+        if index < self.first_size:
+            return 0, self.first_size
+        start = index // self.max_size * self.max_size
+        return start, start + self.max_size
+
+    def read(self, start: int, end: int) -> List[T]:
+        """
+        :return: [start, end) 区间内的条目，接口实际返回的条目不足时可能少于 end - start 条
+        """
+        size = self.first_size if end <= self.first_size else self.max_size
+        first, last = start // size + 1, (end - 1) // size + 1
+        futures = []
+        inline = None
+        for page_no in range(first, last + 1):
+            future, owned = self._claim((size, page_no))
+            futures.append(future)
+            if not owned:
+                continue
+            if inline is None:
+                # 第一个缺失的页在当前线程请求，保留调用方的优先级与超时
+                inline = (future, page_no)
+            else:
+                self._spawn(future, contextvars.copy_context().run, self._run, future, self._fetch, page_no, size)
+        ahead = end // self.max_size + 1
+        for page_no in range(ahead, ahead + self._read_ahead):
+            if self.count is not None and (page_no - 1) * self.max_size >= self.count:
+                break
+            future, owned = self._claim((self.max_size, page_no))
+            if owned:
+                self._spawn(future, self._run, future, self._background, page_no, self.max_size)
+        if inline is not None:
+            self._run(inline[0], self._fetch, inline[1], size)
+        items = []
+        for future in futures:
+            items.extend(future.result().items)
+        offset = start - (first - 1) * size
+        return items[offset:offset + end - start]
+
+
+class PagedReader(Reader, SequentialReadMixin):
+    """
+    基于 PageRange 的随机访问读取器，实现 feeluown 读取器的公开接口（count、read、readall、迭代）
+
+    开头的首屏条目只读首屏页，其余条目按所在的最大页读取，连续读取时每次正好请求一整页。
+    接口返回的总数可能多于实际条目数，读到不满的页时以实际读到的条目数为准缩小 count，不会读取失败。
+    """
+    allow_sequential_read = True
+    allow_random_read = True
+
+    def __init__(self, pages: PageRange):
+        super().__init__()
+        if pages.count is None:
+            pages.first_page()
+        self._pages = pages
+        self._items: Dict[int, Any] = dict()
+        self._lock = threading.Lock()
+        self.count: int = pages.count
+        self.offset = 0
+
+    def read(self, index: int):
+        """
+        :raises IndexError: index 超出实际条目数
+        :raises ReadFailed: 请求失败
+        """
+        with self._lock:
+            if index in self._items:
+                return self._items[index]
+            if not 0 <= index < self.count:
+                raise IndexError(index)
+            start, end = self._pages.span(index)
+            end = min(end, self.count)
+            try:
+                items = self._pages.read(start, end)
+            except Exception as e:
+                raise ReadFailed(f'reading items [{start}, {end}) failed') from e
+            if len(items) < end - start:
+                logger.info(f'expected {end - start} items from [{start}, {end}), got {len(items)}')
+                self.count = start + len(items)
+            for i, item in enumerate(items, start):
+                self._items[i] = item
+            if index >= self.count:
+                raise IndexError(index)
+            return self._items[index]
+
+    def read_next(self):
+        if self.offset >= self.count:
+            raise StopIteration
+        try:
+            obj = self.read(self.offset)
+        except IndexError:
+            # 读取时发现实际条目数更少
+            raise StopIteration
+        self.offset += 1
+        return obj
+
+    def readall(self) -> List:
+        index = 0
+        while index < self.count:
+            self.read(index)
+            index += 1
+        return [self._items[i] for i in range(self.count)]
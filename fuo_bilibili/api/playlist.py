@@ -2,15 +2,44 @@ from typing import Type, Any, Optional, Union
 
 from pydantic import BaseModel
 
+from fuo_bilibili.api.cache import CachePolicy
+from fuo_bilibili.api.ratelimit import RateLimit
+from fuo_bilibili.api.timeout import Timeout
 from fuo_bilibili.api.schema.requests import BaseRequest, FavoriteListRequest, FavoriteInfoRequest, \
     FavoriteResourceRequest, CollectedFavoriteListRequest, FavoriteSeasonResourceRequest
 from fuo_bilibili.api.schema.responses import BaseResponse, FavoriteListResponse, FavoriteInfoResponse, \
     FavoriteResourceResponse, CollectedFavoriteListResponse, FavoriteSeasonResourceResponse
+from fuo_bilibili.api.schema.views import FavoriteResourceView, FavoriteSeasonResourceView
 
 
 class PlaylistMixin:
     """收藏夹接口"""
     APIX_BASE = 'https://api.bilibili.com/x'
+    CACHE_POLICIES = {
+        f'{APIX_BASE}/v3/fav/folder/created/list-all': CachePolicy(ttl=1800, maxsize=20, disk_ttl=86400),
+        f'{APIX_BASE}/v3/fav/folder/collected/list': CachePolicy(ttl=1800, maxsize=20, disk_ttl=86400),
+        f'{APIX_BASE}/v3/fav/folder/info': CachePolicy(ttl=1800, maxsize=200, disk_ttl=86400),
+        f'{APIX_BASE}/v3/fav/resource/list': CachePolicy(ttl=600, maxsize=500, disk_ttl=21600,
+                                                         stale_while_revalidate=True),
+        f'{APIX_BASE}/space/fav/season/list': CachePolicy(ttl=600, maxsize=500, disk_ttl=21600,
+                                                          stale_while_revalidate=True),
+    }
+    RATE_LIMITS = {
+        # 大收藏夹连续翻页容易触发风控
+        f'{APIX_BASE}/v3/fav/resource/list': RateLimit(rate=4, burst=8),
+        f'{APIX_BASE}/space/fav/season/list': RateLimit(rate=4, burst=8),
+    }
+    TIMEOUTS = {
+        # 大列表响应体较大，且可能在限流中等待
+        f'{APIX_BASE}/v3/fav/resource/list': Timeout(total=45, connect=5, read=30),
+        f'{APIX_BASE}/space/fav/season/list': Timeout(total=45, connect=5, read=30),
+    }
+    # 各分页接口允许的最大 ps
+    PAGE_SIZES = {
+        f'{APIX_BASE}/v3/fav/folder/collected/list': 40,
+        f'{APIX_BASE}/v3/fav/resource/list': 20,
+        f'{APIX_BASE}/space/fav/season/list': 20,
+    }
 
     def get(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None]) -> Any:
         pass
@@ -30,10 +59,13 @@ class PlaylistMixin:
         url = f'{self.APIX_BASE}/v3/fav/folder/info'
         return self.get(url, request, FavoriteInfoResponse)
 
-    def favorite_resource(self, request: FavoriteResourceRequest) -> FavoriteResourceResponse:
+    def favorite_resource(self, request: FavoriteResourceRequest, view: Type[BaseResponse] = FavoriteResourceView) \
+            -> Union[FavoriteResourceView, FavoriteResourceResponse]:
         url = f'{self.APIX_BASE}/v3/fav/resource/list'
-        return self.get(url, request, FavoriteResourceResponse)
+        return self.get(url, request, view)
 
-    def favorite_season_resource(self, request: FavoriteSeasonResourceRequest) -> FavoriteSeasonResourceResponse:
+    def favorite_season_resource(self, request: FavoriteSeasonResourceRequest,
+                                 view: Type[BaseResponse] = FavoriteSeasonResourceView) \
+            -> Union[FavoriteSeasonResourceView, FavoriteSeasonResourceResponse]:
         url = f'{self.APIX_BASE}/space/fav/season/list'
-        return self.get(url, request, FavoriteSeasonResourceResponse)
+        return self.get(url, request, view)
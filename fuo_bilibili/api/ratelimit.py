@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+# 风控相关的接口返回码与 HTTP 状态码
+RISK_CONTROL_CODES = frozenset({-412, -799})
+RISK_CONTROL_STATUS = frozenset({412, 429})
+
+
+class RateLimit:
+    """
+    令牌桶配置
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: Optional[float] = None):
+        """
+        :param rate: 每秒请求数上限
+        :param burst: 允许的突发请求数
+        :param min_rate: 被限流后降速的下限
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+
+
+class TokenBucket:
+    """
+    自适应令牌桶
+
+    被限流时速率减半并按指数退避（带抖动）暂停发送，之后每次成功缓慢恢复速率。
+    """
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+    RECOVERY_STEP = 0.05  # 每次成功恢复的速率比例
+
+    def __init__(self, limit: RateLimit, timer: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.rate = limit.rate
+        self.tokens = float(limit.burst)
+        self.throttled = 0  # 累计被限流次数
+        self.failures = 0  # 连续被限流次数
+        self.blocked_until = 0.0
+        self._timer = timer
+        self._updated = timer()
+
+    def _refill(self, now: float):
+        self.tokens = min(float(self.limit.burst), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        预留一个令牌
+
+        :return: 需要等待的秒数
+        """
+        now = self._timer()
+        self._refill(now)
+        self.tokens -= 1
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / self.rate)
+        return wait
+
+    def penalize(self):
+        now = self._timer()
+        self._refill(now)
+        self.throttled += 1
+        self.failures += 1
+        self.rate = max(self.limit.min_rate, self.rate / 2)
+        backoff = min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** (self.failures - 1))
+        self.blocked_until = max(self.blocked_until, now + backoff * random.uniform(0.5, 1.5))
+
+    def reward(self):
+        self.failures = 0
+        if self.rate < self.limit.rate:
+            self._refill(self._timer())
+            self.rate = min(self.limit.rate, self.rate + self.limit.rate * self.RECOVERY_STEP)
+
+    def state(self) -> Dict[str, float]:
+        return dict(rate=self.rate, max_rate=self.limit.rate, throttled=self.throttled,
+                    backoff=max(0.0, self.blocked_until - self._timer()))
+
+
+class RateLimiter:
+    """
+    按主机与接口限流，一个请求需同时满足主机和接口（若有配置）的令牌桶
+    """
+
+    def __init__(self, limits: Dict[str, RateLimit]):
+        """
+        :param limits: 键为主机名（如 api.bilibili.com）或接口地址
+        """
+        self._buckets = {key: TokenBucket(limit) for key, limit in limits.items()}
+        self._lock = threading.Lock()
+
+    def _buckets_of(self, url: str) -> List[TokenBucket]:
+        buckets = []
+        for key in (urlsplit(url).hostname, url.split('?', 1)[0]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                buckets.append(bucket)
+        return buckets
+
+    def reserve(self, url: str) -> float:
+        with self._lock:
+            return max([b.reserve() for b in self._buckets_of(url)], default=0.0)
+
+    def acquire(self, url: str):
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, url: str):
+        with self._lock:
+            for bucket in self._buckets_of(url):
+                bucket.penalize()
+
+    def reward(self, url: str):
+        with self._lock:
+            for bucket in self._buckets_of(url):
+                bucket.reward()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {key: bucket.state() for key, bucket in self._buckets.items()}
@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+
+class Priority(IntEnum):
+    """
+    请求优先级，数值越小越优先
+    """
+    PLAYBACK = 0  # 播放所需的媒体地址解析
+    INTERACTIVE = 1  # 界面列表等用户操作
+    BACKGROUND = 2  # 预取、后台刷新与同步
+
+
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    'bilibili_request_priority', default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """
+    设置当前线程或协程内发出的请求的优先级
+
+    >>> with request_priority(Priority.PLAYBACK):
+    ...     api.video_get_url(request)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class RequestScheduler:
+    """
+    按优先级调度请求
+
+    每个优先级有独立的并发上限；有更高优先级的请求在等待时，低优先级请求不会开始。
+    同步线程与事件循环中的协程共享同一组计数。
+    """
+    DEFAULT_LIMITS: Dict[Priority, int] = {
+        Priority.PLAYBACK: 4,
+        Priority.INTERACTIVE: 6,
+        Priority.BACKGROUND: 2,
+    }
+
+    def __init__(self, limits: Dict[Priority, int] = None):
+        self._limits = dict(self.DEFAULT_LIMITS)
+        self._limits.update(limits or {})
+        self._cond = threading.Condition()
+        self._active = {p: 0 for p in Priority}
+        self._waiting = {p: 0 for p in Priority}
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _can_start(self, priority: Priority) -> bool:
+        if self._active[priority] >= self._limits[priority]:
+            return False
+        return all(self._waiting[p] == 0 for p in Priority if p < priority)
+
+    def acquire(self, priority: Priority, timeout: Optional[float] = None) -> bool:
+        """
+        :param timeout: 最长等待秒数，None 表示一直等待
+        :return: 是否取得名额
+        """
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                acquired = self._cond.wait_for(lambda: self._can_start(priority), timeout)
+                if acquired:
+                    self._active[priority] += 1
+            finally:
+                self._waiting[priority] -= 1
+        # 等待队列变化后，被本请求阻塞的低优先级请求可能可以开始
+        self._notify()
+        return acquired
+
+    async def aacquire(self, priority: Priority):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                with self._cond:
+                    if self._can_start(priority):
+                        self._active[priority] += 1
+                        return
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+                await waiter
+        finally:
+            with self._cond:
+                self._waiting[priority] -= 1
+            self._notify()
+
+    def release(self, priority: Priority):
+        with self._cond:
+            self._active[priority] -= 1
+        self._notify()
+
+    def _notify(self):
+        with self._cond:
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(self._wake, waiter)
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        priority = current_priority()
+        if not self.acquire(priority, timeout):
+            raise TimeoutError(f'no {priority.name} slot within {timeout}s')
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    @asynccontextmanager
+    async def aslot(self):
+        priority = current_priority()
+        await self.aacquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._cond:
+            return {p.name: dict(active=self._active[p], waiting=self._waiting[p], limit=self._limits[p])
+                    for p in Priority}
@@ -1,12 +1,54 @@
-from pydantic import BaseModel, Field
+from enum import Enum
+from operator import itemgetter
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field, PrivateAttr
 
 from fuo_bilibili.api.schema.enums import VideoQualityNum, VideoFnval, SearchType, SearchOrderType, UserType, \
     VideoDurationType, FavoriteResourceOrderType
 
 
 class BaseRequest(BaseModel):
+    """
+    请求参数，创建后不可修改
+
+    params 按别名排序、去掉 None 并展开枚举，只计算一次，同时用作查询参数、缓存键与哈希。
+    """
+    _params: Optional[Tuple[Tuple[str, Any], ...]] = PrivateAttr(default=None)
+
+    class Config:
+        allow_mutation = False
+
+    @property
+    def params(self) -> Tuple[Tuple[str, Any], ...]:
+        if self._params is None:
+            items = []
+            for name, field in self.__fields__.items():
+                value = self.__dict__[name]
+                if value is None:
+                    continue
+                if isinstance(value, Enum):
+                    value = value.value
+                items.append((field.alias, value))
+            self._params = tuple(sorted(items, key=itemgetter(0)))
+        return self._params
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.params)
+
+    def copy(self, **kwargs) -> 'BaseRequest':
+        m = super().copy(**kwargs)
+        # update 之后参数可能变化
+        object.__setattr__(m, '_params', None)
+        return m
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return False
+        return self.params == other.params
+
     def __hash__(self):
-        return hash(self.json())
+        return hash(self.params)
 
 
 class GeetestBase(BaseModel):
@@ -114,6 +156,14 @@ class HomeDynamicVideoRequest(BaseRequest):
     page: int = 1
 
 
+class HistoryCursorRequest(BaseRequest):
+    max: int = None  # 上一页返回的 cursor.max，首页为空
+    view_at: int = None  # 上一页返回的 cursor.view_at
+    business: str = None  # 上一页返回的 cursor.business
+    type: str = 'archive'  # 只返回稿件
+    ps: int = 20
+
+
 class UserInfoRequest(BaseRequest):
     mid: int  # 用户UID
 
@@ -518,6 +518,49 @@ class HistoryVideoResponse(BaseResponse):
     data: List[HistoryVideoResponseData] = None
 
 
+class HistoryCursor(BaseModel):
+    max: int  # 为 0 时没有更多
+    view_at: int
+    business: str = ''
+    ps: int
+
+
+class HistoryCursorResponse(BaseResponse):
+    class HistoryCursorResponseData(BaseModel):
+        class HistoryItem(BaseModel):
+            class History(BaseModel):
+                oid: int  # 稿件 aid
+                epid: int = None
+                bvid: str = None
+                page: int = None  # 观看到的分P
+                cid: int = None  # 观看到的分P cid
+                part: str = None
+                business: str
+                dt: int  # 观看设备
+
+            title: str
+            long_title: str = ''
+            cover: str = ''
+            uri: str = ''
+            history: History
+            videos: int = None  # 分P总数
+            author_name: str = ''
+            author_face: str = ''
+            author_mid: int = None
+            view_at: datetime
+            progress: timedelta  # 观看进度，-1 为已看完
+            duration: timedelta
+            is_finish: bool = None
+            is_fav: bool = None
+            kid: int = None
+            tag_name: str = ''
+
+        cursor: HistoryCursor
+        list: List[HistoryItem] = None
+
+    data: HistoryCursorResponseData = None
+
+
 class HomeRecommendVideosResponse(BaseResponse):
     class HomeRecommendVideosResponseData(BaseModel):
         class Video(BaseModel):
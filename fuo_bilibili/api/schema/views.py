@@ -0,0 +1,174 @@
+"""
+响应投影视图
+
+只声明插件实际使用的字段，未声明的子树（Rights、Stat、Staff、Subtitle、DescV2 等）在解析时直接跳过，
+既减少解析开销，也减少缓存中响应对象的内存占用。需要完整数据时使用 responses 中的模型。
+"""
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import BaseModel
+
+from fuo_bilibili.api.schema.enums import VideoQualityNum, CodecId
+from fuo_bilibili.api.schema.responses import BaseResponse, Owner, Upper, CntInfo, HistoryCursor
+
+
+class BriefVideo(BaseModel):
+    """
+    列表中的视频条目
+    """
+    aid: int = None
+    bvid: str
+    cid: int = None
+    title: str
+    pic: str = None  # 封面
+    duration: timedelta
+    owner: Owner
+
+
+class VideoInfoView(BaseResponse):
+    class VideoInfoViewData(BaseModel):
+        class Page(BaseModel):
+            cid: int  # 分P cid
+            page: int  # 当前分P
+            part: str  # 分P标题
+            duration: timedelta
+
+        bvid: str
+        aid: int
+        title: str  # 标题
+        pic: str  # 封面
+        pubdate: datetime  # 稿件发布时间
+        duration: timedelta
+        owner: Owner
+        cid: int  # 1P cid
+        pages: List[Page]
+
+    data: VideoInfoViewData = None
+
+
+class PlayUrlView(BaseResponse):
+    class PlayUrlViewData(BaseModel):
+        class Durl(BaseModel):
+            order: int
+            length: timedelta  # 视频长度秒
+            size: int  # 视频大小 Bytes
+            url: str  # 视频流url
+            backup_url: List[str] = None  # 备用视频流
+
+        class Dash(BaseModel):
+            class DashItem(BaseModel):
+                id: int  # 音视频清晰度代码
+                base_url: str  # 默认视频/音频流
+                backup_url: List[str] = None  # 备用视频/音频流
+                bandwidth: int
+                mime_type: str
+                codecs: str
+                width: int
+                height: int
+                codecid: CodecId
+
+            duration: timedelta  # 视频长度秒
+            video: List[DashItem]
+            audio: List[DashItem] = None
+
+        quality: VideoQualityNum
+        format: str
+        timelength: timedelta  # 视频长度毫秒
+        accept_quality: List[VideoQualityNum]  # 支持的分辨率代码列表
+        durl: List[Durl] = None  # vlc/mp4 视频分段
+        dash: Dash = None
+
+    data: PlayUrlViewData = None
+
+
+class FavoriteResourceView(BaseResponse):
+    class FavoriteResourceViewData(BaseModel):
+        class Media(BaseModel):
+            id: int
+            type: int
+            title: str
+            cover: str
+            duration: timedelta
+            upper: Upper
+            bvid: str
+
+        medias: List[Media] = None
+        has_more: bool = True
+
+    data: FavoriteResourceViewData = None
+
+
+class FavoriteSeasonResourceView(BaseResponse):
+    class FavoriteSeasonResourceViewData(BaseModel):
+        class Info(BaseModel):
+            cnt_info: CntInfo
+            cover: str
+            id: int
+            media_count: int
+            season_type: int
+            title: str
+            upper: Upper
+
+        class Media(BaseModel):
+            id: int
+            title: str
+            cover: str
+            duration: timedelta
+            upper: Upper
+            bvid: str
+
+        info: Info
+        medias: List[Media] = None
+
+    data: FavoriteSeasonResourceViewData = None
+
+
+class HistoryLaterVideoView(BaseResponse):
+    class HistoryLaterVideoViewData(BaseModel):
+        class LaterItem(BriefVideo):
+            progress: timedelta  # 观看进度
+
+        count: int
+        list: List[LaterItem]
+
+    data: HistoryLaterVideoViewData = None
+
+
+class HistoryVideoView(BaseResponse):
+    class HistoryVideoViewData(BriefVideo):
+        progress: timedelta  # 观看进度
+
+    data: List[HistoryVideoViewData] = None
+
+
+class HistoryCursorView(BaseResponse):
+    class HistoryCursorViewData(BaseModel):
+        class HistoryItem(BaseModel):
+            class History(BaseModel):
+                oid: int
+                bvid: str = None
+                cid: int = None
+
+            title: str
+            cover: str = ''
+            history: History
+            author_name: str = ''
+            author_mid: int = None
+            duration: timedelta
+
+        cursor: HistoryCursor
+        list: List[HistoryItem] = None
+
+    data: HistoryCursorViewData = None
+
+
+class HomeRecommendVideosView(BaseResponse):
+    class HomeRecommendVideosViewData(BaseModel):
+        item: List[BriefVideo]
+
+    data: HomeRecommendVideosViewData = None
+
+
+class UserBestVideoView(BaseResponse):
+    data: List[BriefVideo]
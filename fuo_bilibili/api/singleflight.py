@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fuo_bilibili.api.exceptions import ApiTimeoutError, RequestCancelledError
+from fuo_bilibili.api.scheduler import Priority, current_priority
+from fuo_bilibili.api.timeout import Deadline
+
+
+class FlightStats:
+    def __init__(self):
+        self.calls = 0  # 实际发出的调用
+        self.coalesced = 0  # 被合并、节省的重复调用
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(calls=self.calls, coalesced=self.coalesced)
+
+    def __repr__(self):
+        return f'FlightStats({self.as_dict()})'
+
+
+class SingleFlight:
+    """
+    合并并发的相同调用
+
+    同一 key 已有调用在途时，后到的调用不再执行，而是等待并共享首个调用的结果或异常。
+    只加入优先级不低于自身的在途调用：播放请求不会等待一个排在后台名额中的相同请求，而是自行发起。
+    等待者受自己的时间预算与取消约束；发起者被取消或超出它自己的预算时，等待者重新发起调用。
+    """
+    # 发起者因自身预算结束的异常，不代表等待者的调用失败
+    _LEADER_ABORTED = (ApiTimeoutError, RequestCancelledError)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = dict()
+        self._aflights: Dict[Hashable, asyncio.Future] = dict()
+        self._stats: Dict[str, FlightStats] = dict()
+
+    def _join(self, group: str, key: Hashable, flights: dict, create: Callable[[], Any]) \
+            -> Tuple[bool, Tuple[Hashable, Priority], Any]:
+        """
+        :return: (是否由本调用发起, 在途调用的键, 在途调用)
+        """
+        priority = current_priority()
+        with self._lock:
+            stats = self._stats.get(group)
+            if stats is None:
+                stats = self._stats[group] = FlightStats()
+            for p in Priority:
+                if p > priority:
+                    break
+                flight = flights.get((key, p))
+                if flight is not None:
+                    stats.coalesced += 1
+                    return False, (key, p), flight
+            stats.calls += 1
+            flight = flights[(key, priority)] = create()
+            return True, (key, priority), flight
+
+    def _land(self, slot: Tuple[Hashable, Priority], flights: dict):
+        with self._lock:
+            del flights[slot]
+
+    def do(self, group: str, key: Hashable, fn: Callable[[], Any], deadline: Optional[Deadline] = None) -> Any:
+        """
+        :param group: 统计分组，一般为接口地址
+        :param key: 调用标识
+        :param fn: 实际调用
+        :param deadline: 本调用的时间预算，等待其他调用时同样受其约束
+        """
+        while True:
+            leader, slot, flight = self._join(group, key, self._flights, Future)
+            if leader:
+                return self._lead(slot, flight, fn)
+            if deadline is not None:
+                deadline.join(flight, group)
+            try:
+                return flight.result()
+            except self._LEADER_ABORTED:
+                continue
+
+    def _lead(self, slot: Tuple[Hashable, Priority], flight: Future, fn: Callable[[], Any]) -> Any:
+        # 先移除在途记录再公布结果，重新发起的等待者不会再加入已结束的调用
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(slot, self._flights)
+            flight.set_exception(e)
+            raise
+        self._land(slot, self._flights)
+        flight.set_result(result)
+        return result
+
+    async def ado(self, group: str, key: Hashable, afn: Callable[[], Awaitable[Any]],
+                  deadline: Optional[Deadline] = None) -> Any:
+        """
+        do 的协程版本，用于同一事件循环内的并发调用
+        """
+        while True:
+            leader, slot, flight = self._join(group, key, self._aflights, asyncio.get_running_loop().create_future)
+            if leader:
+                return await self._alead(slot, flight, afn)
+            # 等待者被取消或超时时不影响发起者
+            if deadline is not None:
+                await deadline.ajoin(flight, group)
+            else:
+                await asyncio.wait({flight})
+            if flight.cancelled():
+                continue
+            try:
+                return flight.result()
+            except self._LEADER_ABORTED:
+                continue
+
+    async def _alead(self, slot: Tuple[Hashable, Priority], flight: asyncio.Future,
+                     afn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await afn()
+        except asyncio.CancelledError:
+            self._land(slot, self._aflights)
+            flight.cancel()
+            raise
+        except BaseException as e:
+            self._land(slot, self._aflights)
+            flight.set_exception(e)
+            # 没有等待者时避免 asyncio 报告未获取的异常
+            flight.exception()
+            raise
+        self._land(slot, self._aflights)
+        flight.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, FlightStats]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,275 @@
+"""
+本地流媒体代理
+
+播放器只连接 127.0.0.1，代理负责补充 Referer 等请求头，把媒体切成固定大小的分片并发发起 Range 请求，
+按顺序写回播放器，同时保持少量分片的预读。每个分片按 CDN 节点评分选择源地址，失败时降级该节点并改用下一个地址，
+完整从头播放的音频可以同时写入本地音频缓存。分片的下载速度计入吞吐量估计；
+已知码率的媒体在播放中持续下载慢于播放速度时记为一次卡顿。
+"""
+import logging
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+import requests
+from cachetools import LRUCache
+from requests.adapters import HTTPAdapter
+
+from fuo_bilibili.api.audio_cache import AudioCache
+from fuo_bilibili.api.cdn import CdnScorer
+from fuo_bilibili.api.throughput import ThroughputEstimator
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class UpstreamError(Exception):
+    """所有源地址都无法取得分片"""
+
+
+class _Stream:
+    def __init__(self, urls: List[str], headers: Dict[str, str], cache_key: Optional[Tuple[Hashable, ...]],
+                 bitrate: Optional[int]):
+        self.urls = urls
+        self.headers = headers
+        self.cache_key = cache_key
+        self.bitrate = bitrate
+        self.stalled = False
+        # 最近分片的 (等待时间, 播放时长)
+        self.recent: Deque[Tuple[float, float]] = deque(maxlen=StreamProxy.STALL_CHUNKS)
+        self.size: Optional[int] = None
+        self.content_type = 'application/octet-stream'
+        self.head: Optional[bytes] = None  # 探测时取得的第一个分片
+        self.lock = threading.Lock()
+
+
+class StreamProxy:
+    """
+    本地流媒体代理
+
+    register 返回一个 http://127.0.0.1 地址交给播放器。
+    """
+    CHUNK_SIZE = 512 * 1024
+    STALL_CHUNKS = 8  # 最近这么多个分片的等待时间之和超过其播放时长之和时记为卡顿
+
+    def __init__(self, connections: int = 8, read_ahead: int = 4, cache: Optional[AudioCache] = None,
+                 scorer: Optional[CdnScorer] = None, throughput: Optional[ThroughputEstimator] = None,
+                 maxsize: int = 64):
+        """
+        :param connections: 所有播放连接共享的上游并发请求数
+        :param read_ahead: 每个播放连接同时在途的分片数
+        :param cache: 完整播放的音频写入该缓存
+        :param scorer: 选择源地址使用的节点评分
+        :param throughput: 分片下载速度计入该吞吐量估计，卡顿也报告给它
+        :param maxsize: 保留的注册地址数
+        """
+        self._read_ahead = read_ahead
+        self._cache = cache
+        self._scorer = scorer or CdnScorer(reference_bytes=self.CHUNK_SIZE)
+        self._throughput = throughput
+        self._streams: LRUCache = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_maxsize=connections))
+        self._session.mount('http://', HTTPAdapter(pool_maxsize=connections))
+        self._executor = ThreadPoolExecutor(max_workers=connections, thread_name_prefix='bilibili-proxy-fetch')
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def start(self):
+        with self._lock:
+            if self._server is not None:
+                return
+            proxy = self
+
+            class Handler(_ProxyHandler):
+                pass
+
+            Handler.proxy = proxy
+            server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name='bilibili-proxy', daemon=True).start()
+            self._server = server
+
+    def register(self, urls: List[str], headers: Optional[Dict[str, str]] = None,
+                 cache_key: Optional[Tuple[Hashable, ...]] = None, bitrate: Optional[int] = None) -> str:
+        """
+        :param urls: 主地址与备用地址
+        :param cache_key: 完整播放后写入音频缓存使用的键
+        :param bitrate: 媒体码率（bps），用于检测卡顿
+        :return: 交给播放器的本地地址
+        """
+        self.start()
+        token = secrets.token_urlsafe(12)
+        with self._lock:
+            self._streams[token] = _Stream([u for u in urls if u], headers or {}, cache_key, bitrate)
+        return f'http://127.0.0.1:{self._server.server_port}/{token}'
+
+    def stream(self, token: str) -> Optional[_Stream]:
+        with self._lock:
+            return self._streams.get(token)
+
+    def _fetch(self, stream: _Stream, start: int, end: int) -> Tuple[bytes, requests.structures.CaseInsensitiveDict]:
+        """
+        请求 [start, end] 字节，按节点评分依次尝试各个源地址
+        """
+        error: Optional[Exception] = None
+        for url in self._scorer.rank(stream.urls):
+            try:
+                begin = time.monotonic()
+                r = self._session.get(url, headers={**stream.headers, 'Range': f'bytes={start}-{end}'},
+                                      timeout=(5, 15))
+                if r.status_code != 206:
+                    raise UpstreamError(f'unexpected status {r.status_code}')
+                m = CONTENT_RANGE.match(r.headers.get('Content-Range', ''))
+                if m is None or int(m.group(1)) != start or len(r.content) != int(m.group(2)) - start + 1:
+                    raise UpstreamError('unexpected range response')
+                elapsed = time.monotonic() - begin
+                self._scorer.record(url, r.elapsed.total_seconds(), elapsed, len(r.content))
+                if self._throughput is not None:
+                    self._throughput.add(len(r.content), elapsed)
+                return r.content, r.headers
+            except (requests.RequestException, UpstreamError) as e:
+                logger.info(f'fetching range {start}-{end} from {CdnScorer.host_of(url)} failed: {str(e)}')
+                self._scorer.fail(url)
+                error = e
+        raise UpstreamError(str(error))
+
+    def _probe(self, stream: _Stream):
+        with stream.lock:
+            if stream.size is not None:
+                return
+            content, headers = self._fetch(stream, 0, self.CHUNK_SIZE - 1)
+            m = CONTENT_RANGE.match(headers.get('Content-Range', ''))
+            if m is None:
+                raise UpstreamError('missing Content-Range')
+            stream.size = int(m.group(3))
+            stream.content_type = headers.get('Content-Type', stream.content_type)
+            stream.head = content
+
+    def _chunk(self, stream: _Stream, index: int) -> bytes:
+        if index == 0 and stream.head is not None:
+            return stream.head
+        start = index * self.CHUNK_SIZE
+        return self._fetch(stream, start, min(start + self.CHUNK_SIZE, stream.size) - 1)[0]
+
+    def serve(self, handler: BaseHTTPRequestHandler, stream: _Stream, head_only: bool):
+        try:
+            self._probe(stream)
+        except UpstreamError as e:
+            handler.send_error(502, str(e))
+            return
+        size = stream.size
+        start, end = 0, size - 1
+        ranged = False
+        m = RANGE.match(handler.headers.get('Range', ''))
+        if m is not None and (m.group(1) or m.group(2)):
+            ranged = True
+            if m.group(1):
+                start = int(m.group(1))
+                end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+            else:
+                start = max(0, size - int(m.group(2)))
+            if start > end:
+                handler.send_response(416)
+                handler.send_header('Content-Range', f'bytes */{size}')
+                handler.send_header('Content-Length', '0')
+                handler.end_headers()
+                return
+        handler.send_response(206 if ranged else 200)
+        handler.send_header('Content-Type', stream.content_type)
+        handler.send_header('Accept-Ranges', 'bytes')
+        handler.send_header('Content-Length', str(end - start + 1))
+        if ranged:
+            handler.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        handler.end_headers()
+        if head_only:
+            return
+        self._pipe(handler, stream, start, end)
+
+    def _pipe(self, handler: BaseHTTPRequestHandler, stream: _Stream, start: int, end: int):
+        first, last = start // self.CHUNK_SIZE, end // self.CHUNK_SIZE
+        pending: Deque[Future] = deque()
+        next_index = first
+        tee = None
+        if self._cache is not None and self._cache.enabled and stream.cache_key is not None \
+                and start == 0 and end == stream.size - 1 and self._cache.get(stream.cache_key) is None:
+            tee = self._cache.open_part(stream.cache_key)
+        try:
+            for index in range(first, last + 1):
+                while next_index <= last and len(pending) < self._read_ahead:
+                    pending.append(self._executor.submit(self._chunk, stream, next_index))
+                    next_index += 1
+                waited = time.monotonic()
+                data = pending.popleft().result()
+                self._check_stall(stream, index - first, time.monotonic() - waited, len(data))
+                offset = index * self.CHUNK_SIZE
+                handler.wfile.write(data[max(0, start - offset):end - offset + 1])
+                if tee is not None:
+                    tee[0].write(data)
+            if tee is not None:
+                self._cache.commit(stream.cache_key, *tee)
+                tee = None
+        except (UpstreamError, ConnectionError) as e:
+            # 播放器断开（如跳转）或上游失败，结束本次响应
+            logger.debug(f'proxy stream stopped: {str(e)}')
+            handler.close_connection = True
+        finally:
+            for future in pending:
+                future.cancel()
+            if tee is not None:
+                AudioCache.discard(*tee)
+
+    def _check_stall(self, stream: _Stream, position: int, waited: float, nbytes: int):
+        """
+        :param position: 本次响应中的第几个分片，开头 read_ahead 个分片属于启动缓冲，不计入
+        :param waited: 等待该分片的时间（秒）
+        """
+        if self._throughput is None or not stream.bitrate or stream.stalled or position < self._read_ahead:
+            return
+        stream.recent.append((waited, nbytes * 8 / stream.bitrate))
+        if len(stream.recent) == stream.recent.maxlen \
+                and sum(w for w, _ in stream.recent) > sum(d for _, d in stream.recent):
+            logger.info(f'stream at {stream.bitrate} bps is downloading slower than playback')
+            stream.stalled = True
+            self._throughput.stall(stream.bitrate)
+
+    def close(self):
+        with self._lock:
+            server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    proxy: StreamProxy = None
+
+    def _handle(self, head_only: bool):
+        stream = self.proxy.stream(self.path.lstrip('/').split('?', 1)[0])
+        if stream is None:
+            self.send_error(404)
+            return
+        self.proxy.serve(self, stream, head_only)
+
+    def do_GET(self):
+        self._handle(False)
+
+    def do_HEAD(self):
+        self._handle(True)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
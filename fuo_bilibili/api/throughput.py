@@ -0,0 +1,139 @@
+"""
+吞吐量估计
+
+由实际的媒体下载（代理分片）提供样本。分片并发下载时每个分片只分到一部分带宽，因此不直接使用单个分片的速度，
+而是把时间上重叠的下载合并为忙碌时段，按时段内完成的总字节数与时段的实际时长计算吞吐量，空闲时间不计入。
+用快慢两条按下载时长衰减的均值估计吞吐量，取较小者，网速下降时反应快、短暂的突发不会抬高估计。据此给出能在启动延迟目标内开始播放、并能持续播放的最高码率；
+播放中检测到卡顿时，一段时间内只选择比卡顿的码率更低的一档。
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+
+class _Ewma:
+    def __init__(self, half_life: float):
+        self._half_life = half_life
+        self._value = 0.0
+        self._weight = 0.0
+
+    def add(self, duration: float, value: float):
+        alpha = 0.5 ** (duration / self._half_life)
+        self._value = alpha * self._value + (1 - alpha) * value
+        self._weight = alpha * self._weight + (1 - alpha)
+
+    def get(self) -> float:
+        # 修正初始值为 0 带来的偏差
+        return self._value / self._weight
+
+
+class ThroughputEstimator:
+    """
+    吞吐量估计与码率预算，码率单位均为 bps
+    """
+
+    def __init__(self, fast_half_life: float = 2, slow_half_life: float = 10, min_bytes: int = 16 * 1024,
+                 min_duration: float = 0.5, sample_window: float = 1, start_latency: float = 3,
+                 startup_buffer: float = 3, safety: float = 0.8, stall_window: float = 300,
+                 timer: Callable[[], float] = time.monotonic):
+        """
+        :param fast_half_life: 快速均值的半衰期（秒，按下载时长计）
+        :param slow_half_life: 慢速均值的半衰期
+        :param min_bytes: 小于该字节数的时段只反映延迟，忽略
+        :param min_duration: 累计下载时长达到该秒数前不给出估计
+        :param sample_window: 忙碌时段持续达到该秒数后，之后完成的下载计入新的时段，原时段结算为一个样本
+        :param start_latency: 启动延迟目标（秒）
+        :param startup_buffer: 开始播放前需要缓冲的媒体时长（秒）
+        :param safety: 持续播放时码率占吞吐量的最大比例
+        :param stall_window: 卡顿后限制码率的时长（秒）
+        """
+        self._fast = _Ewma(fast_half_life)
+        self._slow = _Ewma(slow_half_life)
+        self._min_bytes = min_bytes
+        self._min_duration = min_duration
+        self._sample_window = sample_window
+        self._start_latency = start_latency
+        self._startup_buffer = startup_buffer
+        self._safety = safety
+        self._stall_window = stall_window
+        self._timer = timer
+        self._duration = 0.0
+        # 当前忙碌时段
+        self._period_start = 0.0
+        self._period_end = 0.0
+        self._period_bytes = 0
+        self._settled_at = float('-inf')
+        self._stall_cap: Optional[int] = None
+        self._stall_at = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, nbytes: int, elapsed: float):
+        """
+        在一次下载完成时调用
+
+        :param nbytes: 下载的字节数
+        :param elapsed: 下载耗时（秒）
+        """
+        if nbytes <= 0 or elapsed <= 0:
+            return
+        end = self._timer()
+        start = end - elapsed
+        with self._lock:
+            if self._period_bytes and (start > self._period_end or (
+                    end > self._period_end and self._period_end - self._period_start >= self._sample_window)):
+                # 与当前时段不重叠（中间链路空闲），或当前时段已足够长；同时完成的下载计入同一时段
+                self._settle()
+            if self._period_bytes:
+                self._period_end = max(self._period_end, end)
+            else:
+                self._period_end = end
+                self._period_start = start
+            # 已结算的时间不重复计入
+            self._period_start = max(min(self._period_start, start), self._settled_at)
+            self._period_bytes += nbytes
+
+    def _settle(self):
+        duration = self._period_end - self._period_start
+        if self._period_bytes >= self._min_bytes and duration > 0:
+            bps = self._period_bytes * 8 / duration
+            self._fast.add(duration, bps)
+            self._slow.add(duration, bps)
+            self._duration += duration
+        self._settled_at = self._period_end
+        self._period_bytes = 0
+
+    def estimate(self) -> Optional[float]:
+        """
+        :return: 估计的吞吐量（bps），样本不足时返回 None
+        """
+        with self._lock:
+            if self._duration < self._min_duration:
+                return None
+            return min(self._fast.get(), self._slow.get())
+
+    def stall(self, bandwidth: int):
+        """
+        记录一次卡顿
+
+        :param bandwidth: 卡顿的媒体流码率
+        """
+        with self._lock:
+            now = self._timer()
+            if self._stall_cap is None or now - self._stall_at >= self._stall_window:
+                self._stall_cap = bandwidth - 1
+            else:
+                self._stall_cap = min(self._stall_cap, bandwidth - 1)
+            self._stall_at = now
+
+    def budget(self) -> Optional[int]:
+        """
+        :return: 可以选择的最高码率（bps），没有估计且近期没有卡顿时返回 None 表示不限
+        """
+        estimate = self.estimate()
+        with self._lock:
+            cap = self._stall_cap if self._timer() - self._stall_at < self._stall_window else None
+        if estimate is None:
+            return cap
+        # 缓冲 startup_buffer 秒媒体的耗时不超过 start_latency，且码率不超过吞吐量的 safety 倍
+        budget = int(estimate * min(self._safety, self._start_latency / self._startup_buffer))
+        return budget if cap is None else min(budget, cap)
@@ -0,0 +1,193 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from fuo_bilibili.api.exceptions import ApiTimeoutError, RequestCancelledError
+
+
+class Timeout:
+    """
+    接口超时配置
+    """
+
+    def __init__(self, total: Optional[float] = 30, connect: float = 5, read: float = 15):
+        """
+        :param total: 单次调用的总预算（秒），包含限流等待、排队与重试，None 表示不限
+        :param connect: 每次请求建立连接的超时（秒）
+        :param read: 每次请求读取响应的超时（秒）
+        """
+        self.total = total
+        self.connect = connect
+        self.read = read
+
+    def __repr__(self):
+        return f'Timeout(total={self.total}, connect={self.connect}, read={self.read})'
+
+
+DEFAULT_TIMEOUT = Timeout()
+
+
+class Deadline:
+    """
+    一次调用的总时间预算，可在其他线程中取消
+
+    >>> deadline = Deadline(10)
+    >>> with request_deadline(deadline):
+    ...     api.video_get_info(request)  # 另一线程中 deadline.cancel() 可提前结束
+    """
+    POLL_INTERVAL = 0.05  # 等待其他调用时检查取消的间隔（秒）
+
+    def __init__(self, budget: Optional[float], timer: Callable[[], float] = time.monotonic):
+        """
+        :param budget: 预算（秒），None 表示不限
+        """
+        self.budget = budget
+        self._timer = timer
+        self._expires = None if budget is None else timer() + budget
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def remaining(self) -> Optional[float]:
+        if self._expires is None:
+            return None
+        return max(0.0, self._expires - self._timer())
+
+    def check(self, endpoint: str):
+        if self.cancelled:
+            raise RequestCancelledError(endpoint)
+        if self.remaining() == 0:
+            raise ApiTimeoutError(endpoint, self.budget)
+
+    def bound(self, timeout: Timeout) -> Tuple[float, float]:
+        """
+        :return: 不超过剩余预算的 (连接超时, 读取超时)
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout.connect, timeout.read
+        return min(timeout.connect, remaining), min(timeout.read, remaining)
+
+    def sleep(self, seconds: float, endpoint: str):
+        """
+        等待限流或退避，等待超出预算时直接超时，等待中被取消时立即返回
+        """
+        self.check(endpoint)
+        if seconds <= 0:
+            return
+        remaining = self.remaining()
+        if remaining is not None and seconds > remaining:
+            raise ApiTimeoutError(endpoint, self.budget)
+        if self._cancelled.wait(seconds):
+            raise RequestCancelledError(endpoint)
+
+    async def asleep(self, seconds: float, endpoint: str):
+        self.check(endpoint)
+        if seconds <= 0:
+            return
+        remaining = self.remaining()
+        if remaining is not None and seconds > remaining:
+            raise ApiTimeoutError(endpoint, self.budget)
+        await asyncio.sleep(seconds)
+        self.check(endpoint)
+
+    def _step(self) -> float:
+        remaining = self.remaining()
+        return self.POLL_INTERVAL if remaining is None else min(self.POLL_INTERVAL, remaining)
+
+    def join(self, future: Future, endpoint: str):
+        """
+        等待其他调用的 Future 完成（不取结果），超出本预算或被取消时提前结束，不影响该调用
+        """
+        while True:
+            self.check(endpoint)
+            try:
+                future.exception(self._step())
+                return
+            except FutureTimeoutError:
+                continue
+
+    async def ajoin(self, future: asyncio.Future, endpoint: str):
+        while not future.done():
+            self.check(endpoint)
+            await asyncio.wait({future}, timeout=self._step())
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    'bilibili_request_deadline', default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def request_deadline(deadline: Deadline):
+    """
+    为当前线程或协程内发出的请求指定预算，取代接口默认的总超时
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+class TimeoutStats:
+    def __init__(self):
+        self.timeouts = 0
+        self.cancelled = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(timeouts=self.timeouts, cancelled=self.cancelled)
+
+    def __repr__(self):
+        return f'TimeoutStats({self.as_dict()})'
+
+
+class RequestTimeouts:
+    """
+    按接口查找超时配置并统计超时与取消次数
+    """
+
+    def __init__(self, timeouts: Dict[str, Timeout], default: Timeout = DEFAULT_TIMEOUT):
+        """
+        :param timeouts: 键为接口地址
+        """
+        self._timeouts = timeouts
+        self._default = default
+        self._stats: Dict[str, TimeoutStats] = dict()
+        self._lock = threading.Lock()
+
+    def policy(self, endpoint: str) -> Timeout:
+        return self._timeouts.get(endpoint, self._default)
+
+    def deadline(self, endpoint: str) -> Deadline:
+        return Deadline(self.policy(endpoint).total)
+
+    def _endpoint_stats(self, endpoint: str) -> TimeoutStats:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = TimeoutStats()
+        return stats
+
+    def record_timeout(self, endpoint: str):
+        with self._lock:
+            self._endpoint_stats(endpoint).timeouts += 1
+
+    def record_cancel(self, endpoint: str):
+        with self._lock:
+            self._endpoint_stats(endpoint).cancelled += 1
+
+    def stats(self) -> Dict[str, TimeoutStats]:
+        with self._lock:
+            return dict(self._stats)
@@ -2,14 +2,28 @@ from typing import Type, Any, Optional, Union
 
 from pydantic import BaseModel
 
+from fuo_bilibili.api.cache import CachePolicy
+from fuo_bilibili.api.timeout import Timeout
 from fuo_bilibili.api.schema.requests import BaseRequest, UserInfoRequest, UserBestVideoRequest, UserVideoRequest
 from fuo_bilibili.api.schema.responses import BaseResponse, UserInfoResponse, UserBestVideoResponse, UserVideoResponse
+from fuo_bilibili.api.schema.views import UserBestVideoView
 
 
 class UserMixin:
     API_BASE = 'https://api.bilibili.com/x/web-interface'
     PASSPORT_BASE = 'https://passport.bilibili.com'
     APIX_BASE = 'https://api.bilibili.com/x'
+    CACHE_POLICIES = {
+        f'{APIX_BASE}/space/masterpiece': CachePolicy(ttl=3600, maxsize=200, disk_ttl=86400),
+        f'{APIX_BASE}/space/arc/search': CachePolicy(ttl=600, maxsize=500, disk_ttl=21600,
+                                                     stale_while_revalidate=True),
+    }
+    TIMEOUTS = {
+        f'{APIX_BASE}/space/arc/search': Timeout(total=45, connect=5, read=30),
+    }
+    PAGE_SIZES = {
+        f'{APIX_BASE}/space/arc/search': 50,
+    }
 
     def get(self, url: str, param: Optional[BaseRequest], clazz: Union[Type[BaseResponse], Type[BaseModel], None], **kwargs) -> Any:
         pass
@@ -24,9 +38,10 @@ class UserMixin:
             'referer': 'https://www.bilibili.com',
         })
 
-    def user_best_videos(self, request: UserBestVideoRequest) -> UserBestVideoResponse:
+    def user_best_videos(self, request: UserBestVideoRequest, view: Type[BaseResponse] = UserBestVideoView) \
+            -> Union[UserBestVideoView, UserBestVideoResponse]:
         url = f'{self.APIX_BASE}/space/masterpiece'
-        return self.get(url, request, UserBestVideoResponse)
+        return self.get(url, request, view)
 
     def user_videos(self, request: UserVideoRequest) -> UserVideoResponse:
         url = f'{self.APIX_BASE}/space/arc/search'
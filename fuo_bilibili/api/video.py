@@ -1,20 +1,56 @@
-from typing import Type, Any
+from typing import Type, Any, Optional, Union, List, Sequence
 
+from fuo_bilibili.api.cache import CachePolicy, signed_url_expires
+from fuo_bilibili.api.timeout import Timeout
 from fuo_bilibili.api.schema.requests import VideoInfoRequest, PlayUrlRequest, BaseRequest
 from fuo_bilibili.api.schema.responses import VideoInfoResponse, PlayUrlResponse, BaseResponse
+from fuo_bilibili.api.schema.views import VideoInfoView, PlayUrlView
+
+
+def playurl_expires(response: Union[PlayUrlView, PlayUrlResponse]) -> Optional[float]:
+    data = response.data
+    if data is None:
+        return None
+    url = None
+    if data.durl:
+        url = data.durl[0].url
+    elif data.dash is not None and (data.dash.audio or data.dash.video):
+        url = (data.dash.audio or data.dash.video)[0].base_url
+    return signed_url_expires(url)
 
 
 class VideoMixin:
     API_BASE = 'https://api.bilibili.com/x/web-interface'
     PLAYER_API_BASE = 'https://api.bilibili.com/x/player'
+    CACHE_POLICIES = {
+        f'{API_BASE}/view': CachePolicy(ttl=3600, maxsize=200),
+        # 播放地址由 ManifestCache 按 (bvid, cid) 缓存至签名过期
+        f'{PLAYER_API_BASE}/playurl': CachePolicy(cacheable=False),
+    }
+    TIMEOUTS = {
+        f'{API_BASE}/view': Timeout(total=10, connect=3, read=8),
+        # 播放地址解析直接影响起播
+        f'{PLAYER_API_BASE}/playurl': Timeout(total=8, connect=3, read=5),
+    }
 
     def get(self, url: str, param: BaseRequest, clazz: Type[BaseResponse]) -> Any:
         pass
 
-    def video_get_info(self, request: VideoInfoRequest) -> VideoInfoResponse:
+    def get_many(self, url: str, params: Sequence[BaseRequest], clazz: Type[BaseResponse], concurrency: int = 8) -> Any:
+        pass
+
+    # view 为响应模型，默认只解析插件使用的字段，传入完整模型可获取全部数据
+    def video_get_info(self, request: VideoInfoRequest, view: Type[BaseResponse] = VideoInfoView) \
+            -> Union[VideoInfoView, VideoInfoResponse]:
+        url = f'{self.API_BASE}/view'
+        return self.get(url, request, view)
+
+    def video_get_info_many(self, bvids: Sequence[str], concurrency: int = 8, view: Type[BaseResponse] = VideoInfoView) \
+            -> List[Union[VideoInfoView, VideoInfoResponse, Exception]]:
         url = f'{self.API_BASE}/view'
-        return self.get(url, request, VideoInfoResponse)
+        return self.get_many(url, [VideoInfoRequest(bvid=bvid) for bvid in bvids], view, concurrency)
 
-    def video_get_url(self, request: PlayUrlRequest) -> PlayUrlResponse:
+    def video_get_url(self, request: PlayUrlRequest, view: Type[BaseResponse] = PlayUrlView) \
+            -> Union[PlayUrlView, PlayUrlResponse]:
         url = f'{self.PLAYER_API_BASE}/playurl'
-        return self.get(url, request, PlayUrlResponse)
+        return self.get(url, request, view)
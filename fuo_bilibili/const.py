@@ -7,5 +7,20 @@ PLUGIN_DATA_DIRECTORY = FEELUOWN_DIRECTORY / 'fuo_bilibili'
 # Cookiejar file
 PLUGIN_API_COOKIEJAR_FILE = PLUGIN_DATA_DIRECTORY / 'bilibili_api.cookie'
 
+# Persistent response cache
+PLUGIN_API_CACHE_FILE = PLUGIN_DATA_DIRECTORY / 'bilibili_api_cache.sqlite'
+PLUGIN_API_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Video metadata (bvid -> cid, pages, title, owner)
+PLUGIN_VIDEO_METADATA_FILE = PLUGIN_DATA_DIRECTORY / 'bilibili_videos.sqlite'
+
+# Local audio cache, set the budget to 0 to disable it.
+# The cache is filled by the stream proxy while audio plays, so it is only used when PLUGIN_STREAM_PROXY is on
+PLUGIN_AUDIO_CACHE_DIRECTORY = PLUGIN_DATA_DIRECTORY / 'audio_cache'
+PLUGIN_AUDIO_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# Play CDN media through the localhost proxy (parallel range requests, backup urls)
+PLUGIN_STREAM_PROXY = True
+
 # Ensure directories
 PLUGIN_DATA_DIRECTORY.mkdir(parents=True, exist_ok=True)
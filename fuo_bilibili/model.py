@@ -7,12 +7,14 @@ from feeluown.models import SearchModel, ModelExistence
 
 from fuo_bilibili import __identifier__
 from fuo_bilibili.api import SearchType
+from fuo_bilibili.api.metadata import VideoMeta
 from fuo_bilibili.api.schema.requests import SearchRequest
 from fuo_bilibili.api.schema.responses import SearchResponse, SearchResultVideo, VideoInfoResponse, \
-    FavoriteListResponse, FavoriteInfoResponse, FavoriteResourceResponse, CollectedFavoriteListResponse, \
-    FavoriteSeasonResourceResponse, HistoryLaterVideoResponse, HomeDynamicVideoResponse, UserInfoResponse, \
-    UserBestVideoResponse, UserVideoResponse, AudioFavoriteSongsResponse, AudioFavoriteListResponse, AudioPlaylist, \
-    AudioPlaylistSong
+    FavoriteListResponse, FavoriteInfoResponse, CollectedFavoriteListResponse, FavoriteSeasonResourceResponse, \
+    HomeDynamicVideoResponse, UserInfoResponse, UserVideoResponse, AudioFavoriteSongsResponse, \
+    AudioFavoriteListResponse, AudioPlaylist, AudioPlaylistSong
+from fuo_bilibili.api.schema.views import VideoInfoView, FavoriteResourceView, FavoriteSeasonResourceView, \
+    HistoryLaterVideoView, UserBestVideoView, BriefVideo, HistoryCursorView
 from fuo_bilibili.util import format_timedelta_to_hms
 
 PROVIDER_ID = __identifier__
@@ -50,7 +52,7 @@ class BSongModel(SongModel):
         )
 
     @classmethod
-    def create_hot_model(cls, item: UserBestVideoResponse.BestVideo):
+    def create_hot_model(cls, item: BriefVideo):
         return cls(
             source=__identifier__,
             identifier=item.bvid,
@@ -77,7 +79,7 @@ class BSongModel(SongModel):
         )
 
     @classmethod
-    def create_brief_model(cls, media: FavoriteResourceResponse.FavoriteResourceResponseData.Media) -> BriefSongModel:
+    def create_brief_model(cls, media: FavoriteResourceView.FavoriteResourceViewData.Media) -> BriefSongModel:
         return BriefSongModel(
             source=__identifier__,
             identifier=media.bvid,
@@ -102,7 +104,7 @@ class BSongModel(SongModel):
         )
 
     @classmethod
-    def create_info_model(cls, response: VideoInfoResponse) -> 'BSongModel':
+    def create_info_model(cls, response: Union[VideoInfoView, VideoInfoResponse]) -> 'BSongModel':
         result = response.data
         return cls(
             source=__identifier__,
@@ -118,6 +120,22 @@ class BSongModel(SongModel):
             exists=ModelExistence.yes
         )
 
+    @classmethod
+    def create_meta_model(cls, meta: VideoMeta) -> 'BSongModel':
+        return cls(
+            source=__identifier__,
+            identifier=meta.bvid,
+            album=None,
+            title=meta.title,
+            artists=[BriefArtistModel(
+                source=PROVIDER_ID,
+                identifier=meta.owner_mid,
+                name=meta.owner_name,
+            )],
+            duration=meta.duration * 1000,
+            exists=ModelExistence.yes
+        )
+
     @classmethod
     def create_history_brief_model(cls, media):
         return BriefSongModel(
@@ -129,7 +147,17 @@ class BSongModel(SongModel):
         )
 
     @classmethod
-    def create_history_brief_model_list(cls, resp: HistoryLaterVideoResponse) -> List[BriefSongModel]:
+    def create_history_cursor_brief_model(cls, item: HistoryCursorView.HistoryCursorViewData.HistoryItem):
+        return BriefSongModel(
+            source=__identifier__,
+            identifier=item.history.bvid,
+            title=item.title,
+            artists_name=item.author_name,
+            duration_ms=format_timedelta_to_hms(item.duration)
+        )
+
+    @classmethod
+    def create_history_brief_model_list(cls, resp: HistoryLaterVideoView) -> List[BriefSongModel]:
         return [cls.create_history_brief_model(media) for media in resp.data.list]
 
 
@@ -156,7 +184,7 @@ class BSearchModel(SearchModel):
 class BPlaylistModel(PlaylistModel):
     PROVIDER_ID = __identifier__
 
-    count: int
+    count: int = None  # 游标翻页的列表读完之前未知
 
     @classmethod
     def create_audio_model(cls, p: AudioPlaylist):
@@ -245,7 +273,7 @@ class BPlaylistModel(PlaylistModel):
         ]
 
     @classmethod
-    def special_model(cls, identifier, resp: Optional[HistoryLaterVideoResponse]):
+    def special_model(cls, identifier, resp: Optional[HistoryLaterVideoView]):
         match identifier:
             case 'DYNAMIC':
                 return cls(
@@ -255,7 +283,7 @@ class BPlaylistModel(PlaylistModel):
                     name='动态视频',
                     cover='',
                     description='动态视频',
-                    count=1000,
+                    count=None,
                 )
             case 'LATER':
                 return cls(
@@ -275,12 +303,13 @@ class BPlaylistModel(PlaylistModel):
                     name='历史纪录',
                     cover='',
                     description='历史纪录',
-                    count=1000,
+                    count=None,
                 )
 
     @classmethod
-    def create_info_model(cls, response: Union[FavoriteInfoResponse, FavoriteSeasonResourceResponse]):
-        if isinstance(response, FavoriteSeasonResourceResponse):
+    def create_info_model(cls, response: Union[FavoriteInfoResponse, FavoriteSeasonResourceView,
+                                               FavoriteSeasonResourceResponse]):
+        if isinstance(response, (FavoriteSeasonResourceView, FavoriteSeasonResourceResponse)):
             return cls(
                 source=PROVIDER_ID,
                 identifier=f'21_{response.data.info.id}',
@@ -318,7 +347,7 @@ class BArtistModel(ArtistModel):
     PROVIDER_ID = __identifier__
 
     @classmethod
-    def create_model(cls, resp: UserInfoResponse, video_resp: UserBestVideoResponse) -> 'BArtistModel':
+    def create_model(cls, resp: UserInfoResponse, video_resp: UserBestVideoView) -> 'BArtistModel':
         alias = []
         if resp.data.fans_badge and resp.data.fans_medal.show and resp.data.fans_medal.wear \
                 and resp.data.fans_medal.medal is not None:
@@ -36,12 +36,15 @@ class HomeRenderer(Renderer, LibraryTabRendererMixin):
         self.refresh_btn.clicked.connect(self._refresh_home_videos)
 
         if self.tab_id == Tab.songs:
-            self._refresh_home_videos()
             self.toolbar.add_tmp_button(self.refresh_btn)
+            await self._show_home_videos()
 
     def _refresh_home_videos(self):
+        aio.run_afn(self._show_home_videos)
+
+    async def _show_home_videos(self):
         self._rcmd_index += 1
-        self.show_songs(self._provider.home_recommend_videos(self._rcmd_index))
+        self.show_songs(await self._provider.a_home_recommend_videos(self._rcmd_index))
 
     def show_by_tab_id(self, tab_id):
         query = {'tab_id': tab_id.value}
@@ -0,0 +1,97 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set, TYPE_CHECKING
+
+from fuo_bilibili import __identifier__
+
+if TYPE_CHECKING:
+    from fuo_bilibili.provider import BilibiliProvider
+
+logger = logging.getLogger(__name__)
+
+
+class MediaPrefetcher:
+    """
+    提前解析播放列表中接下来几首的播放地址
+
+    当前歌曲、播放模式变化或列表新增歌曲时，在后台为自动切歌将播放的至多 depth 首本插件歌曲解析 cid 与播放清单。
+    解析结果由 provider 缓存至签名过期，顺序播放切歌时 song_get_media 可直接从内存返回。
+    """
+
+    def __init__(self, provider: 'BilibiliProvider', playlist, depth: int = 2):
+        """
+        :param playlist: feeluown.player.Playlist
+        :param depth: 预解析的歌曲数
+        """
+        self._provider = provider
+        self._playlist = playlist
+        self._depth = depth
+        self._inflight: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='bilibili-prefetch')
+
+    def attach(self):
+        self._playlist.song_changed.connect(self._on_changed, weak=False)
+        self._playlist.songs_added.connect(self._on_changed, weak=False)
+        self._playlist.playback_mode_changed.connect(self._on_changed, weak=False)
+
+    def detach(self):
+        self._playlist.song_changed.disconnect(self._on_changed)
+        self._playlist.songs_added.disconnect(self._on_changed)
+        self._playlist.playback_mode_changed.disconnect(self._on_changed)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def upcoming(self) -> List:
+        """
+        :return: 自动切歌时接下来会播放的本插件歌曲，与 Playlist.next_song 的规则一致：
+
+            - 单曲循环：当前歌曲会重新播放，只返回当前歌曲，使其地址在重播前保持有效
+            - 随机播放：下一首无法预测，返回空列表
+            - 顺序播放：当前歌曲之后的歌曲，到列表末尾为止
+            - 列表循环：当前歌曲之后的歌曲，到末尾后从头继续
+        """
+        # 避免导入 feeluown.player（依赖 libmpv），按名称判断播放模式
+        mode = getattr(self._playlist.playback_mode, 'name', None)
+        current = self._playlist.current_song
+        if mode == 'random':
+            return []
+        if mode == 'one_loop':
+            return [current] if current is not None and self._is_ours(current) else []
+        songs = list(self._playlist.list())
+        start = songs.index(current) + 1 if current in songs else 0
+        following = songs[start:]
+        if mode == 'loop':
+            following += songs[:start]
+        upcoming = []
+        for song in following:
+            if len(upcoming) >= self._depth:
+                break
+            if song is not current and self._is_ours(song):
+                upcoming.append(song)
+        return upcoming
+
+    def _is_ours(self, song) -> bool:
+        return song.source == __identifier__ and not self._playlist.is_bad(song)
+
+    def _resolve(self, song):
+        try:
+            self._provider.prefetch_media(song)
+        except Exception as e:
+            logger.info(f'prefetching media of {song.identifier} failed: {str(e)}')
+        finally:
+            with self._lock:
+                self._inflight.discard(song.identifier)
+
+    def _on_changed(self, *_):
+        for song in self.upcoming():
+            with self._lock:
+                if song.identifier in self._inflight:
+                    continue
+                self._inflight.add(song.identifier)
+            try:
+                self._executor.submit(self._resolve, song)
+            except RuntimeError:
+                with self._lock:
+                    self._inflight.discard(song.identifier)
+                return
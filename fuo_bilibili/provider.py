@@ -1,23 +1,38 @@
-import math
-from typing import List, Optional
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 
 from feeluown.excs import NoUserLoggedIn
 from feeluown.library import AbstractProvider, ProviderV2, ProviderFlags as Pf, UserModel, VideoModel, \
     BriefPlaylistModel, BriefSongModel, LyricModel
-from feeluown.media import Quality, Media, MediaType
+from feeluown.media import Quality, Media, MediaType, VideoAudioManifest
 from feeluown.models import SearchType as FuoSearchType, ModelType
+from feeluown.utils.dispatch import Signal
 from feeluown.utils.reader import SequentialReader
 
 from fuo_bilibili import __identifier__, __alias__
 from fuo_bilibili.api import BilibiliApi, SearchRequest, SearchType as BilibiliSearchType, VideoInfoRequest, \
-    PlayUrlRequest, VideoQualityNum
-from fuo_bilibili.api.schema.enums import VideoFnval
+    VideoQualityNum
+from fuo_bilibili.api.audio_cache import AudioCache
+from fuo_bilibili.api.manifest import ManifestCache, StreamManifest, AUDIO_QUALITY_BANDWIDTH
+from fuo_bilibili.api.metadata import VideoMetadataStore, VideoMeta
+from fuo_bilibili.api.paging import Page, PageFetcher, PageRange, PagedReader, CursorStream, CursorFetcher
+from fuo_bilibili.api.cdn import CdnScorer
+from fuo_bilibili.api.stream_proxy import StreamProxy
+from fuo_bilibili.api.throughput import ThroughputEstimator
+from fuo_bilibili.api.scheduler import Priority, request_priority
 from fuo_bilibili.api.schema.requests import PasswordLoginRequest, SendSmsCodeRequest, SmsCodeLoginRequest, \
     FavoriteListRequest, FavoriteInfoRequest, FavoriteResourceRequest, CollectedFavoriteListRequest, \
     FavoriteSeasonResourceRequest, PaginatedRequest, HomeRecommendVideosRequest, HomeDynamicVideoRequest, \
-    UserInfoRequest, UserBestVideoRequest, UserVideoRequest, AudioFavoriteSongsRequest, AudioGetUrlRequest
+    UserInfoRequest, UserBestVideoRequest, UserVideoRequest, AudioFavoriteSongsRequest, AudioGetUrlRequest, \
+    HistoryCursorRequest
 from fuo_bilibili.api.schema.responses import RequestCaptchaResponse, RequestLoginKeyResponse, PasswordLoginResponse, \
-    SendSmsCodeResponse, SmsCodeLoginResponse, NavInfoResponse, PlayUrlResponse
+    SendSmsCodeResponse, SmsCodeLoginResponse, NavInfoResponse
+from fuo_bilibili.const import PLUGIN_VIDEO_METADATA_FILE, PLUGIN_AUDIO_CACHE_DIRECTORY, \
+    PLUGIN_AUDIO_CACHE_MAX_BYTES, PLUGIN_STREAM_PROXY
 from fuo_bilibili.model import BSearchModel, BSongModel, BPlaylistModel, BArtistModel
 
 SEARCH_TYPE_MAP = {
@@ -25,6 +40,15 @@ SEARCH_TYPE_MAP = {
     FuoSearchType.ar: BilibiliSearchType.BILI_USER,
     FuoSearchType.so: BilibiliSearchType.VIDEO,
 }
+# CDN 要求的请求头
+REFERER_HEADERS = {'Referer': 'https://www.bilibili.com/'}
+# 列表首屏条目数与预取页数，其余页按各接口允许的最大 ps 请求
+FIRST_PAGE_SIZE = 10
+READ_AHEAD_PAGES = 1
+# 本地视频详情的有效期（秒），超过后 song_get 重新请求；cid 不会变化，不受此限制
+VIDEO_METADATA_MAX_AGE = 7 * 24 * 3600
+# 同一歌单或UP主的后台刷新通知的最短间隔（秒）
+REFRESH_NOTIFY_INTERVAL = 30
 
 
 class BilibiliProvider(AbstractProvider, ProviderV2):
@@ -41,10 +65,64 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
 
     def __init__(self):
         super(BilibiliProvider, self).__init__()
-        self._api = BilibiliApi()
         self._user = None
-        self._video_quality_codes = dict()
-        self._video_cids = dict()
+        self._opened = False
+        # signal: identifier 歌单或UP主的数据已在后台刷新
+        self.library_refreshed = Signal()
+        # identifier -> 上次通知的时间
+        self._refresh_notified: Dict[str, float] = dict()
+        self._refresh_lock = threading.Lock()
+
+    def open(self):
+        """
+        创建接口、线程池、本地仓库与播放代理等资源，由插件 enable 调用；close 之后可以再次 open
+        """
+        if self._opened:
+            return
+        self._api = BilibiliApi()
+        try:
+            self._videos = VideoMetadataStore(PLUGIN_VIDEO_METADATA_FILE)
+        except sqlite3.Error as e:
+            print(f'video metadata persistence disabled: {str(e)}')
+            self._videos = VideoMetadataStore()
+        self._manifests = ManifestCache(self._api)
+        self._throughput = ThroughputEstimator()
+        # 音频缓存只由播放代理写入，不启用代理时不创建
+        self._audio_cache: Optional[AudioCache] = AudioCache(PLUGIN_AUDIO_CACHE_DIRECTORY,
+                                                             PLUGIN_AUDIO_CACHE_MAX_BYTES) \
+            if PLUGIN_STREAM_PROXY else None
+        self._cdn = CdnScorer(reference_bytes=StreamProxy.CHUNK_SIZE)
+        self._proxy: Optional[StreamProxy] = StreamProxy(cache=self._audio_cache, scorer=self._cdn,
+                                                         throughput=self._throughput) \
+            if PLUGIN_STREAM_PROXY else None
+        self._paging_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='bilibili-paging')
+        # (用户, 歌单) -> 动态与历史记录的游标流，重新打开时从上次的位置继续
+        self._streams: Dict[Tuple[str, str], CursorStream] = dict()
+        self._api.cache_refreshed.connect(self._on_api_refreshed, weak=False)
+        self._opened = True
+
+    def _on_api_refreshed(self, url, request, _):
+        if isinstance(request, PaginatedRequest) and request.pn != 1:
+            # 只在首页刷新时通知，后续页的新数据在读到时从缓存取得
+            return
+        identifier = None
+        if isinstance(request, FavoriteResourceRequest):
+            identifier = f'11_{request.media_id}'
+        elif isinstance(request, FavoriteSeasonResourceRequest):
+            identifier = f'21_{request.season_id}'
+        elif isinstance(request, UserVideoRequest):
+            identifier = str(request.mid)
+        elif request is None and url.endswith('/history/toview'):
+            identifier = 'LATER'
+        if identifier is None:
+            return
+        # 首屏页与整页等多个请求先后刷新时只通知一次，避免反复重新渲染
+        now = time.monotonic()
+        with self._refresh_lock:
+            if now - self._refresh_notified.get(identifier, float('-inf')) < REFRESH_NOTIFY_INTERVAL:
+                return
+            self._refresh_notified[identifier] = now
+        self.library_refreshed.emit(identifier)
 
     def _format_search_request(self, keyword, type_) -> SearchRequest:
         btype = SEARCH_TYPE_MAP.get(type_)
@@ -60,6 +138,9 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
     def request_key(self) -> RequestLoginKeyResponse:
         return self._api.request_login_key()
 
+    def prewarm(self):
+        self._api.prewarm()
+
     def cookie_check(self):
         return self._api.cookie_check()
 
@@ -68,6 +149,11 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
         self._user = self.user_info()
         return self._user
 
+    async def a_auth(self, _):
+        self._api.load_cookies()
+        self._user = await self.a_user_info()
+        return self._user
+
     def has_current_user(self) -> bool:
         return self._user is not None
 
@@ -75,15 +161,20 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
         if self._user is None:
             raise NoUserLoggedIn
 
-    def user_info(self) -> UserModel:
-        data: NavInfoResponse.NavInfoResponseData = self._api.nav_info().data
-        user = UserModel(
+    @staticmethod
+    def _create_user_model(data: NavInfoResponse.NavInfoResponseData) -> UserModel:
+        return UserModel(
             source=__identifier__,
             identifier=str(data.mid),
             name=data.uname,
             avatar_url=data.face
         )
-        return user
+
+    def user_info(self) -> UserModel:
+        return self._create_user_model(self._api.nav_info().data)
+
+    async def a_user_info(self) -> UserModel:
+        return self._create_user_model((await self._api.aio.nav_info()).data)
 
     def sms_send_code(self, request: SendSmsCodeRequest) -> SendSmsCodeResponse:
         return self._api.send_sms_code(request)
@@ -102,9 +193,34 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
     def song_get(self, identifier) -> Optional[BSongModel]:
         if identifier.startswith('audio_'):
             return None
+        meta = self._videos.get(identifier)
+        if meta is not None and meta.complete and time.time() - meta.updated_at < VIDEO_METADATA_MAX_AGE:
+            return BSongModel.create_meta_model(meta)
         response = self._api.video_get_info(VideoInfoRequest(bvid=identifier))
+        self._videos.put_info(response.data)
         return BSongModel.create_info_model(response)
 
+    def songs_get_many(self, identifiers: List[str], concurrency: int = 8) \
+            -> List[Union[BSongModel, Exception, None]]:
+        """
+        批量获取视频详情，结果与 identifiers 顺序一致
+
+        音频返回 None，获取失败的项为对应的异常
+        """
+        bvids = [i for i in identifiers if not i.startswith('audio_')]
+        responses = dict(zip(bvids, self._api.video_get_info_many(bvids, concurrency=concurrency)))
+        songs = []
+        metas = []
+        for identifier in identifiers:
+            response = responses.get(identifier)
+            if response is None or isinstance(response, Exception):
+                songs.append(response)
+                continue
+            metas.append(VideoMeta.from_info(response.data))
+            songs.append(BSongModel.create_info_model(response))
+        self._videos.upsert_many(metas)
+        return songs
+
     def song_get_lyric(self, song) -> Optional[LyricModel]:
         if not hasattr(song, 'lyric') or song.lyric is None or len(song.lyric) == 0:
             return None
@@ -115,22 +231,19 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
         )
 
     def _get_video_cid(self, bvid):
-        cid = self._video_cids.get(bvid)
+        cid = self._videos.get_cid(bvid)
         if cid is None:
             info = self._api.video_get_info(VideoInfoRequest(bvid=bvid))
-            self._video_cids[bvid] = info.data.cid
-            cid = info.data.cid
+            cid = self._videos.put_info(info.data).cid
         return cid
 
+    def _get_manifest(self, bvid) -> StreamManifest:
+        return self._manifests.get(bvid, self._get_video_cid(bvid))
+
     def video_list_quality(self, video) -> List[Quality.Video]:
-        response = self._api.video_get_url(PlayUrlRequest(
-            bvid=video.identifier,
-            cid=self._get_video_cid(video.identifier),
-            fnval=VideoFnval.FLV
-        ))
-        qualities = set([q.get_quality() for q in response.data.accept_quality])
-        self._video_quality_codes[video.identifier] = response.data.accept_quality
-        return list(qualities)
+        # feeluown 选择播放地址时先调用 list_quality，首次解析 cid 与播放清单发生在这里
+        with request_priority(Priority.PLAYBACK):
+            return self._get_manifest(video.identifier).video_qualities()
 
     def song_get_mv(self, song) -> Optional[VideoModel]:
         if song.identifier.startswith('audio_'):
@@ -145,85 +258,148 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
             cover=''
         )
 
+    def _cached_audio(self, key: tuple) -> Optional[Path]:
+        return self._audio_cache.get(key) if self._audio_cache is not None else None
+
+    def _stream_url(self, urls: List[str], cache_key: Optional[tuple] = None, bitrate: Optional[int] = None) -> str:
+        """
+        交给播放器的地址
+
+        候选地址按 CDN 节点评分排序。启用本地代理时返回代理地址，完整播放的音频由代理同时写入缓存；
+        否则返回评分最好的 CDN 地址，不缓存音频，避免与播放器同时下载占用带宽。
+        """
+        # 按已有评分排序，不等待探测；未知节点在后台探测，代理的后续分片会用上探测结果
+        urls = self._cdn.rank(urls)
+        if len(urls) > 1:
+            self._cdn.probe(urls, REFERER_HEADERS)
+        if self._proxy is not None:
+            try:
+                return self._proxy.register(urls, REFERER_HEADERS, cache_key, bitrate)
+            except OSError as e:
+                print(f'stream proxy disabled: {str(e)}')
+                self._proxy = None
+        return urls[0]
+
     def video_get_media(self, video, quality: Quality.Video) -> Optional[Media]:
-        max_quality_code = VideoQualityNum.get_max_from_quality(quality)
-        select_quality = max(filter(lambda c: c.value <= max_quality_code, self._video_quality_codes[video.identifier]),
-                             key=lambda c: c.value)
-        response = self._api.video_get_url(PlayUrlRequest(
-            bvid=video.identifier,
-            qn=VideoQualityNum(select_quality),
-            cid=self._get_video_cid(video.identifier),
-            fnval=VideoFnval.FLV
-        ))
-        return Media(response.data.durl[0].url, format='flv',
-                     http_headers={'Referer': 'https://www.bilibili.com/'})
+        with request_priority(Priority.PLAYBACK):
+            manifest = self._get_manifest(video.identifier)
+            # 按吞吐量估计选择码率，音频优先，剩余的预算给视频
+            budget = self._throughput.budget()
+            audio = manifest.select_audio(budget=budget)
+            if budget is not None and audio is not None:
+                budget = max(budget - audio.bandwidth, 0)
+            stream = manifest.select_video(VideoQualityNum.get_max_from_quality(quality), budget)
+            if stream is None:
+                if not manifest.durl:
+                    return None
+                durl = manifest.durl[0]
+                return Media(self._stream_url([durl.url, *(durl.backup_url or [])]), format='flv',
+                             http_headers=REFERER_HEADERS)
+            video_url = self._stream_url([stream.base_url, *(stream.backup_url or [])], bitrate=stream.bandwidth)
+            if audio is None:
+                return Media(video_url, type_=MediaType.video, http_headers=REFERER_HEADERS)
+            audio_url = self._stream_url([audio.base_url, *(audio.backup_url or [])], bitrate=audio.bandwidth)
+            return Media(VideoAudioManifest(video_url, audio_url), type_=MediaType.video, http_headers=REFERER_HEADERS)
+
+    def prefetch_media(self, song):
+        """
+        在后台解析歌曲的播放地址并探测 CDN 节点，结果缓存至签名过期
+        """
+        with request_priority(Priority.BACKGROUND):
+            if song.identifier.startswith('audio_'):
+                _, id_ = song.identifier.split('_')
+                urls = self._api.audio_get_url(AudioGetUrlRequest(sid=int(id_))).data.cdns
+            else:
+                audio = self._get_manifest(song.identifier).select_audio(budget=self._throughput.budget())
+                urls = [audio.base_url, *(audio.backup_url or [])] if audio is not None else []
+            # 提前探测候选节点，播放时可直接按评分选择
+            self._cdn.probe(urls, REFERER_HEADERS)
 
     def song_list_quality(self, song) -> List[Quality.Audio]:
         if song.identifier.startswith('audio_'):
             return [Quality.Audio.hq]
-        response = self._api.video_get_url(PlayUrlRequest(
-            bvid=song.identifier,
-            cid=self._get_video_cid(song.identifier),
-            fnval=VideoFnval.DASH
-        ))
-        song_bitrates = [a.bandwidth for a in response.data.dash.audio]
-        qualities = []
-        for b in song_bitrates:
-            if b <= 120000:
-                qualities.append(Quality.Audio.lq)
-                continue
-            if b <= 256000:
-                qualities.append(Quality.Audio.sq)
-                continue
-            qualities.append(Quality.Audio.hq)
-        print(list(set(qualities)))
-        return list(set(qualities))
+        with request_priority(Priority.PLAYBACK):
+            return self._get_manifest(song.identifier).audio_qualities()
 
     def song_get_media(self, song, quality: Quality.Audio) -> Optional[Media]:
-        if song.identifier.startswith('audio_'):
-            _, id_ = song.identifier.split('_')
-            resp = self._api.audio_get_url(AudioGetUrlRequest(sid=int(id_)))
-            if len(resp.data.cdns) < 1:
+        with request_priority(Priority.PLAYBACK):
+            if song.identifier.startswith('audio_'):
+                _, id_ = song.identifier.split('_')
+                key = ('audio', id_)
+                path = self._cached_audio(key)
+                if path is not None:
+                    return Media(str(path), type_=MediaType.audio, format='m4a')
+                resp = self._api.audio_get_url(AudioGetUrlRequest(sid=int(id_)))
+                if len(resp.data.cdns) < 1:
+                    return None
+                return Media(self._stream_url(resp.data.cdns, key), type_=MediaType.audio, format='m4a',
+                             http_headers=REFERER_HEADERS)
+            manifest = self._get_manifest(song.identifier)
+            if quality not in AUDIO_QUALITY_BANDWIDTH:
                 return None
-            return Media(resp.data.cdns[0], type_=MediaType.audio, format='m4a',
-                         http_headers={'Referer': 'https://www.bilibili.com/'})
-        response = self._api.video_get_url(PlayUrlRequest(
-            bvid=song.identifier,
-            cid=self._get_video_cid(song.identifier),
-            fnval=VideoFnval.DASH
-        ))
-        audios = sorted(response.data.dash.audio, key=lambda a: a.bandwidth, reverse=True)
-        selects: Optional[List[PlayUrlResponse.PlayUrlResponseData.Dash.DashItem]] = None
-        match quality:
-            case Quality.Audio.lq:
-                selects = [a.bandwidth <= 120000 for a in audios]
-            case Quality.Audio.sq:
-                selects = [a.bandwidth <= 256000 for a in audios]
-            case Quality.Audio.hq:
-                selects = audios
-        if selects is None or len(selects) == 0:
-            return None
-        return Media(selects[0].base_url, type_=MediaType.audio, format='m4s', bitrate=int(selects[0].bandwidth / 1000),
-                     http_headers={'Referer': 'https://www.bilibili.com/'})
+            # 已缓存的音频不受网速限制
+            for audio in manifest.audios:
+                if AUDIO_QUALITY_BANDWIDTH[quality] is None or audio.bandwidth <= AUDIO_QUALITY_BANDWIDTH[quality]:
+                    path = self._cached_audio((manifest.bvid, manifest.cid, audio.id))
+                    if path is not None:
+                        return Media(str(path), type_=MediaType.audio, format='m4s',
+                                     bitrate=int(audio.bandwidth / 1000))
+            audio = manifest.select_audio(AUDIO_QUALITY_BANDWIDTH[quality], self._throughput.budget())
+            if audio is None:
+                if manifest.audios or not manifest.durl:
+                    return None
+                # 没有 DASH 音频时播放整段视频中的音轨
+                durl = manifest.durl[0]
+                return Media(self._stream_url([durl.url, *(durl.backup_url or [])]), type_=MediaType.audio,
+                             format='flv', http_headers=REFERER_HEADERS)
+            key = (manifest.bvid, manifest.cid, audio.id)
+            return Media(self._stream_url([audio.base_url, *(audio.backup_url or [])], key, audio.bandwidth),
+                         type_=MediaType.audio, format='m4s', bitrate=int(audio.bandwidth / 1000),
+                         http_headers=REFERER_HEADERS)
 
     def user_playlists(self, identifier) -> List[BriefPlaylistModel]:
         resp = self._api.favorite_list(FavoriteListRequest(up_mid=int(identifier)))
         return BPlaylistModel.create_model_list(resp)
 
+    async def a_user_playlists(self, identifier) -> List[BriefPlaylistModel]:
+        resp = await self._api.aio.favorite_list(FavoriteListRequest(up_mid=int(identifier)))
+        return BPlaylistModel.create_model_list(resp)
+
     def fav_playlists(self, identifier) -> List[BriefPlaylistModel]:
-        resp = self._api.collected_favorite_list(CollectedFavoriteListRequest(up_mid=int(identifier), ps=40))
+        resp = self._api.collected_favorite_list(CollectedFavoriteListRequest(
+            up_mid=int(identifier), ps=self._api.max_page_size(f'{self._api.APIX_BASE}/v3/fav/folder/collected/list')))
+        return BPlaylistModel.create_model_list(resp)
+
+    async def a_fav_playlists(self, identifier) -> List[BriefPlaylistModel]:
+        resp = await self._api.aio.collected_favorite_list(CollectedFavoriteListRequest(
+            up_mid=int(identifier), ps=self._api.max_page_size(f'{self._api.APIX_BASE}/v3/fav/folder/collected/list')))
         return BPlaylistModel.create_model_list(resp)
 
     def audio_favorite_playlists(self) -> List[BriefPlaylistModel]:
         resp = self._api.audio_favorite_list(PaginatedRequest(ps=100, pn=1))
         return BPlaylistModel.create_audio_model_list(resp)
 
+    async def a_audio_favorite_playlists(self) -> List[BriefPlaylistModel]:
+        resp = await self._api.aio.audio_favorite_list(PaginatedRequest(ps=100, pn=1))
+        return BPlaylistModel.create_audio_model_list(resp)
+
     def audio_collected_playlists(self) -> List[BriefPlaylistModel]:
         resp = self._api.audio_collected_list(PaginatedRequest(ps=100, pn=1))
         return BPlaylistModel.create_audio_model_list(resp)
 
+    async def a_audio_collected_playlists(self) -> List[BriefPlaylistModel]:
+        resp = await self._api.aio.audio_collected_list(PaginatedRequest(ps=100, pn=1))
+        return BPlaylistModel.create_audio_model_list(resp)
+
     def home_recommend_videos(self, idx) -> List[BriefSongModel]:
         resp = self._api.home_recommend_videos(HomeRecommendVideosRequest(ps=10, fresh_idx=idx, fresh_idx_1h=idx))
+        self._videos.put_briefs(resp.data.item)
+        return [BSongModel.create_history_brief_model(v) for v in resp.data.item]
+
+    async def a_home_recommend_videos(self, idx) -> List[BriefSongModel]:
+        resp = await self._api.aio.home_recommend_videos(
+            HomeRecommendVideosRequest(ps=10, fresh_idx=idx, fresh_idx_1h=idx))
+        self._videos.put_briefs(resp.data.item)
         return [BSongModel.create_history_brief_model(v) for v in resp.data.item]
 
     def audio_playlist_get(self, identifier: str) -> Optional[BPlaylistModel]:
@@ -253,83 +429,116 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
             resp = self._api.favorite_info(FavoriteInfoRequest(media_id=int(id_)))
         return BPlaylistModel.create_info_model(resp)
 
+    def _cursor_stream(self, identifier: str, fetch: CursorFetcher) -> CursorStream:
+        namespace = self._api.namespace
+        # 登录用户变化后，其他用户的流不再使用
+        for key in [key for key in self._streams if key[0] != namespace]:
+            self._streams.pop(key).close()
+        stream = self._streams.get((namespace, identifier))
+        if stream is None or stream.expired:
+            if stream is not None:
+                stream.close()
+            stream = self._streams[(namespace, identifier)] = CursorStream(fetch, self._paging_executor)
+        return stream
+
+    def _random_reader(self, fetch: PageFetcher, url: str, count: Optional[int] = None) -> PagedReader:
+        """
+        页码翻页接口的随机访问读取器
+
+        :param url: 分页接口，决定最大每页条目数
+        :param count: 条目总数，未知时使用首屏页返回的总数
+        """
+        pages = PageRange(fetch, self._api.max_page_size(url), self._paging_executor, first_size=FIRST_PAGE_SIZE,
+                          read_ahead=READ_AHEAD_PAGES, count=count)
+        return PagedReader(pages)
+
     def audio_playlist_create_songs_rd(self, playlist):
         _, type_, id_ = playlist.identifier.split('_')
 
-        if int(type_) == 2 and playlist.count == 0:
-            # 兼容歌单信息不存在歌曲数量的问题
-            response = self._api.audio_collected_songs(AudioFavoriteSongsRequest(
-                sid=int(id_), pn=1, ps=0
-            ))
-            playlist.count = response.data.totalSize
-
-        def g():
-            page = 1
-            while page <= math.ceil(playlist.count / 20):
-                match int(type_):
-                    case 1:
-                        response = self._api.audio_favorite_songs(AudioFavoriteSongsRequest(
-                            sid=int(id_), pn=page
-                        ))
-                        for au in response.data.data:
-                            yield BSongModel.create_audio_model(au)
-                    case 2:
-                        response = self._api.audio_collected_songs(AudioFavoriteSongsRequest(
-                            sid=int(id_), pn=page
-                        ))
-                        for au in response.data.data:
-                            yield BSongModel.create_audio_model(au)
-                page += 1
-
-        return SequentialReader(g(), playlist.count)
+        if int(type_) == 1:
+            get_songs = self._api.audio_favorite_songs
+            url = f'{self._api.API_AUDIO_BASE}/music-service-c/web/song/of-coll'
+        else:
+            get_songs = self._api.audio_collected_songs
+            url = f'{self._api.API_AUDIO_BASE}/music-service-c/web/song/of-menu'
+
+        def fetch(page, size) -> Page:
+            response = get_songs(AudioFavoriteSongsRequest(sid=int(id_), pn=page, ps=size))
+            return Page([BSongModel.create_audio_model(au) for au in response.data.data or []],
+                        has_more=page < response.data.pageCount, total=response.data.totalSize)
+
+        # 兼容歌单信息不存在歌曲数量的问题，此时以首屏页返回的总数为准
+        count = playlist.count if playlist.count else None
+        reader = self._random_reader(fetch, url, count)
+        playlist.count = reader.count
+        return reader
 
     def playlist_create_songs_rd(self, playlist):
         if playlist.identifier.startswith('audio_'):
             return self.audio_playlist_create_songs_rd(playlist)
 
-        def g():
-            _dynamic_offset = None
-
-            if playlist.identifier == 'LATER':
+        if playlist.identifier == 'LATER':
+            def g():
                 response = self._api.history_later_videos()
-                song_list = BSongModel.create_history_brief_model_list(response)
-                for s in song_list:
-                    yield s
+                self._videos.put_briefs(response.data.list)
+                yield from BSongModel.create_history_brief_model_list(response)
+
+            return SequentialReader(g(), playlist.count)
+
+        if playlist.identifier == 'DYNAMIC':
+            def fetch(cursor) -> Page:
+                offset, page = cursor or (None, 1)
+                resp = self._api.home_dynamic_videos(HomeDynamicVideoRequest(offset=offset, page=page))
+                return Page([BSongModel.create_dynamic_brief_model(v) for v in resp.data.items],
+                            has_more=resp.data.has_more, cursor=(resp.data.offset, page + 1))
+
+            stream = self._cursor_stream(playlist.identifier, fetch)
+            return SequentialReader(iter(stream), stream.count)
+
+        if playlist.identifier == 'HISTORY':
+            history_page_size = self._api.max_page_size(f'{self._api.APIX_BASE}/web-interface/history/cursor')
+
+            def fetch(cursor) -> Page:
+                max_, view_at, business = cursor or (None, None, None)
+                resp = self._api.history_cursor(HistoryCursorRequest(
+                    max=max_, view_at=view_at, business=business,
+                    ps=FIRST_PAGE_SIZE if cursor is None else history_page_size))
+                items = [i for i in resp.data.list or [] if i.history.bvid]
+                self._videos.upsert_many(VideoMeta.from_history(i) for i in items)
+                c = resp.data.cursor
+                return Page([BSongModel.create_history_cursor_brief_model(i) for i in items],
+                            has_more=bool(resp.data.list) and c.max != 0, cursor=(c.max, c.view_at, c.business))
+
+            stream = self._cursor_stream(playlist.identifier, fetch)
+            return SequentialReader(iter(stream), stream.count)
+
+        fav_type, id_ = playlist.identifier.split('_')
+        is_season = int(fav_type) == 21
+
+        if is_season:
+            url = f'{self._api.APIX_BASE}/space/fav/season/list'
+        else:
+            url = f'{self._api.APIX_BASE}/v3/fav/resource/list'
+
+        def fetch(page, size) -> Page:
+            if is_season:
+                response = self._api.favorite_season_resource(FavoriteSeasonResourceRequest(
+                    season_id=int(id_),
+                    pn=page,
+                    ps=size,
+                ))
+                has_more = True
             else:
-                is_season = False
-                id_ = None
-                if playlist.identifier not in ['HISTORY', 'DYNAMIC']:
-                    fav_type, id_ = playlist.identifier.split('_')
-                    is_season = int(fav_type) == 21
-                page = 1
-                while page <= math.ceil(playlist.count / 20):
-                    if playlist.identifier == 'DYNAMIC':
-                        resp = self._api.home_dynamic_videos(HomeDynamicVideoRequest(offset=_dynamic_offset, page=page))
-                        _dynamic_offset = resp.data.offset
-                        for v in resp.data.items:
-                            yield BSongModel.create_dynamic_brief_model(v)
-                        if not resp.data.has_more:
-                            return
-                    elif playlist.identifier == 'HISTORY':
-                        response = self._api.history_videos(PaginatedRequest(pn=page))
-                        for m in response.data:
-                            yield BSongModel.create_history_brief_model(m)
-                    else:
-                        if is_season:
-                            response = self._api.favorite_season_resource(FavoriteSeasonResourceRequest(
-                                season_id=int(id_),
-                                pn=page,
-                            ))
-                        else:
-                            response = self._api.favorite_resource(FavoriteResourceRequest(
-                                media_id=int(id_),
-                                pn=page,
-                            ))
-                        for m in response.data.medias:
-                            yield BSongModel.create_brief_model(m)
-                    page += 1
-
-        return SequentialReader(g(), playlist.count)
+                response = self._api.favorite_resource(FavoriteResourceRequest(
+                    media_id=int(id_),
+                    pn=page,
+                    ps=size,
+                ))
+                has_more = response.data.has_more
+            self._videos.put_briefs(response.data.medias)
+            return Page([BSongModel.create_brief_model(m) for m in response.data.medias or []], has_more=has_more)
+
+        return self._random_reader(fetch, url, playlist.count)
 
     @staticmethod
     def special_playlists() -> List[BriefPlaylistModel]:
@@ -338,21 +547,17 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
     def artist_get(self, identifier) -> BArtistModel:
         resp = self._api.user_info(UserInfoRequest(mid=identifier))
         video_resp = self._api.user_best_videos(UserBestVideoRequest(vmid=identifier))
+        self._videos.put_briefs(video_resp.data)
         return BArtistModel.create_model(resp, video_resp)
 
     def artist_create_songs_rd(self, artist):
-        resp = self._api.user_videos(UserVideoRequest(mid=artist.identifier, ps=1, pn=1))
-        total = resp.data.page.count
+        def fetch(page, size) -> Page:
+            response = self._api.user_videos(UserVideoRequest(mid=artist.identifier, ps=size, pn=page))
+            return Page([BSongModel.create_user_brief_model(m) for m in response.data.list.vlist or []],
+                        total=response.data.page.count)
 
-        def g():
-            page = 1
-            while page <= math.ceil(total / 20):
-                response = self._api.user_videos(UserVideoRequest(mid=artist.identifier, ps=20, pn=page))
-                for m in response.data.list.vlist:
-                    yield BSongModel.create_user_brief_model(m)
-                page += 1
-
-        return SequentialReader(g(), total)
+        # 总数取自首屏页，不再单独请求
+        return self._random_reader(fetch, f'{self._api.APIX_BASE}/space/arc/search')
 
     @property
     def identifier(self):
@@ -363,6 +568,21 @@ class BilibiliProvider(AbstractProvider, ProviderV2):
         return __alias__
 
     def close(self):
+        """
+        释放 open 创建的资源，由插件 disable 调用
+        """
+        if not self._opened:
+            return
+        self._opened = False
+        self._user = None
+        self._manifests.close()
+        if self._proxy is not None:
+            self._proxy.close()
+        self._cdn.close()
+        for stream in self._streams.values():
+            stream.close()
+        self._paging_executor.shutdown(wait=False, cancel_futures=True)
+        self._videos.close()
         self._api.close()
 
     def __del__(self):
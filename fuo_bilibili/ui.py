@@ -250,11 +250,19 @@ class BUiManager:
         self._pvd_uimgr.add_item(self._pvd_item)
         self.login_dialog = BLoginDialog(None, self._provider)
         self._initial_pages()
+        self._provider.library_refreshed.connect(self._on_library_refreshed, weak=False, aioqueue=True)
 
     def _initial_pages(self):
         from fuo_bilibili.page_home import render as home_render
         self._app.browser.route('/providers/bilibili/home')(home_render)
 
+    def _on_library_refreshed(self, identifier: str):
+        # 当前页面展示的数据已在后台更新，原地重新渲染
+        page = self._app.browser.current_page
+        if page is None or not page.split('?', 1)[0].endswith(f'/{identifier}'):
+            return
+        self._app.browser.goto(page=page)
+
     async def load_user_content(self):
         left = self._app.ui.left_panel
         left.playlists_con.show()
@@ -270,25 +278,25 @@ class BUiManager:
         self._app.pl_uimgr.clear()
         # 视频区
         special_playlists = self._provider.special_playlists()
-        playlists = self._provider.user_playlists(self._user.identifier)
-        fav_playlists = self._provider.fav_playlists(self._user.identifier)
+        playlists = await self._provider.a_user_playlists(self._user.identifier)
+        fav_playlists = await self._provider.a_fav_playlists(self._user.identifier)
         self._app.pl_uimgr.add(special_playlists)
         self._app.pl_uimgr.add(playlists)
         self._app.pl_uimgr.add(fav_playlists, is_fav=True)
         # 音频区
-        audio_fav_list = self._provider.audio_favorite_playlists()
-        audio_coll_list = self._provider.audio_collected_playlists()
+        audio_fav_list = await self._provider.a_audio_favorite_playlists()
+        audio_coll_list = await self._provider.a_audio_collected_playlists()
         print(audio_fav_list, audio_coll_list)
         self._app.pl_uimgr.add(audio_fav_list)
         self._app.pl_uimgr.add(audio_coll_list, is_fav=True)
 
-    def _login(self):
-        self._user = self._provider.auth(None)
-        asyncio.ensure_future(self.load_user_content())
+    async def _login(self):
+        self._user = await self._provider.a_auth(None)
+        self._pvd_item.text = f'{__alias__}已登录：{self._user.name} UID:{self._user.identifier}'
+        await self.load_user_content()
 
     def _login_or_get_user(self):
         if self._provider.cookie_check():
-            self._login()
-            self._pvd_item.text = f'{__alias__}已登录：{self._user.name} UID:{self._user.identifier}'
+            asyncio.ensure_future(self._login())
             return
         self.login_dialog.show()
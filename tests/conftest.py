@@ -0,0 +1,21 @@
+import pytest
+
+
+class FakeTimer:
+    """
+    可手动推进的时钟，注入各组件的 timer 参数
+    """
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def timer() -> FakeTimer:
+    return FakeTimer()
@@ -0,0 +1,123 @@
+import threading
+import time
+from http.cookiejar import Cookie
+from pathlib import Path
+
+import pytest
+
+from fuo_bilibili.api import BilibiliApi
+from fuo_bilibili.api.cache import ApiCache
+from fuo_bilibili.api.exceptions import ApiCodeError
+from fuo_bilibili.api.schema.requests import VideoInfoRequest
+from fuo_bilibili.api.schema.responses import BaseResponse
+
+VIDEO_INFO = (Path(__file__).parent / 'fixtures' / 'video_info.json').read_text()
+
+URL = 'https://api.bilibili.com/x/web-interface/nav'
+
+
+class FakeResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+
+def login_as(api: BilibiliApi, mid: str):
+    api._cookie.set_cookie(Cookie(0, 'DedeUserID', mid, None, False, '.bilibili.com', True, True, '/', True,
+                                  False, None, False, None, None, {}))
+
+
+@pytest.fixture
+def api():
+    api = BilibiliApi(persistent_cache=False)
+    yield api
+    api.close()
+
+
+def test_memory_cache_is_isolated_per_user(api, monkeypatch):
+    calls = []
+
+    def request(url, param, **kwargs):
+        calls.append(url)
+        return FakeResponse(b'{"code": 0, "message": "0", "data": %d}' % len(calls))
+
+    monkeypatch.setattr(api, '_request', request)
+    login_as(api, '1')
+    assert api.get(URL, None, BaseResponse).data == 1
+    assert api.get(URL, None, BaseResponse).data == 1
+    login_as(api, '2')
+    assert api.get(URL, None, BaseResponse).data == 2
+    api._cookie.clear()
+    assert api.get(URL, None, BaseResponse).data == 3
+    assert len(calls) == 3
+
+
+def test_stale_hit_refreshes_once_in_background(api, monkeypatch, timer):
+    url = f'{api.APIX_BASE}/v2/history/toview'
+    api._cache = ApiCache(api._collect('CACHE_POLICIES'), timer=timer)
+    calls = []
+    release = threading.Event()
+    refreshed = []
+    done = threading.Event()
+
+    def request(url, param, **kwargs):
+        calls.append(url)
+        if len(calls) > 1:
+            assert release.wait(2)
+        return FakeResponse(b'{"code": 0, "message": "0", "data": %d}' % len(calls))
+
+    def on_refreshed(url, param, res):
+        refreshed.append(res.data)
+        done.set()
+
+    monkeypatch.setattr(api, '_request', request)
+    api.cache_refreshed.connect(on_refreshed, weak=False)
+    assert api.get(url, None, BaseResponse).data == 1
+    timer.advance(61)
+    # 过期后先返回旧数据，同一请求只安排一次后台刷新
+    assert api.get(url, None, BaseResponse).data == 1
+    assert api.get(url, None, BaseResponse).data == 1
+    release.set()
+    assert done.wait(2)
+    assert api.get(url, None, BaseResponse).data == 2
+    assert refreshed == [2]
+    assert len(calls) == 2
+
+
+def test_get_many_bounds_concurrency_and_keeps_order(api, monkeypatch):
+    url = f'{api.API_BASE}/view'
+    lock = threading.Lock()
+    active = []
+    peak = []
+    calls = []
+
+    def request(url, param, **kwargs):
+        with lock:
+            calls.append(param.bvid)
+            active.append(param.bvid)
+            peak.append(len(active))
+        # 靠前的请求更晚完成
+        time.sleep(0.01 * (10 - int(param.bvid)))
+        with lock:
+            active.remove(param.bvid)
+        return FakeResponse(b'{"code": 0, "message": "0", "data": "%s"}' % param.bvid.encode())
+
+    monkeypatch.setattr(api, '_request', request)
+    params = [VideoInfoRequest(bvid=str(i)) for i in range(10)]
+    results = api.get_many(url, params + params[:2], BaseResponse, concurrency=3)
+    assert [r.data for r in results] == [str(i) for i in range(10)] + ['0', '1']
+    assert max(peak) <= 3
+    assert sorted(calls) == [str(i) for i in range(10)]
+
+
+def test_video_get_info_many_isolates_failures(api, monkeypatch):
+    def request(url, param, **kwargs):
+        if param.bvid == 'BVbad':
+            # 失败的请求最先完成
+            return FakeResponse(b'{"code": -404, "message": "not found"}')
+        time.sleep(0.02)
+        return FakeResponse(VIDEO_INFO.replace('BV1xx411c7mD', param.bvid).encode())
+
+    monkeypatch.setattr(api, '_request', request)
+    results = api.video_get_info_many(['BV1', 'BVbad', 'BV2'], concurrency=3)
+    assert isinstance(results[1], ApiCodeError)
+    assert [results[0].data.bvid, results[2].data.bvid] == ['BV1', 'BV2']
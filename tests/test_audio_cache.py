@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from fuo_bilibili.api.audio_cache import AudioCache, PART_SUFFIX
+
+
+def write(cache: AudioCache, key: tuple, data: bytes):
+    f, part = cache.open_part(key)
+    f.write(data)
+    cache.commit(key, f, part)
+
+
+@pytest.fixture
+def cache(tmp_path, timer):
+    return AudioCache(tmp_path, 100, timer=timer)
+
+
+def test_commit_replaces_part_file(cache, tmp_path):
+    f, part = cache.open_part(('BV1', 1, 30280))
+    assert part.parent == tmp_path and part.name.endswith(PART_SUFFIX)
+    f.write(b'audio')
+    # 提交前不可读取
+    assert cache.get(('BV1', 1, 30280)) is None
+    cache.commit(('BV1', 1, 30280), f, part)
+    assert not part.exists()
+    path = cache.get(('BV1', 1, 30280))
+    assert path.read_bytes() == b'audio'
+    assert cache.size() == 5
+
+
+def test_discard_removes_part_file(cache, tmp_path):
+    f, part = cache.open_part(('BV1', 1, 30280))
+    AudioCache.discard(f, part)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_evicts_least_recently_used(cache, timer):
+    write(cache, ('a',), b'x' * 40)
+    timer.advance(1)
+    write(cache, ('b',), b'x' * 40)
+    timer.advance(1)
+    assert cache.get(('a',)) is not None
+    timer.advance(1)
+    write(cache, ('c',), b'x' * 40)
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) is not None
+    assert cache.get(('c',)) is not None
+    assert cache.size() == 80
+
+
+def test_oversized_file_is_not_kept(cache, tmp_path):
+    write(cache, ('a',), b'x' * 101)
+    assert cache.get(('a',)) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_reopen_removes_parts_and_keeps_access_order(tmp_path):
+    cache = AudioCache(tmp_path, 100)
+    write(cache, ('old',), b'x' * 40)
+    write(cache, ('new',), b'x' * 40)
+    # 访问时间记录在 mtime 上
+    os.utime(tmp_path / AudioCache.name_of(('old',)), (1, 1))
+    cache.open_part(('broken',))[0].close()
+    cache = AudioCache(tmp_path, 60)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [AudioCache.name_of(('new',))]
+    assert cache.get(('new',)) is not None
+    assert cache.size() == 40
+
+
+def test_disabled_cache(tmp_path):
+    cache = AudioCache(tmp_path / 'audio', 0)
+    assert not cache.enabled
+    assert cache.get(('a',)) is None
+    assert not (tmp_path / 'audio').exists()
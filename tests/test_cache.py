@@ -0,0 +1,60 @@
+from fuo_bilibili.api.audio import audio_url_expires
+from fuo_bilibili.api.cache import ApiCache, CachePolicy, CacheState, SIGNED_URL_EXPIRE_MARGIN, signed_url_expires
+from fuo_bilibili.api.schema.responses import AudioGetUrlResponse
+
+
+def test_entry_expires_after_ttl(timer):
+    cache = ApiCache({'a': CachePolicy(ttl=10)}, timer=timer)
+    cache.store('a', 'key', 'value')
+    timer.advance(9.9)
+    assert cache.lookup('a', 'key') == (CacheState.FRESH, 'value')
+    timer.advance(0.1)
+    assert cache.lookup('a', 'key') == (CacheState.MISS, None)
+    assert cache.stats()['a'].expirations == 1
+
+
+def test_stale_while_revalidate_keeps_expired_entry(timer):
+    cache = ApiCache({'a': CachePolicy(ttl=10, stale_while_revalidate=True)}, timer=timer)
+    cache.store('a', 'key', 'value')
+    timer.advance(60)
+    assert cache.lookup('a', 'key') == (CacheState.STALE, 'value')
+
+
+def test_uncacheable_endpoint_is_never_stored():
+    cache = ApiCache({'a': CachePolicy(cacheable=False)})
+    cache.store('a', 'key', 'value')
+    assert cache.lookup('a', 'key') == (CacheState.MISS, None)
+
+
+def test_expires_overrides_ttl(timer):
+    cache = ApiCache({'a': CachePolicy(ttl=600, expires=lambda value: value)}, timer=timer)
+    cache.store('a', 'key', timer.now + 5)
+    timer.advance(5)
+    assert cache.lookup('a', 'key')[0] is CacheState.MISS
+
+
+def test_already_expired_value_is_not_stored(timer):
+    cache = ApiCache({'a': CachePolicy(expires=lambda value: value)}, timer=timer)
+    cache.store('a', 'key', timer.now - 1)
+    assert cache.lookup('a', 'key')[0] is CacheState.MISS
+
+
+def test_lru_eviction_is_counted():
+    cache = ApiCache({'a': CachePolicy(maxsize=2)})
+    for key in range(3):
+        cache.store('a', key, key)
+    assert cache.lookup('a', 0)[0] is CacheState.MISS
+    assert cache.stats()['a'].evictions == 1
+
+
+def test_signed_url_expires_applies_margin():
+    url = 'https://upos-sz-mirrorcos.bilivideo.com/a.m4s?deadline=1700000000&gen=playurlv2'
+    assert signed_url_expires(url) == 1700000000 - SIGNED_URL_EXPIRE_MARGIN
+    assert signed_url_expires('https://example.com/a.m4s') is None
+    assert signed_url_expires(None) is None
+
+
+def test_audio_url_expires_applies_margin():
+    response = AudioGetUrlResponse(code=0, message='0', data=dict(
+        cdns=['https://upos-sz-mirrorks3.bilivideo.com/a.m4a?deadline=1700000000'], sid=1, size=1, type=1))
+    assert audio_url_expires(response) == 1700000000 - SIGNED_URL_EXPIRE_MARGIN
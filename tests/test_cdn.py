@@ -0,0 +1,67 @@
+import pytest
+
+from fuo_bilibili.api.cdn import CdnScorer
+
+A = 'https://a.bilivideo.com/x.m4s'
+B = 'https://b.bilivideo.com/x.m4s'
+C = 'https://c.bilivideo.com/x.m4s'
+
+
+@pytest.fixture
+def scorer(timer):
+    scorer = CdnScorer(alpha=0.5, half_life=100, max_age=1000, reference_bytes=1000, penalty=10, timer=timer)
+    yield scorer
+    scorer.close()
+
+
+def test_estimate_uses_total_elapsed(scorer):
+    # 0.1 秒收到响应头，再用 0.1 秒读完 1000 字节：吞吐量按 0.2 秒计为 5000 字节/秒
+    scorer.record(A, 0.1, 0.2, 1000)
+    assert scorer.estimate(A) == pytest.approx(0.1 + 1000 / 5000)
+
+
+def test_small_probe_does_not_inflate_throughput(scorer):
+    # 响应体在收到响应头后立刻读完
+    scorer.record(A, 0.1, 0.1, 1000)
+    assert scorer.estimate(A) == pytest.approx(0.2)
+
+
+def test_new_sample_weight_grows_with_age(scorer, timer):
+    scorer.record(A, 0.2, 0.2, 1000)
+    scorer.record(A, 0.1, 0.1, 1000)
+    # 间隔为 0 时权重为 alpha
+    assert scorer.estimate(A) == pytest.approx(0.15 + 1000 / 7500)
+    timer.advance(100)
+    scorer.record(A, 0.05, 0.05, 1000)
+    # 间隔一个半衰期时权重为 1 - (1 - alpha) / 2
+    weight = 0.75
+    latency = 0.15 + weight * (0.05 - 0.15)
+    throughput = 7500 + weight * (20000 - 7500)
+    assert scorer.estimate(A) == pytest.approx(latency + 1000 / throughput)
+
+
+def test_stale_score_is_unknown(scorer, timer):
+    scorer.record(A, 0.1, 0.2, 1000)
+    timer.advance(1001)
+    assert scorer.estimate(A) is None
+
+
+def test_rank_orders_known_unknown_and_demoted(scorer):
+    scorer.record(A, 0.3, 0.6, 1000)
+    scorer.record(B, 0.1, 0.2, 1000)
+    scorer.fail(C)
+    unknown = 'https://d.bilivideo.com/x.m4s'
+    assert scorer.rank([C, unknown, A, B]) == [B, A, unknown, C]
+
+
+def test_demotion_doubles_and_resets_on_success(scorer, timer):
+    scorer.fail(A)
+    timer.advance(9.9)
+    assert scorer.demoted(A)
+    timer.advance(0.1)
+    assert not scorer.demoted(A)
+    scorer.fail(A)
+    timer.advance(19.9)
+    assert scorer.demoted(A)
+    scorer.record(A, 0.1, 0.2, 1000)
+    assert not scorer.demoted(A)
@@ -0,0 +1,73 @@
+import pytest
+import requests
+
+from fuo_bilibili.api.circuit import BreakerConfig, CircuitBreaker, CircuitBreakers, CircuitState
+from fuo_bilibili.api.exceptions import ApiCodeError, CircuitOpenError, HttpStatusError
+
+
+def test_opens_after_consecutive_failures(timer):
+    breaker = CircuitBreaker(BreakerConfig(failure_threshold=3, recovery_timeout=30), timer)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    breaker.record_success()
+    # 成功会清零连续失败数
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+
+
+def test_half_open_admits_limited_probes(timer):
+    breaker = CircuitBreaker(BreakerConfig(failure_threshold=1, recovery_timeout=10, half_open_probes=1), timer)
+    breaker.allow()
+    breaker.record_failure()
+    timer.advance(10)
+    assert breaker.allow()
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(timer):
+    breaker = CircuitBreaker(BreakerConfig(failure_threshold=1, recovery_timeout=10), timer)
+    breaker.allow()
+    breaker.record_failure()
+    timer.advance(10)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.retry_after() == 10
+    assert breaker.opened == 2
+
+
+def test_released_probe_returns_its_slot(timer):
+    breaker = CircuitBreaker(BreakerConfig(failure_threshold=1, recovery_timeout=10), timer)
+    breaker.allow()
+    breaker.record_failure()
+    timer.advance(10)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_guard_counts_only_outages():
+    url = 'https://api.bilibili.com/x/web-interface/view'
+    breakers = CircuitBreakers({url: BreakerConfig(failure_threshold=2)})
+    # 接口错误码说明服务可达，不计入熔断
+    for _ in range(3):
+        with pytest.raises(ApiCodeError):
+            with breakers.guard(url):
+                raise ApiCodeError(-404, 'not found')
+    for error in (HttpStatusError(502), requests.ConnectionError()):
+        with pytest.raises(type(error)):
+            with breakers.guard(url):
+                raise error
+    with pytest.raises(CircuitOpenError):
+        breakers.check(url)
+    assert breakers.stats()[url]['state'] == 'OPEN'
+    assert breakers.stats()['api.bilibili.com']['state'] == 'CLOSED'
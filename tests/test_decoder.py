@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from fuo_bilibili.api.decoder import ResponseDecoder
+from fuo_bilibili.api.schema import responses
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+CASES = [
+    ('video_info.json', responses.VideoInfoResponse),
+    ('play_url.json', responses.PlayUrlResponse),
+    ('favorite_resource.json', responses.FavoriteResourceResponse),
+    ('audio_favorite_songs.json', responses.AudioFavoriteSongsResponse),
+    ('history_cursor.json', responses.HistoryCursorResponse),
+]
+
+
+@pytest.mark.parametrize('name, clazz', CASES)
+def test_fast_decode_matches_parse_raw(name, clazz):
+    content = (FIXTURES / name).read_bytes()
+    expected = clazz.parse_raw(content.decode())
+    for decoder in (ResponseDecoder(), ResponseDecoder(strict=True)):
+        assert decoder.decode(content, clazz).dict() == expected.dict()
+
+
+def test_fast_decode_keeps_model_types():
+    content = (FIXTURES / 'play_url.json').read_bytes()
+    response = ResponseDecoder().decode(content, responses.PlayUrlResponse)
+    audio = response.data.dash.audio[0]
+    assert isinstance(audio, responses.PlayUrlResponse.PlayUrlResponseData.Dash.DashItem)
+    assert audio.codecid is responses.CodecId.AUDIO
+    assert response.data.dash.video[1].backup_url is None
+
+
+def test_invalid_payload_falls_back_to_validation():
+    body = json.loads((FIXTURES / 'video_info.json').read_bytes())
+    body['data']['aid'] = 'not a number'
+    with pytest.raises(ValidationError):
+        ResponseDecoder().decode(json.dumps(body).encode(), responses.VideoInfoResponse)
@@ -0,0 +1,94 @@
+import zlib
+
+import pytest
+
+from fuo_bilibili.api import BilibiliApi
+from fuo_bilibili.api.disk_cache import DiskCache
+from fuo_bilibili.api.schema.responses import BaseResponse
+from test_api import FakeResponse, login_as
+
+
+@pytest.fixture
+def cache(tmp_path, timer):
+    cache = DiskCache(tmp_path / 'cache.db', 1024 * 1024, timer=timer)
+    yield cache
+    cache.close()
+
+
+def test_entry_expires_after_ttl(cache, timer):
+    cache.store('1', 'key', 'endpoint', b'body', ttl=10)
+    timer.advance(9.9)
+    assert cache.load('1', 'key') == (b'body', True)
+    timer.advance(0.1)
+    # 过期后仍可读取，作为刷新前的旧数据
+    assert cache.load('1', 'key') == (b'body', False)
+
+
+def test_entries_are_namespaced(cache):
+    cache.store('1', 'key', 'endpoint', b'one', ttl=10)
+    cache.store('2', 'key', 'endpoint', b'two', ttl=10)
+    assert cache.load('1', 'key')[0] == b'one'
+    assert cache.load('2', 'key')[0] == b'two'
+    cache.clear('1')
+    assert cache.load('1', 'key') is None
+    assert cache.load('2', 'key')[0] == b'two'
+
+
+def test_evicts_least_recently_accessed(tmp_path, timer):
+    body = bytes(range(256)) * 4  # 几乎无法压缩
+    size = len(zlib.compress(body))
+    cache = DiskCache(tmp_path / 'cache.db', size * 2, timer=timer)
+    try:
+        for key in ('a', 'b'):
+            cache.store('1', key, 'endpoint', body, ttl=10)
+            timer.advance(1)
+        cache.load('1', 'a')
+        timer.advance(1)
+        cache.store('1', 'c', 'endpoint', body, ttl=10)
+        assert cache.load('1', 'b') is None
+        assert cache.load('1', 'a') is not None
+        assert cache.load('1', 'c') is not None
+    finally:
+        cache.close()
+
+
+def test_total_survives_reopen(tmp_path):
+    cache = DiskCache(tmp_path / 'cache.db', 100)
+    cache.store('1', 'key', 'endpoint', b'x' * 1000, ttl=10)
+    cache.close()
+    cache = DiskCache(tmp_path / 'cache.db', 100)
+    cache.store('1', 'key', 'endpoint', b'y' * 1000, ttl=10)
+    assert cache.load('1', 'key')[0] == b'y' * 1000
+    cache.close()
+
+
+def test_closed_database_is_treated_as_miss(cache):
+    cache.close()
+    cache.store('1', 'key', 'endpoint', b'body', ttl=10)
+    assert cache.load('1', 'key') is None
+
+
+def test_api_persists_per_user(tmp_path, monkeypatch):
+    api = BilibiliApi(persistent_cache=False)
+    api._disk_cache = DiskCache(tmp_path / 'cache.db', 1024 * 1024)
+    url = f'{api.API_BASE}/nav'
+    calls = []
+
+    def request(url, param, **kwargs):
+        calls.append(url)
+        return FakeResponse(b'{"code": 0, "message": "0", "data": %d}' % len(calls))
+
+    monkeypatch.setattr(api, '_request', request)
+    try:
+        login_as(api, '1')
+        assert api.get(url, None, BaseResponse).data == 1
+        login_as(api, '2')
+        api._cache.clear()
+        assert api.get(url, None, BaseResponse).data == 2
+        # 清空内存缓存后，各用户从磁盘读到自己的响应
+        api._cache.clear()
+        login_as(api, '1')
+        assert api.get(url, None, BaseResponse).data == 1
+        assert len(calls) == 2
+    finally:
+        api.close()
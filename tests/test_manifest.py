@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from fuo_bilibili.api.cache import SIGNED_URL_EXPIRE_MARGIN
+from fuo_bilibili.api.manifest import ManifestCache
+from fuo_bilibili.api.scheduler import Priority, current_priority
+from fuo_bilibili.api.schema.views import PlayUrlView
+
+from test_paging import InlineExecutor, PendingExecutor
+
+PLAY_URL = (Path(__file__).parent / 'fixtures' / 'play_url.json').read_text()
+DEADLINE = 1665010000
+
+
+class FakeApi:
+    """
+    返回的播放地址在 deadline 之后过期，每次请求的 deadline 依次后延
+    """
+
+    def __init__(self, deadline: int):
+        self.deadline = deadline
+        self.calls = []
+
+    def video_get_url(self, request):
+        self.calls.append(((request.bvid, request.cid), current_priority()))
+        deadline = self.deadline + 1000 * (len(self.calls) - 1)
+        return PlayUrlView.parse_raw(PLAY_URL.replace(f'deadline={DEADLINE}', f'deadline={deadline}'))
+
+
+def make_cache(timer, deadline: int = 2000):
+    api = FakeApi(deadline)
+    cache = ManifestCache(api, timer=timer)
+    cache._executor = InlineExecutor()
+    return api, cache
+
+
+def test_manifest_shared_by_bvid_and_cid(timer):
+    api, cache = make_cache(timer)
+    manifest = cache.get('BV1', 1)
+    assert cache.get('BV1', 1) is manifest
+    assert cache.get('BV1', 2) is not manifest
+    assert [key for key, _ in api.calls] == [('BV1', 1), ('BV1', 2)]
+    assert manifest.audios and manifest.videos
+
+
+def test_expiry_follows_signed_url_deadline(timer):
+    api, cache = make_cache(timer)
+    manifest = cache.get('BV1', 1)
+    assert manifest.expires_at == 2000 - SIGNED_URL_EXPIRE_MARGIN
+    timer.advance(manifest.expires_at - timer())
+    renewed = cache.get('BV1', 1)
+    assert renewed is not manifest
+    assert renewed.expires_at == 3000 - SIGNED_URL_EXPIRE_MARGIN
+    assert len(api.calls) == 2
+
+
+def test_refreshes_in_background_before_expiry(timer):
+    api, cache = make_cache(timer)
+    manifest = cache.get('BV1', 1)
+    timer.advance(manifest.expires_at - ManifestCache.REFRESH_AHEAD - 1 - timer())
+    assert cache.get('BV1', 1) is manifest
+    assert len(api.calls) == 1
+    timer.advance(1)
+    # 刷新期间仍返回旧清单，刷新以后台优先级请求
+    assert cache.get('BV1', 1) is manifest
+    assert api.calls[1] == (('BV1', 1), Priority.BACKGROUND)
+    assert cache.get('BV1', 1).expires_at == 3000 - SIGNED_URL_EXPIRE_MARGIN
+    assert len(api.calls) == 2
+
+
+def test_concurrent_refresh_requested_once(timer):
+    api, cache = make_cache(timer)
+    cache._executor = executor = PendingExecutor()
+    manifest = cache.get('BV1', 1)
+    timer.advance(manifest.expires_at - ManifestCache.REFRESH_AHEAD - timer())
+    cache.get('BV1', 1)
+    cache.get('BV1', 1)
+    assert len(executor.futures) == 1
+    assert len(api.calls) == 1
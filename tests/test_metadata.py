@@ -0,0 +1,51 @@
+import pytest
+
+from fuo_bilibili.api.metadata import VideoMeta, VideoMetadataStore, VideoPage
+
+
+@pytest.fixture
+def store(timer):
+    store = VideoMetadataStore(timer=timer)
+    yield store
+    store.close()
+
+
+def complete(**kwargs) -> VideoMeta:
+    fields = dict(bvid='BV1', aid=1, cid=11, title='详情标题', cover='info.jpg', duration=100, owner_mid=7,
+                  owner_name='UP', pages=[VideoPage(page=1, cid=11, part='P1', duration=100)], complete=True)
+    return VideoMeta(**{**fields, **kwargs})
+
+
+def test_brief_fills_missing_fields(store):
+    store.put(VideoMeta(bvid='BV1', title='列表标题'))
+    store.put(VideoMeta(bvid='BV1', cid=11, cover='brief.jpg'))
+    meta = store.get('BV1')
+    assert (meta.title, meta.cid, meta.cover, meta.complete) == ('列表标题', 11, 'brief.jpg', False)
+
+
+def test_brief_does_not_overwrite_complete_row(store, timer):
+    store.put(complete(cover=None))
+    timer.advance(60)
+    store.put(VideoMeta(bvid='BV1', title='列表标题', cover='brief.jpg', duration=99))
+    meta = store.get('BV1')
+    assert (meta.title, meta.duration, meta.complete) == ('详情标题', 100, True)
+    assert meta.cover == 'brief.jpg'
+    assert meta.updated_at == timer.now - 60
+    assert [p.cid for p in meta.pages] == [11]
+
+
+def test_complete_row_overwrites_and_refreshes(store, timer):
+    store.put(complete())
+    timer.advance(60)
+    store.put(complete(title='新标题', pages=[]))
+    meta = store.get('BV1')
+    assert (meta.title, meta.updated_at) == ('新标题', timer.now)
+    assert [p.cid for p in meta.pages] == [11]
+
+
+def test_brief_refreshes_incomplete_row(store, timer):
+    store.put(VideoMeta(bvid='BV1', title='旧标题'))
+    timer.advance(60)
+    store.upsert_many([VideoMeta(bvid='BV1', title='新标题'), VideoMeta(bvid='BV2', title='另一个')])
+    assert (store.get('BV1').title, store.get('BV1').updated_at) == ('新标题', timer.now)
+    assert store.get('BV2').title == '另一个'
@@ -0,0 +1,184 @@
+import itertools
+from concurrent.futures import Executor, Future
+
+import pytest
+
+from fuo_bilibili.api.paging import CursorStream, Page, PagedReader, PageRange
+
+
+class InlineExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class Endpoint:
+    """
+    total 条连续整数的分页接口，actual 为实际能返回的条目数
+    """
+
+    def __init__(self, total: int, actual: int = None):
+        self.total = total
+        self.actual = total if actual is None else actual
+        self.calls = []
+
+    def __call__(self, page_no: int, size: int) -> Page:
+        self.calls.append((page_no, size))
+        items = list(range((page_no - 1) * size, min(page_no * size, self.actual)))
+        return Page(items, has_more=page_no * size < self.actual, total=self.total)
+
+
+def page_range(endpoint, **kwargs) -> PageRange:
+    kwargs = {'first_size': 10, 'read_ahead': 0, **kwargs}
+    return PageRange(endpoint, 50, InlineExecutor(), **kwargs)
+
+
+def test_read_first_screen_uses_first_page():
+    endpoint = Endpoint(200)
+    pages = page_range(endpoint)
+    assert pages.read(3, 8) == [3, 4, 5, 6, 7]
+    assert endpoint.calls == [(1, 10)]
+
+
+def test_read_slices_across_max_pages():
+    endpoint = Endpoint(200)
+    pages = page_range(endpoint)
+    assert pages.read(45, 105) == list(range(45, 105))
+    assert sorted(endpoint.calls) == [(1, 50), (2, 50), (3, 50)]
+    assert pages.read(60, 70) == list(range(60, 70))
+    assert len(endpoint.calls) == 3
+
+
+def test_read_prefetches_following_page():
+    endpoint = Endpoint(200)
+    pages = page_range(endpoint, read_ahead=1)
+    pages.read(50, 100)
+    assert endpoint.calls == [(3, 50), (2, 50)]
+    pages.read(100, 150)
+    assert endpoint.calls[2:] == [(4, 50)]
+
+
+def test_read_past_actual_items_is_short():
+    pages = page_range(Endpoint(200, actual=120))
+    assert pages.read(100, 150) == list(range(100, 120))
+
+
+def test_reader_fetches_only_covering_page():
+    endpoint = Endpoint(1000)
+    reader = PagedReader(page_range(endpoint))
+    assert reader.count == 1000
+    assert reader.read(905) == 905
+    assert endpoint.calls == [(1, 10), (19, 50)]
+
+
+def test_reader_iterates_first_screen_then_max_pages():
+    endpoint = Endpoint(120)
+    reader = PagedReader(page_range(endpoint))
+    assert list(reader) == list(range(120))
+    assert endpoint.calls == [(1, 10), (1, 50), (2, 50), (3, 50)]
+
+
+def test_reader_clamps_count_on_short_page():
+    reader = PagedReader(page_range(Endpoint(200, actual=120)))
+    assert reader.readall() == list(range(120))
+    assert reader.count == 120
+    with pytest.raises(IndexError):
+        reader.read(150)
+
+
+def test_reader_iteration_stops_on_short_page():
+    reader = PagedReader(page_range(Endpoint(200, actual=73)))
+    assert list(reader) == list(range(73))
+    assert reader.count == 73
+
+
+def test_first_page_without_more_sets_count():
+    reader = PagedReader(page_range(Endpoint(30, actual=4)))
+    assert reader.count == 4
+    assert list(reader) == [0, 1, 2, 3]
+
+
+class PendingExecutor(Executor):
+    """
+    只记录提交的任务，不执行
+    """
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+class Feed:
+    """
+    游标翻页接口，每页 2 条，游标为下一页第一条的序号
+    """
+
+    def __init__(self, total: int, empty_tail: bool = False):
+        self.total = total
+        self.empty_tail = empty_tail
+        self.cursors = []
+
+    def __call__(self, cursor) -> Page:
+        self.cursors.append(cursor)
+        start = cursor or 0
+        items = list(range(start, min(start + 2, self.total)))
+        has_more = self.empty_tail or start + 2 < self.total
+        return Page(items, has_more=has_more, cursor=start + 2)
+
+
+def test_cursor_stream_follows_cursor_until_no_more():
+    feed = Feed(5)
+    stream = CursorStream(feed, InlineExecutor(), read_ahead=False)
+    assert list(stream) == [0, 1, 2, 3, 4]
+    assert feed.cursors == [None, 2, 4]
+    assert stream.count == 5
+
+
+def test_cursor_stream_ends_on_empty_page():
+    feed = Feed(3, empty_tail=True)
+    stream = CursorStream(feed, InlineExecutor(), read_ahead=False)
+    assert list(stream) == [0, 1, 2]
+    assert feed.cursors == [None, 2, 4]
+
+
+def test_cursor_stream_resumes_from_cursor():
+    feed = Feed(6)
+    stream = CursorStream(feed, InlineExecutor(), read_ahead=False)
+    assert list(itertools.islice(stream, 3)) == [0, 1, 2]
+    assert stream.count is None
+    # 重新打开时先返回已读取的条目，再从游标继续
+    assert list(stream) == [0, 1, 2, 3, 4, 5]
+    assert feed.cursors == [None, 2, 4]
+
+
+def test_cursor_stream_uses_prefetched_page():
+    feed = Feed(4)
+    stream = CursorStream(feed, InlineExecutor())
+    assert list(stream) == [0, 1, 2, 3]
+    assert feed.cursors == [None, 2]
+
+
+def test_cursor_stream_expires(timer):
+    stream = CursorStream(Feed(2), InlineExecutor(), ttl=600, timer=timer)
+    timer.advance(599)
+    assert not stream.expired
+    timer.advance(1)
+    assert stream.expired
+
+
+def test_cursor_stream_close_cancels_prefetch():
+    executor = PendingExecutor()
+    feed = Feed(6)
+    stream = CursorStream(feed, executor)
+    assert next(iter(stream)) == 0
+    assert len(executor.futures) == 1
+    stream.close()
+    assert executor.futures[0].cancelled()
+    # 预取被取消后，读到下一页时直接请求
+    assert list(itertools.islice(stream, 4)) == [0, 1, 2, 3]
+    assert feed.cursors == [None, 2]
@@ -0,0 +1,84 @@
+from enum import IntEnum
+from types import SimpleNamespace
+
+import pytest
+
+from fuo_bilibili import __identifier__
+from fuo_bilibili.prefetch import MediaPrefetcher
+
+from test_paging import InlineExecutor
+
+
+class PlaybackMode(IntEnum):
+    """
+    与 feeluown.player.PlaybackMode 相同
+    """
+    one_loop = 0
+    sequential = 1
+    loop = 2
+    random = 3
+
+
+def song(identifier: str, source: str = __identifier__) -> SimpleNamespace:
+    return SimpleNamespace(identifier=identifier, source=source)
+
+
+class FakePlaylist:
+    def __init__(self, songs, current, mode: PlaybackMode, bad=()):
+        self.songs = songs
+        self.current_song = current
+        self.playback_mode = mode
+        self.bad = bad
+
+    def list(self):
+        return self.songs
+
+    def is_bad(self, song):
+        return song in self.bad
+
+
+class FakeProvider:
+    def __init__(self):
+        self.prefetched = []
+
+    def prefetch_media(self, song):
+        self.prefetched.append(song.identifier)
+
+
+SONGS = [song('BV1'), song('BV2'), song('local', source='local'), song('BV3'), song('BV4')]
+
+
+@pytest.mark.parametrize('mode, current, expected', [
+    (PlaybackMode.sequential, 'BV2', ['BV3', 'BV4']),
+    (PlaybackMode.sequential, 'BV4', []),
+    (PlaybackMode.loop, 'BV4', ['BV1', 'BV2']),
+    (PlaybackMode.loop, 'BV3', ['BV4', 'BV1']),
+    # 单曲循环只会重播当前歌曲
+    (PlaybackMode.one_loop, 'BV2', ['BV2']),
+    (PlaybackMode.one_loop, 'local', []),
+    # 随机播放无法预测下一首
+    (PlaybackMode.random, 'BV2', []),
+])
+def test_upcoming_follows_playback_mode(mode, current, expected):
+    current = next(s for s in SONGS if s.identifier == current)
+    prefetcher = MediaPrefetcher(FakeProvider(), FakePlaylist(SONGS, current, mode))
+    assert [s.identifier for s in prefetcher.upcoming()] == expected
+
+
+def test_upcoming_skips_bad_songs_and_starts_from_first_song():
+    playlist = FakePlaylist(SONGS, None, PlaybackMode.sequential, bad=[SONGS[0]])
+    prefetcher = MediaPrefetcher(FakeProvider(), playlist, depth=3)
+    assert [s.identifier for s in prefetcher.upcoming()] == ['BV2', 'BV3', 'BV4']
+
+
+def test_changed_prefetches_upcoming_songs():
+    provider = FakeProvider()
+    playlist = FakePlaylist(SONGS, SONGS[0], PlaybackMode.sequential)
+    prefetcher = MediaPrefetcher(provider, playlist)
+    prefetcher._executor = InlineExecutor()
+    prefetcher._on_changed()
+    assert provider.prefetched == ['BV2', 'BV3']
+    playlist.playback_mode = PlaybackMode.random
+    prefetcher._on_changed(PlaybackMode.random)
+    assert provider.prefetched == ['BV2', 'BV3']
+    assert prefetcher._inflight == set()
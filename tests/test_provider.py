@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from types import SimpleNamespace
+
+from feeluown.media import Quality
+
+from fuo_bilibili.api.metadata import VideoMetadataStore
+from fuo_bilibili.api.paging import Page
+from fuo_bilibili.api.scheduler import Priority, current_priority
+from fuo_bilibili.api.schema.requests import FavoriteResourceRequest, UserVideoRequest
+from fuo_bilibili.provider import BilibiliProvider
+
+
+def info(bvid: str) -> SimpleNamespace:
+    data = SimpleNamespace(bvid=bvid, aid=1, cid=11, title='title', pic='', duration=timedelta(seconds=10),
+                           owner=SimpleNamespace(mid=1, name='up'), pages=[])
+    return SimpleNamespace(data=data)
+
+
+class FakeApi:
+    def __init__(self):
+        self.priorities = []
+
+    def video_get_info(self, request):
+        self.priorities.append(current_priority())
+        return info(request.bvid)
+
+
+class FakeManifest:
+    def video_qualities(self):
+        return [Quality.Video.hd]
+
+    def audio_qualities(self):
+        return [Quality.Audio.hq]
+
+
+class FakeManifests:
+    def __init__(self):
+        self.priorities = []
+
+    def get(self, bvid, cid):
+        self.priorities.append(current_priority())
+        return FakeManifest()
+
+
+def provider_with_fakes() -> BilibiliProvider:
+    provider = BilibiliProvider()
+    provider._api = FakeApi()
+    provider._videos = VideoMetadataStore()
+    provider._manifests = FakeManifests()
+    return provider
+
+
+def test_list_quality_resolves_manifest_at_playback_priority():
+    provider = provider_with_fakes()
+    assert provider.song_list_quality(SimpleNamespace(identifier='BV1')) == [Quality.Audio.hq]
+    assert provider.video_list_quality(SimpleNamespace(identifier='BV2')) == [Quality.Video.hd]
+    # 首次获取 cid 与播放清单都以 PLAYBACK 优先级发出
+    assert provider._api.priorities == [Priority.PLAYBACK, Priority.PLAYBACK]
+    assert provider._manifests.priorities == [Priority.PLAYBACK, Priority.PLAYBACK]
+    assert current_priority() is not Priority.PLAYBACK
+
+
+def test_refresh_notifications_are_coalesced():
+    provider = BilibiliProvider()
+    notified = []
+    provider.library_refreshed.connect(notified.append, weak=False)
+    for pn, ps in ((2, 50), (1, 10), (1, 50), (3, 50)):
+        provider._on_api_refreshed('', FavoriteResourceRequest(media_id=1, pn=pn, ps=ps), None)
+    provider._on_api_refreshed('', UserVideoRequest(mid=2), None)
+    assert notified == ['11_1', '2']
+
+
+def test_cursor_streams_are_per_user():
+    provider = BilibiliProvider()
+    provider._api = SimpleNamespace(namespace='1')
+    provider._streams = dict()
+    provider._paging_executor = ThreadPoolExecutor(max_workers=1)
+
+    def fetch(cursor):
+        return Page([provider._api.namespace], has_more=False)
+
+    try:
+        first = provider._cursor_stream('HISTORY', fetch)
+        assert list(first) == ['1']
+        assert provider._cursor_stream('HISTORY', fetch) is first
+        provider._api.namespace = '2'
+        second = provider._cursor_stream('HISTORY', fetch)
+        assert second is not first
+        assert list(second) == ['2']
+        assert list(provider._streams) == [('2', 'HISTORY')]
+    finally:
+        provider._paging_executor.shutdown()
@@ -0,0 +1,56 @@
+from fuo_bilibili.api.ratelimit import RateLimit, RateLimiter, TokenBucket
+
+
+def test_burst_then_wait(timer):
+    bucket = TokenBucket(RateLimit(rate=2, burst=3), timer)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    # 令牌用完后按速率排队
+    assert bucket.reserve() == 0.5
+    assert bucket.reserve() == 1.0
+
+
+def test_refill_is_capped_at_burst(timer):
+    bucket = TokenBucket(RateLimit(rate=2, burst=3), timer)
+    for _ in range(3):
+        bucket.reserve()
+    timer.advance(1)
+    assert bucket.tokens == 0
+    assert bucket.reserve() == 0
+    timer.advance(60)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == 0.5
+
+
+def test_penalize_halves_rate_and_backs_off(timer):
+    bucket = TokenBucket(RateLimit(rate=8, burst=10, min_rate=3), timer)
+    bucket.penalize()
+    assert bucket.rate == 4
+    # 退避时长为 BACKOFF_BASE 乘以 0.5~1.5 的抖动
+    wait = bucket.reserve()
+    assert TokenBucket.BACKOFF_BASE * 0.5 <= wait <= TokenBucket.BACKOFF_BASE * 1.5
+    bucket.penalize()
+    bucket.penalize()
+    assert bucket.rate == 3
+    assert bucket.state()['throttled'] == 3
+
+
+def test_reward_recovers_rate_gradually(timer):
+    bucket = TokenBucket(RateLimit(rate=10, burst=10), timer)
+    bucket.penalize()
+    assert bucket.rate == 5
+    bucket.reward()
+    assert bucket.rate == 5.5
+    for _ in range(20):
+        bucket.reward()
+    assert bucket.rate == 10
+    assert bucket.failures == 0
+
+
+def test_request_waits_for_slowest_bucket():
+    url = 'https://api.bilibili.com/x/web-interface/view?bvid=BV1'
+    limiter = RateLimiter({'api.bilibili.com': RateLimit(rate=100, burst=100),
+                           'https://api.bilibili.com/x/web-interface/view': RateLimit(rate=1, burst=1)})
+    assert limiter.reserve(url) == 0
+    assert 0.9 < limiter.reserve(url) <= 1
+    # 同一主机的其他接口只受主机限流约束
+    assert limiter.reserve('https://api.bilibili.com/x/player/playurl') == 0
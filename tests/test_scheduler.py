@@ -0,0 +1,50 @@
+import threading
+import time
+
+from fuo_bilibili.api.scheduler import Priority, RequestScheduler, request_priority
+
+
+def wait_until(predicate, timeout: float = 2):
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, 'condition not reached'
+        time.sleep(0.005)
+
+
+def test_limit_per_priority():
+    scheduler = RequestScheduler({Priority.BACKGROUND: 1})
+    assert scheduler.acquire(Priority.BACKGROUND, 0)
+    assert not scheduler.acquire(Priority.BACKGROUND, 0)
+    # 其他优先级有各自的名额
+    assert scheduler.acquire(Priority.INTERACTIVE, 0)
+    scheduler.release(Priority.BACKGROUND)
+    assert scheduler.acquire(Priority.BACKGROUND, 0)
+
+
+def test_waiting_higher_priority_blocks_lower_priority():
+    scheduler = RequestScheduler({Priority.PLAYBACK: 1})
+    assert scheduler.acquire(Priority.PLAYBACK)
+    acquired = threading.Event()
+
+    def playback():
+        scheduler.acquire(Priority.PLAYBACK)
+        acquired.set()
+
+    thread = threading.Thread(target=playback)
+    thread.start()
+    wait_until(lambda: scheduler.stats()['PLAYBACK']['waiting'] == 1)
+    # 有播放请求在等待时，界面与后台请求都不会开始
+    assert not scheduler.acquire(Priority.INTERACTIVE, 0.05)
+    assert not scheduler.acquire(Priority.BACKGROUND, 0.05)
+    scheduler.release(Priority.PLAYBACK)
+    thread.join(2)
+    assert acquired.is_set()
+    assert scheduler.acquire(Priority.BACKGROUND, 0)
+    assert scheduler.stats()['PLAYBACK'] == dict(active=1, waiting=0, limit=1)
+
+
+def test_slot_uses_current_priority():
+    scheduler = RequestScheduler()
+    with request_priority(Priority.BACKGROUND), scheduler.slot():
+        assert scheduler.stats()['BACKGROUND']['active'] == 1
+    assert scheduler.stats()['BACKGROUND']['active'] == 0
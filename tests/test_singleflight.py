@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from fuo_bilibili.api.exceptions import ApiTimeoutError, RequestCancelledError
+from fuo_bilibili.api.scheduler import Priority, request_priority
+from fuo_bilibili.api.singleflight import SingleFlight
+from fuo_bilibili.api.timeout import Deadline
+
+
+def wait_until(predicate, timeout: float = 2):
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, 'condition not reached'
+        time.sleep(0.005)
+
+
+class Leader:
+    """
+    在后台线程中发起一次阻塞的调用，release 后返回 result
+    """
+
+    def __init__(self, flight: SingleFlight, key, priority: Priority = Priority.INTERACTIVE, result='leader',
+                 error: Exception = None):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+        def fn():
+            self.started.set()
+            self.release.wait(2)
+            if error is not None:
+                raise error
+            return result
+
+        def run():
+            with request_priority(priority):
+                try:
+                    flight.do('group', key, fn)
+                except Exception as e:
+                    assert e is error
+
+        self.thread = threading.Thread(target=run)
+        self.thread.start()
+        self.started.wait(2)
+
+    def finish(self):
+        self.release.set()
+        self.thread.join(2)
+
+
+def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    leader = Leader(flight, 'key', Priority.INTERACTIVE)
+    results = []
+    joiner = threading.Thread(target=lambda: results.append(flight.do('group', 'key', lambda: 'joiner')))
+    joiner.start()
+    wait_until(lambda: flight.stats()['group'].coalesced == 1)
+    leader.finish()
+    joiner.join(2)
+    assert results == ['leader']
+    assert flight.stats()['group'].as_dict() == dict(calls=1, coalesced=1)
+
+
+def test_playback_caller_does_not_wait_on_background_leader():
+    flight = SingleFlight()
+    leader = Leader(flight, 'key', Priority.BACKGROUND)
+    try:
+        with request_priority(Priority.PLAYBACK):
+            assert flight.do('group', 'key', lambda: 'playback') == 'playback'
+        assert flight.stats()['group'].as_dict() == dict(calls=2, coalesced=0)
+    finally:
+        leader.finish()
+
+
+def test_background_caller_joins_playback_leader():
+    flight = SingleFlight()
+    leader = Leader(flight, 'key', Priority.PLAYBACK)
+    results = []
+
+    def background():
+        with request_priority(Priority.BACKGROUND):
+            results.append(flight.do('group', 'key', lambda: 'background'))
+
+    joiner = threading.Thread(target=background)
+    joiner.start()
+    wait_until(lambda: flight.stats()['group'].coalesced == 1)
+    leader.finish()
+    joiner.join(2)
+    assert results == ['leader']
+
+
+def test_key_is_released_after_failure():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flight.do('group', 'key', fail)
+    # 调用结束后同一 key 重新发起
+    assert flight.do('group', 'key', lambda: 'again') == 'again'
+
+
+def test_joiner_times_out_on_its_own_deadline():
+    flight = SingleFlight()
+    leader = Leader(flight, 'key')
+    try:
+        start = time.monotonic()
+        with pytest.raises(ApiTimeoutError):
+            flight.do('group', 'key', lambda: 'joiner', Deadline(0.1))
+        assert time.monotonic() - start < 1
+        assert leader.thread.is_alive()
+    finally:
+        leader.finish()
+
+
+def test_cancelling_joiner_does_not_affect_leader():
+    flight = SingleFlight()
+    leader = Leader(flight, 'key')
+    deadline = Deadline(None)
+    threading.Timer(0.05, deadline.cancel).start()
+    try:
+        with pytest.raises(RequestCancelledError):
+            flight.do('group', 'key', lambda: 'joiner', deadline)
+        assert leader.thread.is_alive()
+    finally:
+        leader.finish()
+
+
+def test_joiner_retries_when_leader_is_cancelled():
+    flight = SingleFlight()
+    leader = Leader(flight, 'key', error=RequestCancelledError('group'))
+    results = []
+    joiner = threading.Thread(
+        target=lambda: results.append(flight.do('group', 'key', lambda: 'joiner', Deadline(5))))
+    joiner.start()
+    wait_until(lambda: flight.stats()['group'].coalesced == 1)
+    leader.finish()
+    joiner.join(2)
+    assert results == ['joiner']
+    assert flight.stats()['group'].calls == 2
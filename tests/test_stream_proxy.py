@@ -0,0 +1,116 @@
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from fuo_bilibili.api.audio_cache import AudioCache
+from fuo_bilibili.api.stream_proxy import StreamProxy
+
+BODY = bytes(range(256)) * 10  # 2560 字节
+
+
+class Upstream(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        m = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        start, end = int(m.group(1)), min(int(m.group(2)), len(BODY) - 1)
+        self.send_response(206)
+        self.send_header('Content-Type', 'audio/mp4')
+        self.send_header('Content-Range', f'bytes {start}-{end}/{len(BODY)}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(BODY[start:end + 1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SmallChunkProxy(StreamProxy):
+    CHUNK_SIZE = 1000
+
+
+@pytest.fixture(scope='module')
+def upstream():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Upstream)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/a.m4a'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url(upstream):
+    proxy = SmallChunkProxy(read_ahead=2)
+    yield proxy.register([upstream])
+    proxy.close()
+
+
+def test_full_request_spans_chunks(url):
+    r = requests.get(url)
+    assert r.status_code == 200
+    assert r.headers['Accept-Ranges'] == 'bytes'
+    assert 'Content-Range' not in r.headers
+    assert r.content == BODY
+
+
+@pytest.mark.parametrize('header, start, end', [
+    ('bytes=10-20', 10, 20),
+    ('bytes=990-1010', 990, 1010),
+    ('bytes=2000-', 2000, 2559),
+    ('bytes=2500-9999', 2500, 2559),
+    ('bytes=-100', 2460, 2559),
+    ('bytes=-9999', 0, 2559),
+])
+def test_range_request(url, header, start, end):
+    r = requests.get(url, headers={'Range': header})
+    assert r.status_code == 206
+    assert r.headers['Content-Range'] == f'bytes {start}-{end}/{len(BODY)}'
+    assert r.content == BODY[start:end + 1]
+
+
+@pytest.mark.parametrize('header', ['bytes=2560-', 'bytes=3000-4000', 'bytes=20-10', 'bytes=-0'])
+def test_unsatisfiable_range(url, header):
+    r = requests.get(url, headers={'Range': header})
+    assert r.status_code == 416
+    assert r.headers['Content-Range'] == f'bytes */{len(BODY)}'
+    assert r.content == b''
+
+
+def test_head_request(url):
+    r = requests.head(url, headers={'Range': 'bytes=100-'})
+    assert r.status_code == 206
+    assert r.headers['Content-Length'] == str(len(BODY) - 100)
+
+
+def test_unknown_token(url):
+    assert requests.get(url + 'x').status_code == 404
+
+
+def test_upstream_failure_is_bad_gateway():
+    proxy = SmallChunkProxy()
+    try:
+        assert requests.get(proxy.register(['http://127.0.0.1:1/a.m4a'])).status_code == 502
+    finally:
+        proxy.close()
+
+
+def test_full_playback_is_cached_for_replay(upstream, tmp_path):
+    cache = AudioCache(tmp_path, 1024 * 1024)
+    proxy = SmallChunkProxy(cache=cache)
+    try:
+        # 部分读取不写入缓存
+        assert requests.get(proxy.register([upstream], cache_key=('BV1', 1, 30280)),
+                            headers={'Range': 'bytes=100-'}).status_code == 206
+        assert cache.get(('BV1', 1, 30280)) is None
+        assert requests.get(proxy.register([upstream], cache_key=('BV1', 1, 30280))).content == BODY
+        # 响应写完后才提交缓存
+        deadline = time.monotonic() + 2
+        while cache.get(('BV1', 1, 30280)) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.get(('BV1', 1, 30280)).read_bytes() == BODY
+    finally:
+        proxy.close()
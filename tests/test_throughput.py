@@ -0,0 +1,81 @@
+import pytest
+
+from fuo_bilibili.api.throughput import ThroughputEstimator
+
+MB = 1000 * 1000
+
+
+@pytest.fixture
+def estimator(timer):
+    return ThroughputEstimator(fast_half_life=2, slow_half_life=10, min_bytes=1000, min_duration=0.5,
+                               sample_window=1, start_latency=3, startup_buffer=3, safety=0.8, timer=timer)
+
+
+def test_no_estimate_before_enough_samples(estimator, timer):
+    assert estimator.estimate() is None
+    timer.advance(0.4)
+    estimator.add(MB, 0.4)
+    assert estimator.estimate() is None
+    assert estimator.budget() is None
+
+
+def test_sequential_downloads(estimator, timer):
+    for _ in range(3):
+        timer.advance(1)
+        estimator.add(MB, 1)
+    assert estimator.estimate() == pytest.approx(8 * MB)
+
+
+def test_concurrent_downloads_share_the_link(estimator, timer):
+    # 4 个分片同时下载 1 秒，各自只有 2 Mbps，链路总共 8 Mbps
+    timer.advance(1)
+    for _ in range(4):
+        estimator.add(MB // 4, 1)
+    timer.advance(1)
+    for _ in range(4):
+        estimator.add(MB // 4, 1)
+    assert estimator.estimate() == pytest.approx(8 * MB)
+
+
+def test_staggered_concurrent_downloads(estimator, timer):
+    # 两条连接交错下载，每个分片 1 秒，任意时刻都有两个分片在途
+    for _ in range(6):
+        timer.advance(0.5)
+        estimator.add(MB // 2, 1)
+    # 按单个分片计算只有 4 Mbps，开头只有一条连接的时段之后即接近 8 Mbps
+    assert estimator.estimate() == pytest.approx(8 * MB, rel=0.2)
+
+
+def test_idle_time_is_not_counted(estimator, timer):
+    timer.advance(0.5)
+    estimator.add(MB // 2, 0.5)
+    timer.advance(10)
+    estimator.add(MB // 2, 0.5)
+    assert estimator.estimate() == pytest.approx(8 * MB)
+
+
+def test_fast_average_reacts_to_drop(estimator, timer):
+    for _ in range(10):
+        timer.advance(1)
+        estimator.add(MB, 1)
+    timer.advance(1)
+    estimator.add(MB // 8, 1)
+    timer.advance(1)
+    estimator.add(MB // 8, 1)
+    # 前 10 秒结算为 8 Mbps，之后 1 秒为 1 Mbps；取快慢均值中较小的一个，即半衰期 2 秒的快速均值
+    alpha = 0.5 ** 0.5
+    weight = 1 - 0.5 ** 5
+    expected = (alpha * 8 * MB * weight + (1 - alpha) * MB) / (alpha * weight + 1 - alpha)
+    assert estimator.estimate() == pytest.approx(expected)
+
+
+def test_budget_and_stall_cap(estimator, timer):
+    for _ in range(2):
+        timer.advance(1)
+        estimator.add(MB, 1)
+    # min(safety, start_latency / startup_buffer) = 0.8
+    assert estimator.budget() == int(8 * MB * 0.8)
+    estimator.stall(2 * MB)
+    assert estimator.budget() == 2 * MB - 1
+    timer.advance(300)
+    assert estimator.budget() == int(8 * MB * 0.8)